@@ -1,8 +1,10 @@
 # api/admin.py
 from __future__ import annotations
 import os
-from fastapi import APIRouter, Header, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query
 from core.state_store import StateStore
+from storage.dlq import open_dead_letters, redrive
 from replay.replayer import ReplayService
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -17,6 +19,19 @@ def create_admin_router(cfg: dict, emit_raw: callable) -> APIRouter:
     max_span_blocks = int(reproc_cfg.get("max_span_blocks", 20000))
 
     replayer = ReplayService(emit_raw=emit_raw, cfg=cfg)
+    qcfg = cfg.get("queue", {}) or {}
+    dlq_refs: dict = {}  # DLQ/backend abertos sob demanda
+
+    def _dlq():
+        if "dlq" not in dlq_refs:
+            dlq_refs["dlq"] = open_dead_letters(qcfg)
+        return dlq_refs["dlq"]
+
+    def _queue_backend():
+        if "backend" not in dlq_refs:
+            from services.job_queue import make_backend
+            dlq_refs["backend"] = make_backend(qcfg)
+        return dlq_refs["backend"]
 
     def _require_admin(auth: str | None):
         if not admin_cfg.get("enabled", True):
@@ -54,8 +69,7 @@ def create_admin_router(cfg: dict, emit_raw: callable) -> APIRouter:
         sol_key = (cfg.get("listeners", {}).get("solana-testnet", {}).get("checkpoints", {}) or {}).get("key_scan")
         if base_key: keys.append(base_key)
         if sol_key: keys.append(sol_key)
-        for k in keys:
-            s.set(k, None)
+        s.mset({k: None for k in keys})
         return {"status": "ok", "reset_keys": keys}
 
     @router.post("/reprocess/base/tx")
@@ -93,4 +107,25 @@ def create_admin_router(cfg: dict, emit_raw: callable) -> APIRouter:
             emit_raw({"chain": "base-testnet", "type": "CHAIN_HEAD", "payload": {"block_number": int(head)}})
         return {"status": "queued", "address": address, "from": from_block, "to": to_block}
 
+    @router.get("/dlq")
+    def dlq_list(after: int = 0, limit: int = Query(default=100, le=1000), reason: str | None = None,
+                 chain: str | None = None, type: str | None = None,
+                 authorization: str | None = Header(default=None)):
+        _require_admin(authorization)
+        entries, nxt = _dlq().page(after=after, limit=limit, reason=reason, chain=chain, event_type=type)
+        return {"entries": [{k: v for k, v in e.items() if not k.startswith("_")} for e in entries],
+                "next": nxt, "total": _dlq().count()}
+
+    @router.post("/dlq/redrive")
+    def dlq_redrive(reason: str | None = None, chain: str | None = None, type: str | None = None,
+                    job_id: Optional[List[str]] = Query(default=None), batch: int = 1000,
+                    max_items: int | None = None, dry_run: bool = False,
+                    authorization: str | None = Header(default=None)):
+        _require_admin(authorization)
+        if not (reason or chain or type or job_id or max_items):
+            raise HTTPException(status_code=400, detail="informe um filtro ou max_items")
+        n = redrive(_dlq(), _queue_backend(), batch=batch, max_items=max_items, dry_run=dry_run,
+                    reason=reason, chain=chain, event_type=type, job_ids=set(job_id) if job_id else None)
+        return {"status": "ok", "redriven": n, "dry_run": dry_run}
+
     return router
@@ -0,0 +1,51 @@
+# benchmarks/bench_abi_registry.py
+"""
+Partida do EVMAbiDecoder com muitas ABIs por contrato:
+  - cold: sem cache (json.loads + canonical_type + keccak por evento) e grava o cache
+  - warm: mesmo conjunto lido do cache em disco (hash do conteúdo de cada ABI)
+"""
+from __future__ import annotations
+import argparse, json, os, tempfile, time
+from bridge.decoders.evm_abi import EVMAbiDecoder
+
+TYPES = ["address", "uint256", "bytes32", "bool", "(address,uint256)", "string", "uint64[]"]
+
+def synth_abi(k: int, events: int):
+    out = []
+    for e in range(events):
+        inputs = []
+        for j in range(4):
+            t = TYPES[(k + e + j) % len(TYPES)]
+            inp = {"name": f"a{j}", "type": "tuple" if t.startswith("(") else t, "indexed": j == 0}
+            if t.startswith("("):
+                inp["components"] = [{"name": "x", "type": "address"}, {"name": "y", "type": "uint256"}]
+            inputs.append(inp)
+        out.append({"type": "event", "name": f"Ev{k}_{e}", "anonymous": False, "inputs": inputs})
+    return out
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de partida do registro de ABIs")
+    p.add_argument("--abis", type=int, default=300, help="contratos (um arquivo ABI cada)")
+    p.add_argument("--events", type=int, default=20, help="eventos por ABI")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        contracts = []
+        for k in range(args.abis):
+            path = os.path.join(d, f"c{k}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"abi": synth_abi(k, args.events)}, f)
+            contracts.append({"address": "0x" + f"{k:040x}", "abi_files": [path]})
+        cache = os.path.join(d, "abi_cache.json")
+
+        t0 = time.perf_counter()
+        EVMAbiDecoder(contracts=contracts, cache_path=cache)
+        t1 = time.perf_counter()
+        EVMAbiDecoder(contracts=contracts, cache_path=cache)
+        t2 = time.perf_counter()
+    n = args.abis * args.events
+    print(f"cold {1000 * (t1 - t0):8.1f} ms  ({args.abis} ABIs, {n} eventos)")
+    print(f"warm {1000 * (t2 - t1):8.1f} ms  ({(t1 - t0) / (t2 - t1):.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# benchmarks/bench_event_id.py
+"""
+Custo de deterministic_event_id:
+  - legacy:  sha256 de f"...{sorted(payload.items())}" (implementação anterior)
+  - pointer: (chain, tx_hash, log_index) presentes → blake2b só do ponteiro
+  - payload: sem log_index → blake2b do JSON canônico de ponteiro + payload
+"""
+from __future__ import annotations
+import argparse, time
+from hashlib import sha256
+from core.events import deterministic_event_id
+
+def legacy_event_id(source, payload) -> str:
+    base = f"{source.get('chain')}|{source.get('tx_hash')}|{source.get('log_index')}|{source.get('slot')}|{sorted(payload.items())}"
+    return sha256(base.encode()).hexdigest()
+
+def make_payload(fields: int):
+    return {f"k{i}": {"amount": i, "to": "0x" + f"{i:040x}", "data": "0x" + "ab" * 64} for i in range(fields)}
+
+def bench(fn, source, payload, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(source, payload)
+    return n / (time.perf_counter() - t0)
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark deterministic_event_id")
+    p.add_argument("--n", type=int, default=50000)
+    args = p.parse_args()
+    log_src = {"chain": "base-testnet", "tx_hash": "0x" + "11" * 32, "log_index": 7, "block_number": 100}
+    sol_src = {"chain": "solana-testnet", "tx_hash": "5VERv8NMvzbJMEkV8xnrLkEaWRtSz9CosKDYjCJjBRnb", "slot": 100}
+    for fields in (2, 50):
+        payload = make_payload(fields)
+        print(f"payload={fields:3d} campos  legacy={bench(legacy_event_id, log_src, payload, args.n):10.0f} ids/s  "
+              f"pointer={bench(deterministic_event_id, log_src, payload, args.n):10.0f} ids/s  "
+              f"payload={bench(deterministic_event_id, sol_src, payload, args.n):10.0f} ids/s")
+
+if __name__ == "__main__":
+    main()
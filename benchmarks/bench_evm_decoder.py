@@ -0,0 +1,101 @@
+# benchmarks/bench_evm_decoder.py
+"""
+Decodificação de logs EVM:
+  - legacy:   web3 get_event_data por log (Web3() + assinatura reconstruída a cada chamada)
+  - compiled: CompiledEvent por topic0, eth_abi direto
+Corpus: --corpus <arquivo JSONL com logs de eth_getLogs> + --abi <arquivos ABI>;
+sem --corpus, gera um corpus sintético (Transfer, Swap e um evento com bytes/string).
+"""
+from __future__ import annotations
+import argparse, json, os, random, tempfile, time
+from typing import Any, Dict, List
+from eth_abi import encode
+from web3 import Web3
+from bridge.decoders.evm_abi import EVMAbiDecoder
+
+ABI = [
+    {"type": "event", "name": "Transfer", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "from", "type": "address"},
+        {"indexed": True, "name": "to", "type": "address"},
+        {"indexed": False, "name": "value", "type": "uint256"}]},
+    {"type": "event", "name": "Swap", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "sender", "type": "address"},
+        {"indexed": False, "name": "amount0In", "type": "uint256"},
+        {"indexed": False, "name": "amount1In", "type": "uint256"},
+        {"indexed": False, "name": "amount0Out", "type": "uint256"},
+        {"indexed": False, "name": "amount1Out", "type": "uint256"},
+        {"indexed": True, "name": "to", "type": "address"}]},
+    {"type": "event", "name": "MessageSent", "anonymous": False, "inputs": [
+        {"indexed": True, "name": "id", "type": "bytes32"},
+        {"indexed": False, "name": "dst", "type": "string"},
+        {"indexed": False, "name": "payload", "type": "bytes"}]},
+]
+
+def legacy_decode(event_abi: Dict[str, Any], log: Dict[str, Any]) -> Dict[str, Any]:
+    from web3._utils.events import get_event_data
+    try:
+        from web3._utils.abi import build_event_signature_hex  # web3 < 7
+    except ImportError:
+        from eth_utils import event_abi_to_log_topic as build_event_signature_hex
+    w3 = Web3()
+    _ = build_event_signature_hex(event_abi)
+    return dict(get_event_data(w3.codec, event_abi, log).get("args", {}))
+
+def _addr(rnd: random.Random) -> str:
+    return "0x" + rnd.randbytes(20).hex()
+
+def synth_corpus(n: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(7)
+    t0 = {e["name"]: Web3.keccak(text=f"{e['name']}({','.join(i['type'] for i in e['inputs'])})") for e in ABI}
+    logs = []
+    for i in range(n):
+        kind = ("Transfer", "Transfer", "Swap", "MessageSent")[i % 4]
+        if kind == "Transfer":
+            a, b = _addr(rnd), _addr(rnd)
+            topics = [t0[kind], encode(["address"], [a]), encode(["address"], [b])]
+            data = encode(["uint256"], [rnd.randrange(2 ** 128)])
+        elif kind == "Swap":
+            topics = [t0[kind], encode(["address"], [_addr(rnd)]), encode(["address"], [_addr(rnd)])]
+            data = encode(["uint256"] * 4, [rnd.randrange(2 ** 96) for _ in range(4)])
+        else:
+            topics = [t0[kind], rnd.randbytes(32)]
+            data = encode(["string", "bytes"], ["solana-testnet", rnd.randbytes(96)])
+        logs.append({"address": "0x" + "11" * 20, "topics": ["0x" + bytes(t).hex() for t in topics],
+                     "data": "0x" + data.hex(), "blockNumber": 1000 + i, "logIndex": i % 8,
+                     "transactionIndex": 0, "transactionHash": "0x" + f"{i:064x}", "blockHash": "0x" + "22" * 32})
+    return logs
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark EVMAbiDecoder (legacy vs compiled)")
+    p.add_argument("--corpus", default=None, help="JSONL com logs (address/topics/data)")
+    p.add_argument("--abi", action="append", default=None, help="arquivo ABI (repetível)")
+    p.add_argument("--n", type=int, default=20000, help="tamanho do corpus sintético")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        abi_files = args.abi
+        if not abi_files:
+            abi_files = [os.path.join(d, "bench.json")]
+            with open(abi_files[0], "w", encoding="utf-8") as f:
+                json.dump(ABI, f)
+        if args.corpus:
+            with open(args.corpus, "r", encoding="utf-8") as f:
+                logs = [json.loads(line) for line in f if line.strip()]
+        else:
+            logs = synth_corpus(args.n)
+        dec = EVMAbiDecoder(abi_files=abi_files)
+        logs = [lg for lg in logs if lg.get("topics") and dec.can_decode(lg["topics"][0])]
+
+        t0 = time.perf_counter()
+        for lg in logs:
+            legacy_decode(dec._events_by_topic[lg["topics"][0].lower()].abi, lg)
+        t1 = time.perf_counter()
+        for lg in logs:
+            dec.decode(lg)
+        t2 = time.perf_counter()
+    legacy, compiled = len(logs) / (t1 - t0), len(logs) / (t2 - t1)
+    print(f"legacy   {legacy:10.0f} logs/s")
+    print(f"compiled {compiled:10.0f} logs/s  ({compiled / legacy:.1f}x, {len(logs)} logs)")
+
+if __name__ == "__main__":
+    main()
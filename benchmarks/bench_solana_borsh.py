@@ -0,0 +1,135 @@
+# benchmarks/bench_solana_borsh.py
+"""
+Decodificação Borsh de eventos Solana:
+  - legacy:   interpretação do layout YAML campo a campo com parsers construct (decoder antigo)
+  - compiled: CompiledLayout (runs fixos num struct.Struct, memoryview nos variáveis)
+O layout "legacy" usa os tipos que o decoder antigo suportava (u8/u64/bytes_len, como em
+config/sync.yaml); o "rich" exercita o conjunto completo e só roda no compilado.
+"""
+from __future__ import annotations
+import argparse, random, struct, time
+from typing import Any, Dict, List, Optional
+from bridge.decoders.solana_borsh import SolanaBorshDecoder
+
+PROGRAM = "11111111111111111111111111111111"
+
+LEGACY_LAYOUT = {
+    "discriminator": "u8",
+    "variants": {
+        "1": {"name": "AgentHeartbeat", "fields": [
+            {"name": "agent_id_len", "type": "u8"},
+            {"name": "agent_id", "type": "bytes_len", "ref": "agent_id_len"}]},
+        "2": {"name": "BridgeNotice", "fields": [
+            {"name": "amount", "type": "u64"},
+            {"name": "nonce", "type": "u64"},
+            {"name": "fee", "type": "u64"},
+            {"name": "asset_len", "type": "u8"},
+            {"name": "asset", "type": "bytes_len", "ref": "asset_len"}]},
+    },
+}
+
+RICH_LAYOUT = {
+    "discriminator": "u8",
+    "types": {"Leg": {"fields": [{"name": "mint", "type": "pubkey"}, {"name": "amount", "type": "u128"}]}},
+    "variants": {
+        "3": {"name": "BridgeTransfer", "fields": [
+            {"name": "sender", "type": "pubkey"},
+            {"name": "amount", "type": "u64"},
+            {"name": "fee_bps", "type": "u16"},
+            {"name": "delta", "type": "i64"},
+            {"name": "final", "type": "bool"},
+            {"name": "dst_chain", "type": "string"},
+            {"name": "memo", "type": "option<string>"},
+            {"name": "legs", "type": "vec<Leg>"},
+            {"name": "weights", "type": "vec<u32>"}]},
+    },
+}
+
+def legacy_decode(layout: Dict[str, Any], raw_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """Cópia do SolanaBorshDecoder.decode anterior (construct por campo, a cada mensagem)."""
+    from borsh_construct import U8, U64
+    from construct import Bytes
+    type_map = {"u8": U8, "u64": U64}
+    disc_parser = type_map.get(layout.get("discriminator", "u8"))
+    i = 0
+    event_tag = disc_parser.parse(raw_bytes[i:i + disc_parser.sizeof()])
+    i += disc_parser.sizeof()
+    variant = layout.get("variants", {}).get(str(event_tag))
+    if not variant:
+        return {"event_tag": event_tag, "raw": raw_bytes.hex()}
+    out = {"event_tag": event_tag, "name": variant.get("name")}
+    for field in (variant.get("fields") or []):
+        ftype, fname = field["type"], field["name"]
+        if ftype in ("u8", "u64"):
+            parser = type_map[ftype]
+            out[fname] = int(parser.parse(raw_bytes[i:i + parser.sizeof()]))
+            i += parser.sizeof()
+        elif ftype == "bytes_len":
+            blen = int(out[field["ref"]])
+            value = Bytes(blen).parse(raw_bytes[i:i + blen])
+            i += blen
+            try:
+                out[fname] = value.decode("utf-8")
+            except Exception:
+                out[fname] = value.hex()
+        else:
+            out[fname] = raw_bytes[i:].hex()
+            break
+    return out
+
+def _string(s: str) -> bytes:
+    b = s.encode()
+    return struct.pack("<I", len(b)) + b
+
+def legacy_corpus(n: int, rnd: random.Random) -> List[bytes]:
+    out = []
+    for k in range(n):
+        if k % 2:
+            agent = f"agent-{rnd.randrange(10 ** 6)}".encode()
+            out.append(bytes([1, len(agent)]) + agent)
+        else:
+            asset = b"USDC"
+            out.append(bytes([2]) + struct.pack("<QQQ", *(rnd.randrange(2 ** 63) for _ in range(3)))
+                       + bytes([len(asset)]) + asset)
+    return out
+
+def rich_corpus(n: int, rnd: random.Random) -> List[bytes]:
+    keys = [rnd.randbytes(32) for _ in range(64)]
+    out = []
+    for k in range(n):
+        legs = [rnd.choice(keys) + rnd.randrange(2 ** 100).to_bytes(16, "little") for _ in range(2)]
+        memo = (b"\x01" + _string("ref-%d" % k)) if k % 3 else b"\x00"
+        out.append(bytes([3]) + rnd.choice(keys) + struct.pack("<QHq?", rnd.randrange(2 ** 63), 30, -k, True)
+                   + _string("base-testnet") + memo + struct.pack("<I", 2) + b"".join(legs)
+                   + struct.pack("<I4I", 4, 1, 2, 3, 4))
+    return out
+
+def _rate(fn, n: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return n / best
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark SolanaBorshDecoder (legacy vs compiled)")
+    p.add_argument("--n", type=int, default=20000, help="mensagens por corpus")
+    args = p.parse_args()
+    rnd = random.Random(5)
+
+    msgs = legacy_corpus(args.n, rnd)
+    dec = SolanaBorshDecoder({PROGRAM: LEGACY_LAYOUT})
+    assert [dec.decode(PROGRAM, m) for m in msgs[:50]] == [legacy_decode(LEGACY_LAYOUT, m) for m in msgs[:50]]
+    legacy = _rate(lambda: [legacy_decode(LEGACY_LAYOUT, m) for m in msgs], len(msgs))
+    compiled = _rate(lambda: [dec.decode(PROGRAM, m) for m in msgs], len(msgs))
+    print(f"legacy        {legacy:10.0f} msgs/s")
+    print(f"compiled      {compiled:10.0f} msgs/s  ({compiled / legacy:.1f}x)")
+
+    rich = rich_corpus(args.n, rnd)
+    rdec = SolanaBorshDecoder({PROGRAM: RICH_LAYOUT})
+    rate = _rate(lambda: [rdec.decode(PROGRAM, m) for m in rich], len(rich))
+    print(f"compiled rich {rate:10.0f} msgs/s  (pubkey/u128/string/option/vec<struct>)")
+
+if __name__ == "__main__":
+    main()
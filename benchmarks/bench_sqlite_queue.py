@@ -0,0 +1,57 @@
+# benchmarks/bench_sqlite_queue.py
+"""
+Throughput de enqueue/pop_due/ack do SQLiteQueueBackend:
+  - legacy: conexão nova por operação, journal rollback (comportamento anterior)
+  - pooled: conexão persistente por thread, WAL + synchronous=NORMAL
+"""
+from __future__ import annotations
+import argparse, os, sqlite3, tempfile, time
+from core.schemas import JobEnvelope, CoreEvent, ChainPointer
+from storage.sqlite_queue import SQLiteQueueBackend
+
+class LegacySQLiteQueueBackend(SQLiteQueueBackend):
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+def make_envs(n: int):
+    now = time.time()
+    out = []
+    for i in range(n):
+        ev = CoreEvent(
+            id=f"{i:064x}", type="BRIDGE_MESSAGE", payload={"amount": i, "asset": "USDC"},
+            source=ChainPointer(chain="base-testnet", block_number=1000 + i, tx_hash=f"0x{i:064x}", log_index=0),
+            observed_at=now,
+        )
+        out.append(JobEnvelope(job_id=ev.id, event=ev, next_run_at=now))
+    return out
+
+def run(backend: SQLiteQueueBackend, envs, batch: int) -> dict:
+    t0 = time.perf_counter()
+    for env in envs:
+        backend.enqueue(env)
+    t1 = time.perf_counter()
+    acked = 0
+    while True:
+        due = backend.pop_due(time.time() + 1, batch)
+        if not due:
+            break
+        for env in due:
+            backend.ack(env)
+            acked += 1
+    t2 = time.perf_counter()
+    return {"enqueue_ops_s": len(envs) / (t1 - t0), "pop_ack_ops_s": acked / (t2 - t1)}
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark SQLiteQueueBackend")
+    p.add_argument("--jobs", type=int, default=5000)
+    p.add_argument("--batch", type=int, default=50)
+    args = p.parse_args()
+    envs = make_envs(args.jobs)
+    with tempfile.TemporaryDirectory() as d:
+        for name, cls in (("legacy", LegacySQLiteQueueBackend), ("pooled", SQLiteQueueBackend)):
+            be = cls(path=os.path.join(d, f"{name}.db"))
+            r = run(be, envs, args.batch)
+            print(f"{name:8s} enqueue={r['enqueue_ops_s']:10.0f} ops/s  pop+ack={r['pop_ack_ops_s']:10.0f} ops/s")
+
+if __name__ == "__main__":
+    main()
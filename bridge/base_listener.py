@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 from bridge.providers.evm_provider import EVMProvider
 from bridge.decoders.evm_abi import EVMAbiDecoder
 from bridge.historical.evm_scanner import EVMHistoricalScanner
+from bridge.historical.scan_plan import LogFilter, fetch_logs
 from telemetry.metrics import EVENTS_TOTAL, EVENTS_DECODE_ERRORS, CHAIN_HEAD_GAUGE, CHECKPOINT_BASE, CHECKPOINT_BASE_CONTRACT
 from core.state_store import StateStore
 from resilience.circuit_breaker import CircuitBreaker
@@ -25,8 +26,10 @@ class BaseListener:
       - Scanner histórico dedicado por contrato (checkpoints por address)
       - Decodificação ABI, Circuit breaker e Adaptive polling
     """
-    def __init__(self, emit: Callable[[Dict[str, Any]], None], config_path: str = "config/sync.yaml"):
+    def __init__(self, emit: Callable[[Dict[str, Any]], None], config_path: str = "config/sync.yaml",
+                 emit_many: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
         self.emit = emit
+        self.emit_many = emit_many  # opcional: recebe cada página de get_logs (ex.: EventRouter.route_many)
         self._running = False
         with open(config_path, "r", encoding="utf-8") as f:
             cfg = yaml.safe_load(f) or {}
@@ -45,6 +48,8 @@ class BaseListener:
         gap_cfg = self.cfg.get("gap_scan", {}) or {}
         self.batch_blocks = int(gap_cfg.get("batch_blocks", 500))
         self.max_backfill = int(gap_cfg.get("max_backfill", 20000))
+        # contratos por eth_getLogs coalescido (1 = uma chamada por contrato)
+        self.max_addresses = int((self.cfg.get("get_logs", {}) or {}).get("max_addresses", 50))
 
         hist_cfg = self.cfg.get("historical_scan", {}) or {}
         self.hscan_enabled = bool(hist_cfg.get("enabled", True))
@@ -64,8 +69,10 @@ class BaseListener:
         self.cp_prefix_addr = (self.cfg.get("checkpoints", {}) or {}).get("per_contract_prefix", "cp:base:contract:")
         self._last_scanned_block: Optional[int] = self.state.get(self.cp_key_global, None)
 
-        abi_files = self.cfg.get("abi_files") or []
-        self.decoder = EVMAbiDecoder(abi_files=abi_files)
+        # ABIs globais (fallback por topic0) + abi_files por contrato (address, topic0)
+        self.decoder = EVMAbiDecoder(abi_files=self.cfg.get("abi_files") or [],
+                                     contracts=self.cfg.get("contracts") or [],
+                                     cache_path=self.cfg.get("abi_cache"))
 
         # Scanner histórico dedicado
         self.hscanner = EVMHistoricalScanner(
@@ -75,7 +82,9 @@ class BaseListener:
             per_contract_cp_get=lambda addr: self.state.get(self.cp_prefix_addr + addr.lower()),
             per_contract_cp_set=lambda addr, v: self.state.set(self.cp_prefix_addr + addr.lower(), int(v)),
             default_type=self.evmap.get("default_type", "BRIDGE_MESSAGE"),
-            page_blocks=self.hscan_page
+            page_blocks=self.hscan_page,
+            max_addresses=self.max_addresses,
+            emit_many=self.emit_many
         )
 
     def _emit_chain_head(self, head: int):
@@ -83,15 +92,18 @@ class BaseListener:
         self.emit({"chain": "base-testnet", "type": "CHAIN_HEAD", "payload": {"block_number": head}})
 
     def _scan_range_live(self, from_block: int, to_block: int):
-        for c in (self.cfg.get("contracts") or []):
+        contracts = self.cfg.get("contracts") or []
+        # uma chamada eth_getLogs para os contratos (scan_plan), demultiplexada por contrato
+        filters = [LogFilter(c.get("address"), c.get("topics") or []) for c in contracts]
+        for c, logs in zip(contracts, fetch_logs(self.provider, filters, from_block, to_block, self.max_addresses)):
             address = c.get("address")
-            topics: List[str] = c.get("topics") or []
-            for log in self.provider.get_logs(address, topics, from_block, to_block):
+            page: List[Dict[str, Any]] = []
+            for log in logs:
                 try:
                     t0 = log.get("topics", [None])[0]
                     topic0 = t0.hex() if hasattr(t0, "hex") else str(t0) if t0 else ""
                     decoded = None
-                    if topic0 and self.decoder and self.decoder.can_decode(topic0):
+                    if topic0 and self.decoder and self.decoder.can_decode(topic0, address):
                         decoded = self.decoder.decode({
                             "address": address,
                             "topics": log.get("topics"),
@@ -110,10 +122,18 @@ class BaseListener:
                         "type": self.evmap.get("default_type", "BRIDGE_MESSAGE"),
                         "payload": payload,
                     }
-                    EVENTS_TOTAL.labels(chain="base-testnet", type=raw["type"]).inc()
-                    self.emit(raw)
                 except Exception as e:
                     EVENTS_DECODE_ERRORS.labels(chain="base-testnet", where="decode_or_emit").inc()
+                    continue
+                EVENTS_TOTAL.labels(chain="base-testnet", type=raw["type"]).inc()
+                page.append(raw)
+            # falha na entrega propaga antes do CP global: a faixa é reescaneada no próximo ciclo
+            if self.emit_many is not None:
+                if page:
+                    self.emit_many(page)
+            else:
+                for raw in page:
+                    self.emit(raw)
         # atualiza CP global
         CHECKPOINT_BASE.set(to_block)
         self.state.set(self.cp_key_global, int(to_block))
@@ -143,30 +163,30 @@ class BaseListener:
         Decide ponto inicial para scanner histórico:
           - menor CP entre contratos (se existir), senão head - margin_confirmations.
         """
-        start_candidates = []
-        for c in (self.cfg.get("contracts") or []):
-            addr = (c.get("address") or "").lower()
-            if not addr:
-                continue
-            cp = self.state.get(self.cp_prefix_addr + addr)
-            if cp is not None:
-                start_candidates.append(int(cp))
+        addrs = [(c.get("address") or "").lower() for c in (self.cfg.get("contracts") or [])]
+        cps = self.state.mget([self.cp_prefix_addr + a for a in addrs if a])
+        start_candidates = [int(cp) for cp in cps.values() if cp is not None]
         if start_candidates:
             return min(start_candidates)
         return max(0, head - self.hscan_margin)
 
     def _historical_scan_all_contracts(self, from_block: int, to_block: int):
-        for c in (self.cfg.get("contracts") or []):
+        contracts = self.cfg.get("contracts") or []
+        cps = self.state.mget([self.cp_prefix_addr + (c.get("address") or "").lower() for c in contracts])
+        by_start: Dict[int, List[Any]] = {}  # contratos no mesmo CP dividem as chamadas eth_getLogs
+        for c in contracts:
             addr = (c.get("address") or "").lower()
             if not addr:
                 continue
             topics: List[str] = c.get("topics") or []
             # ponto de partida por contrato (respeita CP por address)
-            cp = self.state.get(self.cp_prefix_addr + addr)
+            cp = cps.get(self.cp_prefix_addr + addr)
             start = int(from_block if cp is None else max(cp, from_block))
             if start >= to_block:
                 continue
-            self.hscanner.scan_range_for_contract(addr, topics, start + 1, to_block)
+            by_start.setdefault(start, []).append((addr, topics))
+        for start, group in sorted(by_start.items()):
+            self.hscanner.scan_range_for_contracts(group, start + 1, to_block)
 
     def start(self):
         if not self.provider.is_connected():
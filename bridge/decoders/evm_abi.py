@@ -1,68 +1,398 @@
 # bridge/decoders/evm_abi.py
 from __future__ import annotations
-import json
+import hashlib, json, os, re, tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from web3 import Web3
+from eth_utils import to_checksum_address
+try:
+    from eth_abi import decode as abi_decode  # eth_abi >= 4
+except ImportError:  # pragma: no cover
+    from eth_abi import decode_abi as abi_decode  # type: ignore
+try:
+    import numpy as np  # opcional: só o decode em lote (decode_batch/decode_many) usa
+except ImportError:  # pragma: no cover
+    np = None
 
-class EVMAbiDecoder:
+# tipos cujo valor indexado vira keccak no topic (o topic guarda só o hash)
+_HASHED_INDEXED = ("string", "bytes", "tuple")
+# tipos estáticos de uma palavra (32 bytes): candidatos ao decode colunar
+_WORD_TYPE = re.compile(r"^(address|bool|u?int\d*|bytes\d+)$")
+# abaixo disso o decode por log sai mais barato que montar os arrays
+BATCH_MIN = 16
+
+def canonical_type(inp: Dict[str, Any]) -> str:
+    """Tipo ABI canônico para assinatura/decode: tuple → (t1,t2,...) preservando sufixos de array."""
+    t = inp["type"]
+    if t.startswith("tuple"):
+        return "(" + ",".join(canonical_type(c) for c in inp.get("components", [])) + ")" + t[len("tuple"):]
+    return t
+
+def _is_hashed_indexed(t: str) -> bool:
+    return t.endswith("]") or t.startswith("(") or t in _HASHED_INDEXED
+
+def _to_bytes(v: Any) -> bytes:
+    if isinstance(v, (bytes, bytearray)):
+        return bytes(v)
+    s = str(v)
+    return bytes.fromhex(s[2:] if s[:2] in ("0x", "0X") else s)
+
+def _norm_topic(v: Any) -> str:
+    if isinstance(v, (bytes, bytearray)):
+        return "0x" + bytes(v).hex()
+    s = str(v).lower()
+    return s if s.startswith("0x") else "0x" + s
+
+@lru_cache(maxsize=65536)
+def _checksum(addr: str) -> str:
+    return to_checksum_address(addr)
+
+def _jsonable(t: str, v: Any) -> Any:
+    """Normaliza a saída do eth_abi como o web3 (endereços checksum), com bytes em 0x-hex."""
+    if t == "address":
+        return _checksum(v)
+    if isinstance(v, (bytes, bytearray)):
+        return "0x" + bytes(v).hex()
+    if isinstance(v, (list, tuple)):
+        base = t[:t.rindex("[")] if t.endswith("]") else None
+        if base is not None:
+            return [_jsonable(base, x) for x in v]
+        inner = _split_tuple(t)
+        return [_jsonable(it, x) for it, x in zip(inner, v)]
+    return v
+
+def _split_tuple(t: str) -> List[str]:
+    """'(address,(uint8,bytes),uint256)' → ['address', '(uint8,bytes)', 'uint256']."""
+    out, depth, cur = [], 0, ""
+    for ch in t[1:-1]:
+        if ch == "," and depth == 0:
+            out.append(cur)
+            cur = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        cur += ch
+    if cur:
+        out.append(cur)
+    return out
+
+def _hex_slices(block, width: int) -> List[str]:
+    """(n, width) uint8 → ['0x..', ...] com um único .hex() para a coluna inteira."""
+    h, step = block.tobytes().hex(), 2 * width
+    return ["0x" + h[i:i + step] for i in range(0, len(h), step)]
+
+def _word_column(t: str, words) -> Tuple[List[Any], Any]:
     """
-    Carrega ABIs e resolve eventos por topic0. Decodifica args usando o padrão web3.
+    Decodifica uma coluna de palavras ABI (n, 32) de um tipo estático. Devolve os valores
+    (mesma saída de _jsonable(eth_abi)) e a máscara das linhas com padding válido; as
+    demais são refeitas pelo decode por log, que levanta o mesmo erro do eth_abi.
     """
-    def __init__(self, abi_files: Optional[List[str]] = None):
-        self._events_by_topic: Dict[str, Dict[str, Any]] = {}
-        for f in abi_files or []:
-            p = Path(f)
-            if p.exists():
-                data = json.loads(p.read_text())
-                abi = data.get("abi", data)  # aceita arquivo já contendo 'abi' ou a lista direto
-                self._index_events(abi)
-
-    def _index_events(self, abi: List[Dict[str, Any]]):
-        for item in abi:
-            if item.get("type") == "event":
-                name = item["name"]
-                types = ",".join(i["type"] for i in item.get("inputs", []))
-                sig = f"{name}({types})"
-                topic0 = Web3.keccak(text=sig).hex()
-                self._events_by_topic[topic0] = {"name": name, "abi": item}
-
-    def can_decode(self, topic0: str) -> bool:
-        return topic0.lower() in self._events_by_topic
+    n = len(words)
+    if t == "address":
+        ok = ~words[:, :12].any(axis=1)
+        return [_checksum(a) for a in _hex_slices(words[:, 12:], 20)], ok
+    if t == "bool":
+        ok = ~words[:, :31].any(axis=1) & (words[:, 31] <= 1)
+        return (words[:, 31] == 1).tolist(), ok
+    if t.startswith("bytes"):
+        size = int(t[5:])
+        ok = ~words[:, size:].any(axis=1)
+        return _hex_slices(words[:, :size], size), ok
+    signed = t.startswith("int")
+    size = int(t[3 + (not signed):] or 256) // 8
+    if signed:
+        fill = np.where(words[:, 32 - size] >= 0x80, 0xFF, 0).astype(np.uint8)
+        ok = (words[:, :32 - size] == fill[:, None]).all(axis=1)
+        fits = size <= 8 or bool((words[:, :25] == fill[:, None]).all())
+    else:
+        ok = ~words[:, :32 - size].any(axis=1)
+        fits = size <= 8 or not words[:, :24].any()
+    if fits:
+        # todas as linhas cabem em 64 bits: view big-endian das 8 últimas bytes
+        low = np.ascontiguousarray(words[:, 24:]).view(">i8" if signed else ">u8")
+        return low[:, 0].tolist(), ok
+    raw = words.tobytes()
+    return [int.from_bytes(raw[i:i + 32], "big", signed=signed) for i in range(0, 32 * n, 32)], ok
 
-    def decode(self, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        topics = [t.hex() if hasattr(t, "hex") else str(t) for t in (log.get("topics") or [])]
-        if not topics:
-            return None
-        topic0 = topics[0].lower()
-        evt = self._events_by_topic.get(topic0)
-        if not evt:
-            return None
+class CompiledEvent:
+    """
+    Evento ABI pré-processado no carregamento: assinatura, topic0 e as listas de
+    (nome, tipo) indexados e não indexados. decode() é uma chamada direta ao eth_abi
+    para os dados + um decode por topic, sem montar contrato/codec do web3 por log.
+    """
+    __slots__ = ("name", "signature", "topic0", "abi", "anonymous", "indexed", "data_names", "data_types",
+                 "word_only")
+
+    def __init__(self, abi: Dict[str, Any]):
+        self.abi: Optional[Dict[str, Any]] = abi  # None quando carregado do cache em disco
+        self.name = abi["name"]
+        self.anonymous = bool(abi.get("anonymous"))
+        inputs = abi.get("inputs", [])
+        self.signature = f"{self.name}({','.join(canonical_type(i) for i in inputs)})"
+        self.topic0 = _norm_topic(Web3.keccak(text=self.signature))
+        self.indexed: List[Tuple[str, str]] = [(i["name"], canonical_type(i)) for i in inputs if i.get("indexed")]
+        data = [i for i in inputs if not i.get("indexed")]
+        self.data_names: List[str] = [i["name"] for i in data]
+        self.data_types: List[str] = [canonical_type(i) for i in data]
+        # todos os argumentos (topics e data) são palavras estáticas → elegível ao decode colunar
+        self.word_only = all(_WORD_TYPE.match(t) for t in self.data_types + [t for _, t in self.indexed])
+
+    def to_cache(self) -> List[Any]:
+        """Linha compacta do cache: só o necessário para decodificar (sem o ABI original)."""
+        return [self.name, self.signature, self.topic0, self.anonymous, self.word_only,
+                [n for n, _ in self.indexed], [t for _, t in self.indexed], self.data_names, self.data_types]
+
+    @classmethod
+    def from_cache(cls, row: List[Any]) -> "CompiledEvent":
+        """Reconstrói o evento do cache em disco, sem canonical_type/keccak."""
+        ev = cls.__new__(cls)
+        ev.abi = None
+        ev.name, ev.signature, ev.topic0, ev.anonymous, ev.word_only, inames, itypes, ev.data_names, ev.data_types = row
+        ev.indexed = list(zip(inames, itypes))
+        return ev
+
+    def decode_args(self, topics: List[bytes], data: bytes) -> Dict[str, Any]:
+        args: Dict[str, Any] = {}
+        offset = 0 if self.anonymous else 1
+        for (name, t), topic in zip(self.indexed, topics[offset:]):
+            topic = topic.rjust(32, b"\0")
+            if _is_hashed_indexed(t):
+                args[name] = "0x" + topic.hex()  # só o keccak do valor está no log
+            else:
+                args[name] = _jsonable(t, abi_decode([t], topic)[0])
+        if self.data_types:
+            for name, t, v in zip(self.data_names, self.data_types, abi_decode(self.data_types, data)):
+                args[name] = _jsonable(t, v)
+        return args
+
+class EventBatch:
+    """
+    Saída colunar de decode_batch: uma lista por argumento, alinhada com `logs`.
+    rows()/row(i) montam sob demanda o mesmo dict de EVMAbiDecoder.decode; linhas que
+    falharam ficam em `errors` (índice → exceção) com None nas colunas, e as refeitas
+    por log guardam os args exatos em `fallback`.
+    """
+    __slots__ = ("event", "logs", "columns", "errors", "fallback")
 
-        # Usa web3 para decodificar
-        from web3._utils.events import get_event_data
-        from web3._utils.abi import build_event_signature_hex
+    def __init__(self, event: CompiledEvent, logs: List[Dict[str, Any]], columns: Dict[str, List[Any]],
+                 errors: Dict[int, Exception], fallback: Dict[int, Dict[str, Any]]):
+        self.event = event
+        self.logs = logs
+        self.columns = columns
+        self.errors = errors
+        self.fallback = fallback
 
-        # Monta ABI "contract" mínimo
-        fake_abi = [evt["abi"]]
-        w3 = Web3()  # offline ok
-        event_abi = evt["abi"]
-        # Reconstroi a assinatura para sanidade (não estritamente necessário)
-        _ = build_event_signature_hex(event_abi)
+    def __len__(self) -> int:
+        return len(self.logs)
 
+    def row(self, i: int) -> Dict[str, Any]:
+        if i in self.errors:
+            raise self.errors[i]
+        log = self.logs[i]
         data = log.get("data") or "0x"
-        # Estrutura esperada pelo util
-        entry = {
+        args = self.fallback.get(i)
+        return {
+            "event_name": self.event.name,
+            "args": args if args is not None else {name: col[i] for name, col in self.columns.items()},
             "address": log.get("address"),
-            "topics": topics,
-            "data": data,
+            "topics": [_norm_topic(t) for t in log["topics"]],
+            "data": data if isinstance(data, str) else "0x" + bytes(data).hex(),
         }
-        decoded = get_event_data(w3.codec, event_abi, entry)
-        args = dict(decoded.get("args", {}))
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Dicts das linhas decodificadas, na ordem dos logs (as com erro são puladas)."""
+        for i in range(len(self.logs)):
+            if i not in self.errors:
+                yield self.row(i)
+
+class EVMAbiDecoder:
+    """
+    Registro de eventos ABI compilados (CompiledEvent), decodificados com eth_abi direto:
+      - `abi_files`: ABIs globais, resolvidas só por topic0 (fallback)
+      - `contracts`: [{address, abi_files}] → eventos registrados por (address, topic0),
+        então contratos com a mesma assinatura e ABIs diferentes (ex.: flags indexed) não colidem
+    Com `cache_path`, os eventos compilados ficam num JSON indexado pelo hash do conteúdo
+    de cada ABI: na partida só se lê e hasheia o arquivo, sem json.loads/canonical_type/keccak.
+    O cache pode ser compartilhado entre processos com conjuntos de ABIs diferentes: a
+    gravação mescla com o que já está no arquivo e troca o arquivo atomicamente.
+    """
+    CACHE_VERSION = 1
+
+    def __init__(self, abi_files: Optional[List[str]] = None, contracts: Optional[List[Dict[str, Any]]] = None,
+                 cache_path: Optional[str] = None):
+        self._events_by_topic: Dict[str, CompiledEvent] = {}
+        self._events_by_addr: Dict[Tuple[str, str], CompiledEvent] = {}
+        self.cache_path = cache_path
+        self._cache: Dict[str, List[List[Any]]] = self._read_cache()
+        self._used: Dict[str, List[CompiledEvent]] = {}  # hash → eventos (compartilhados entre contratos)
+        self._dirty = False
+        for f in abi_files or []:
+            for ev in self._load(f):
+                self._events_by_topic[ev.topic0] = ev
+        for c in contracts or []:
+            addr = (c.get("address") or "").lower()
+            for f in (c.get("abi_files") or []) if addr else []:
+                for ev in self._load(f):
+                    self._events_by_addr[(addr, ev.topic0)] = ev
+        if self._dirty:
+            self._write_cache()
+
+    # ----------------- carga / cache -----------------
+    def _read_cache(self) -> Dict[str, List[List[Any]]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return {}  # cache corrompido: recompila
+        return doc.get("abis", {}) if doc.get("v") == self.CACHE_VERSION else {}
+
+    def _write_cache(self) -> None:
+        if not self.cache_path:
+            return
+        # relê o arquivo: outro processo pode ter gravado ABIs que esta instância não usa
+        abis = self._read_cache()
+        abis.update({h: [ev.to_cache() for ev in evs] for h, evs in self._used.items()})
+        doc = {"v": self.CACHE_VERSION, "abis": abis}
+        d = os.path.dirname(self.cache_path) or "."
+        os.makedirs(d, exist_ok=True)
+        # tmp único no mesmo diretório (os.replace atômico, sem colisão entre processos)
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.cache_path) + ".", suffix=".tmp", dir=d)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(doc, f, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _load(self, path: str) -> List[CompiledEvent]:
+        p = Path(path)
+        if not p.exists():
+            return []
+        raw = p.read_bytes()
+        h = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        if h in self._used:
+            return self._used[h]
+        cached = self._cache.get(h)
+        if cached is not None:
+            events = [CompiledEvent.from_cache(d) for d in cached]
+        else:
+            data = json.loads(raw)
+            abi = data.get("abi", data) if isinstance(data, dict) else data  # aceita {'abi': [...]} ou a lista direto
+            events = [CompiledEvent(item) for item in abi if item.get("type") == "event"]
+            self._dirty = True
+        self._used[h] = events
+        return events
+
+    # ----------------- resolução -----------------
+    def _resolve(self, address: Any, topic0: str) -> Optional[CompiledEvent]:
+        if self._events_by_addr and address:
+            ev = self._events_by_addr.get((str(address).lower(), topic0))
+            if ev is not None:
+                return ev
+        return self._events_by_topic.get(topic0)
+
+    def can_decode(self, topic0: str, address: Optional[str] = None) -> bool:
+        return self._resolve(address, _norm_topic(topic0)) is not None
+
+    def decode(self, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        raw_topics = log.get("topics") or []
+        if not raw_topics:
+            return None
+        topics = [_norm_topic(t) for t in raw_topics]
+        ev = self._resolve(log.get("address"), topics[0])
+        if not ev:
+            return None
+        data = log.get("data") or "0x"
+        args = ev.decode_args([_to_bytes(t) for t in raw_topics], _to_bytes(data))
         return {
-            "event_name": evt["name"],
+            "event_name": ev.name,
             "args": args,
             "address": log.get("address"),
             "topics": topics,
-            "data": data,
+            "data": data if isinstance(data, str) else "0x" + bytes(data).hex(),
         }
+
+    def decode_batch(self, logs: List[Dict[str, Any]], event: Optional[CompiledEvent] = None) -> EventBatch:
+        """
+        Decode colunar de logs do MESMO evento (resolvido pelo primeiro log se `event`
+        não vier), só com argumentos de uma palavra:
+        os `data` viram um único buffer (n, k, 32) e cada topic indexado uma matriz (n, 32),
+        e endereços/uints/bools saem por coluna via NumPy. Logs de tamanho ou padding
+        inesperado caem no decode por log (mesmo resultado/erro do decode()).
+        """
+        ev = event or self._resolve(logs[0].get("address"), _norm_topic(logs[0]["topics"][0]))
+        if ev is None:
+            raise KeyError(f"evento desconhecido: {logs[0]['topics'][0]}")
+        if np is None or not ev.word_only:
+            raise ValueError(f"evento {ev.signature} não suporta decode em lote")
+        n, k = len(logs), len(ev.data_types)
+        offset = 0 if ev.anonymous else 1
+        n_topics = offset + len(ev.indexed)
+        datas = [_to_bytes(lg.get("data") or "0x") for lg in logs]
+        topics = [lg["topics"] for lg in logs]
+        # linhas fora do formato fixo (tamanho de data / nº de topics) vão para o caminho por log
+        shape_ok = np.fromiter((len(d) == 32 * k and len(t) == n_topics for d, t in zip(datas, topics)),
+                               dtype=bool, count=n)
+        ok = shape_ok.copy()
+        columns: Dict[str, List[Any]] = {}
+        blank = bytes(32)
+        for j, (name, t) in enumerate(ev.indexed):
+            col = [_to_bytes(tp[offset + j]).rjust(32, b"\0") if good else blank for tp, good in zip(topics, shape_ok)]
+            ok &= np.fromiter((len(w) == 32 for w in col), dtype=bool, count=n)
+            raw = b"".join(w if len(w) == 32 else blank for w in col)
+            columns[name], col_ok = _word_column(t, np.frombuffer(raw, dtype=np.uint8).reshape(n, 32))
+            ok &= col_ok
+        if k:
+            pad = bytes(32 * k)
+            buf = np.frombuffer(b"".join(d if good else pad for d, good in zip(datas, shape_ok)), dtype=np.uint8)
+            words = buf.reshape(n, k, 32)
+            for j, (name, t) in enumerate(zip(ev.data_names, ev.data_types)):
+                columns[name], col_ok = _word_column(t, words[:, j])
+                ok &= col_ok
+        errors: Dict[int, Exception] = {}
+        fallback: Dict[int, Dict[str, Any]] = {}
+        for i in np.flatnonzero(~ok).tolist():
+            try:
+                args = fallback[i] = ev.decode_args([_to_bytes(tp) for tp in topics[i]], datas[i])
+            except Exception as e:
+                errors[i] = e
+                args = {}
+            for name, col in columns.items():
+                col[i] = args.get(name)
+        return EventBatch(ev, logs, columns, errors, fallback)
+
+    def decode_many(self, logs: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception, None]]:
+        """
+        decode() de uma página de logs, alinhado com a entrada: dict decodificado, None
+        (evento desconhecido) ou a exceção do log. Grupos grandes do mesmo evento
+        elegível passam por decode_batch; o resto segue o decode por log.
+        """
+        out: List[Union[Dict[str, Any], Exception, None]] = [None] * len(logs)
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, lg in enumerate(logs):
+            raw_topics = lg.get("topics") or []
+            if raw_topics:
+                key = (str(lg.get("address") or "").lower(), _norm_topic(raw_topics[0]))
+                groups.setdefault(key, []).append(i)
+        for (address, topic0), idx in groups.items():
+            ev = self._resolve(address, topic0)
+            if ev is None:
+                continue
+            if np is not None and ev.word_only and len(idx) >= BATCH_MIN:
+                batch = self.decode_batch([logs[i] for i in idx], ev)
+                for j, i in enumerate(idx):
+                    out[i] = batch.errors[j] if j in batch.errors else batch.row(j)
+                continue
+            for i in idx:
+                try:
+                    out[i] = self.decode(logs[i])
+                except Exception as e:
+                    out[i] = e
+        return out
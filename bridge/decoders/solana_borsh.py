@@ -1,63 +1,334 @@
 # bridge/decoders/solana_borsh.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
-from borsh_construct import U8, U64
-from construct import Bytes
+import re
+import struct
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-TYPE_MAP = {
-    "u8": U8,
-    "u64": U64,
+# Layouts Borsh (config borsh_layouts) compilados uma vez por programa:
+#  - campos de largura fixa consecutivos viram um único struct.Struct('<...') → um unpack_from
+#  - campos variáveis são leitores sobre memoryview (fatias sem cópia até o valor final)
+# Tipos: u8..u128, i8..i128, f32, f64, bool, pubkey, string, bytes, bytes_len (ref),
+#        vec<T>, option<T>, [T; N], struct (com `fields`) e nomes declarados em `types`.
+# bytes/vec<u8>/[u8; N] saem em hex; pubkey em base58.
+
+Reader = Callable[[memoryview, int], Tuple[Any, int]]   # (buffer, offset) → (valor, novo offset)
+Op = Callable[[memoryview, int, Dict[str, Any]], int]     # preenche o dict da struct, devolve offset
+
+_B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+@lru_cache(maxsize=65536)
+def b58encode(raw: bytes) -> str:
+    n = int.from_bytes(raw, "big")
+    out = []
+    while n:
+        n, r = divmod(n, 58)
+        out.append(_B58[r])
+    return "1" * (len(raw) - len(raw.lstrip(b"\0"))) + "".join(reversed(out))
+
+def _u128(lo: int, hi: int) -> int:
+    return lo | (hi << 64)
+
+def _pubkey(raw: bytes) -> str:
+    return b58encode(raw)
+
+# tipo → (formato struct, nº de valores que o formato produz, conversor)
+_FIXED: Dict[str, Tuple[str, int, Optional[Callable[..., Any]]]] = {
+    "u8": ("B", 1, None), "u16": ("H", 1, None), "u32": ("I", 1, None), "u64": ("Q", 1, None),
+    "i8": ("b", 1, None), "i16": ("h", 1, None), "i32": ("i", 1, None), "i64": ("q", 1, None),
+    "f32": ("f", 1, None), "f64": ("d", 1, None), "bool": ("?", 1, None),
+    "u128": ("QQ", 2, _u128), "i128": ("Qq", 2, _u128),  # parte alta com sinal: hi*2^64 + lo
+    "pubkey": ("32s", 1, _pubkey),
 }
+_U32 = struct.Struct("<I")
+_U8 = struct.Struct("<B")
+_GENERIC = re.compile(r"^(vec|option)<(.+)>$")
+_ARRAY = re.compile(r"^\[(.+);\s*(\d+)\]$")
+
+def _need(mv: memoryview, end: int) -> None:
+    if end > len(mv):
+        raise ValueError(f"borsh: buffer curto ({len(mv)} bytes, precisa de {end})")
+
+def _read_len(mv: memoryview, i: int) -> Tuple[int, int]:
+    return _U32.unpack_from(mv, i)[0], i + 4
+
+def _read_string(mv: memoryview, i: int) -> Tuple[str, int]:
+    n, i = _read_len(mv, i)
+    _need(mv, i + n)
+    return str(mv[i:i + n], "utf-8"), i + n
+
+def _read_bytes(mv: memoryview, i: int) -> Tuple[str, int]:
+    n, i = _read_len(mv, i)
+    _need(mv, i + n)
+    return mv[i:i + n].hex(), i + n
+
+def _check_count(mv: memoryview, i: int, n: int, width: int) -> None:
+    # n vem do buffer (u32): limita antes de alocar/iterar, cada item ocupa >= width bytes
+    if n and not width:
+        raise ValueError(f"borsh: {n} itens de largura 0")
+    _need(mv, i + n * width)
+
+class _Compiler:
+    """Traduz tipos do layout em leitores; `types` são as structs nomeadas do programa."""
+    def __init__(self, types: Optional[Dict[str, Any]] = None):
+        self.types = types or {}
+        self._named: Dict[str, Reader] = {}
+        self._min: Dict[str, int] = {}
+
+    def min_size(self, t: str) -> int:
+        """Menor nº de bytes que um valor do tipo ocupa (limite de vec/array antes do loop)."""
+        t = t.strip()
+        f = self.fixed(t)
+        if f is not None:
+            return struct.calcsize("<" + f[0])
+        if t in ("string", "bytes", "vec<u8>") or t.startswith("vec<"):
+            return 4
+        if t.startswith("option<"):
+            return 1
+        m = _ARRAY.match(t)
+        if m:
+            return int(m.group(2)) * self.min_size(m.group(1))
+        if t in self.types:
+            if t not in self._min:
+                self._min[t] = 0  # recursão direta (Node em Node) não aumenta o mínimo
+                spec = self.types[t]
+                self._min[t] = self.fields_min_size(spec.get("fields") if isinstance(spec, dict) else spec)
+            return self._min[t]
+        return 0
+
+    def fields_min_size(self, fields: Optional[List[Dict[str, Any]]]) -> int:
+        total = 0
+        for field in fields or []:
+            t = str(field["type"]).strip()
+            if t == "struct":
+                total += self.fields_min_size(field.get("fields"))
+            elif t != "bytes_len":
+                total += self.min_size(t)
+        return total
+
+    def fixed(self, t: str) -> Optional[Tuple[str, int, Optional[Callable[..., Any]]]]:
+        """Formato struct de um tipo de largura fixa (None se variável)."""
+        if t in _FIXED:
+            return _FIXED[t]
+        m = _ARRAY.match(t)
+        if m:
+            inner, n = m.group(1).strip(), int(m.group(2))
+            if inner == "u8":
+                return f"{n}s", 1, bytes.hex
+            f = _FIXED.get(inner)
+            if f and f[1] == 1 and f[2] is None:
+                return f"{n}{f[0]}", n, lambda *v: list(v)
+        return None
+
+    def reader(self, t: str) -> Reader:
+        t = t.strip()
+        f = self.fixed(t)
+        if f is not None:
+            st, conv = struct.Struct("<" + f[0]), f[2]
+            unpack, size, k = st.unpack_from, st.size, f[1]
+            if conv is None:
+                return lambda mv, i: (unpack(mv, i)[0], i + size)
+            if k == 1:
+                return lambda mv, i: (conv(unpack(mv, i)[0]), i + size)
+            return lambda mv, i: (conv(*unpack(mv, i)), i + size)
+        if t == "string":
+            return _read_string
+        if t in ("bytes", "vec<u8>"):
+            return _read_bytes
+        m = _GENERIC.match(t)
+        if m:
+            return self._vec(m.group(2)) if m.group(1) == "vec" else self._option(m.group(2))
+        m = _ARRAY.match(t)
+        if m:
+            return self._array(m.group(1), int(m.group(2)))
+        if t in self.types:
+            return self._named_reader(t)
+        raise ValueError(f"borsh: tipo não suportado: {t}")
+
+    def _vec(self, inner: str) -> Reader:
+        f = _FIXED.get(inner.strip())
+        if f and f[1] == 1 and f[2] is None:
+            # vetor de primitivos: um unpack para o vetor inteiro
+            fmt, size = f[0], struct.calcsize("<" + f[0])
+            def read_vec_fixed(mv: memoryview, i: int) -> Tuple[List[Any], int]:
+                n, i = _read_len(mv, i)
+                _need(mv, i + n * size)
+                return list(struct.unpack_from(f"<{n}{fmt}", mv, i)), i + n * size
+            return read_vec_fixed
+        item = self.reader(inner)
+        width = self.min_size(inner)
+        def read_vec(mv: memoryview, i: int) -> Tuple[List[Any], int]:
+            n, i = _read_len(mv, i)
+            _check_count(mv, i, n, width)
+            out = []
+            for _ in range(n):
+                v, i = item(mv, i)
+                out.append(v)
+            return out, i
+        return read_vec
+
+    def _option(self, inner: str) -> Reader:
+        item = self.reader(inner)
+        def read_option(mv: memoryview, i: int) -> Tuple[Any, int]:
+            tag = _U8.unpack_from(mv, i)[0]
+            if tag == 0:
+                return None, i + 1
+            if tag != 1:
+                raise ValueError(f"borsh: tag de option inválida: {tag}")
+            return item(mv, i + 1)
+        return read_option
+
+    def _array(self, inner: str, n: int) -> Reader:
+        item = self.reader(inner)
+        width = self.min_size(inner)
+        def read_array(mv: memoryview, i: int) -> Tuple[List[Any], int]:
+            _check_count(mv, i, n, width)
+            out = []
+            for _ in range(n):
+                v, i = item(mv, i)
+                out.append(v)
+            return out, i
+        return read_array
+
+    def _named_reader(self, name: str) -> Reader:
+        if name not in self._named:
+            # placeholder para tipos recursivos (ex.: vec<Node> dentro de Node)
+            self._named[name] = lambda mv, i: self._named[name](mv, i)
+            spec = self.types[name]
+            self._named[name] = self.struct_reader(spec.get("fields") if isinstance(spec, dict) else spec)
+        return self._named[name]
+
+    def struct_reader(self, fields: List[Dict[str, Any]]) -> Reader:
+        fill = self.struct_ops(fields)
+        def read_struct(mv: memoryview, i: int) -> Tuple[Dict[str, Any], int]:
+            out: Dict[str, Any] = {}
+            return out, fill(mv, i, out)
+        return read_struct
+
+    def struct_ops(self, fields: List[Dict[str, Any]]) -> Op:
+        """Plano da struct: runs de campos fixos (um unpack cada) intercalados com leitores variáveis."""
+        ops: List[Op] = []
+        run: List[Tuple[str, str, int, Optional[Callable[..., Any]]]] = []
+        for field in fields or []:
+            name, t = field["name"], str(field["type"]).strip()
+            f = self.fixed(t)
+            if f is not None:
+                run.append((name, *f))
+                continue
+            if run:
+                ops.append(_run_op(run))
+                run = []
+            if t == "bytes_len":
+                ops.append(_bytes_len_op(name, field["ref"]))
+                continue
+            try:
+                read = self.reader(t) if t != "struct" else self.struct_reader(field.get("fields") or [])
+            except ValueError:
+                ops.append(_rest_op(name))  # tipo desconhecido: devolve o restante bruto e para
+                break
+            ops.append(_var_op(name, read))
+        if run:
+            ops.append(_run_op(run))
+        if len(ops) == 1:
+            return ops[0]
+        def fill(mv: memoryview, i: int, out: Dict[str, Any]) -> int:
+            for op in ops:
+                i = op(mv, i, out)
+            return i
+        return fill
+
+def _run_op(run: List[Tuple[str, str, int, Optional[Callable[..., Any]]]]) -> Op:
+    st = struct.Struct("<" + "".join(fmt for _, fmt, _, _ in run))
+    unpack, size = st.unpack_from, st.size
+    names = [name for name, _, _, _ in run]
+    if all(k == 1 and conv is None for _, _, k, conv in run):
+        def op(mv: memoryview, i: int, out: Dict[str, Any]) -> int:
+            out.update(zip(names, unpack(mv, i)))
+            return i + size
+        return op
+    plan = [(name, k, conv) for name, _, k, conv in run]
+    def op_conv(mv: memoryview, i: int, out: Dict[str, Any]) -> int:
+        vals, j = unpack(mv, i), 0
+        for name, k, conv in plan:
+            out[name] = vals[j] if conv is None else conv(*vals[j:j + k])
+            j += k
+        return i + size
+    return op_conv
+
+def _var_op(name: str, read: Reader) -> Op:
+    def op(mv: memoryview, i: int, out: Dict[str, Any]) -> int:
+        out[name], i = read(mv, i)
+        return i
+    return op
+
+def _bytes_len_op(name: str, ref: str) -> Op:
+    # bytes com tamanho indicado por outro campo já lido (ref); UTF-8 se possível, senão hex
+    def op(mv: memoryview, i: int, out: Dict[str, Any]) -> int:
+        n = int(out[ref])
+        _need(mv, i + n)
+        chunk = mv[i:i + n]
+        try:
+            out[name] = str(chunk, "utf-8")
+        except UnicodeDecodeError:
+            out[name] = chunk.hex()
+        return i + n
+    return op
+
+def _rest_op(name: str) -> Op:
+    def op(mv: memoryview, i: int, out: Dict[str, Any]) -> int:
+        out[name] = mv[i:].hex()
+        return len(mv)
+    return op
+
+class CompiledLayout:
+    """Layout de um programa: discriminator + um plano compilado por variante."""
+    __slots__ = ("disc", "variants")
+
+    def __init__(self, layout: Dict[str, Any]):
+        disc_type = layout.get("discriminator", "u8")
+        f = _FIXED.get(disc_type)
+        if f is None or f[1] != 1 or f[2] is not None or disc_type in ("bool", "f32", "f64"):
+            raise ValueError(f"borsh: discriminator não suportado: {disc_type}")
+        self.disc = struct.Struct("<" + f[0])
+        comp = _Compiler(layout.get("types"))
+        self.variants: Dict[int, Tuple[Optional[str], Op]] = {
+            int(tag): (v.get("name"), comp.struct_ops(v.get("fields") or []))
+            for tag, v in (layout.get("variants") or {}).items()
+            if str(tag).lstrip("-").isdigit()  # tag não numérica nunca casava com o discriminator
+        }
+
+    def decode(self, raw_bytes: bytes) -> Dict[str, Any]:
+        mv = memoryview(raw_bytes)
+        event_tag = self.disc.unpack_from(mv, 0)[0]
+        variant = self.variants.get(event_tag)
+        if variant is None:
+            return {"event_tag": event_tag, "raw": mv.hex()}
+        out = {"event_tag": event_tag, "name": variant[0]}
+        variant[1](mv, self.disc.size, out)
+        return out
 
 class SolanaBorshDecoder:
     """
     Decodificador declarativo: recebe um dict de layout por program_id (config).
-    O primeiro campo (discriminator) define a variante (event_tag).
+    O primeiro campo (discriminator) define a variante (event_tag). Cada layout é
+    compilado na construção (CompiledLayout); decode() só executa o plano.
+    Layout não suportado (ex.: discriminator) não derruba os demais: o programa fica
+    em `unsupported` (program_id → motivo) e decode() devolve None, como antes.
     """
     def __init__(self, layouts: Dict[str, Any]):
         self.layouts = layouts or {}
+        self._compiled: Dict[str, CompiledLayout] = {}
+        self.unsupported: Dict[str, str] = {}
+        for pid, lay in self.layouts.items():
+            if not lay:
+                continue
+            try:
+                self._compiled[pid] = CompiledLayout(lay)
+            except ValueError as e:
+                self.unsupported[pid] = str(e)
 
     def decode(self, program_id: str, raw_bytes: bytes) -> Optional[Dict[str, Any]]:
-        layout = self.layouts.get(program_id)
-        if not layout:
+        layout = self._compiled.get(program_id)
+        if layout is None:
             return None
-
-        disc_type = layout.get("discriminator", "u8")
-        disc_parser = TYPE_MAP.get(disc_type)
-        if not disc_parser:
-            return None
-
-        i = 0
-        event_tag = disc_parser.parse(raw_bytes[i:i+disc_parser.sizeof()])
-        i += disc_parser.sizeof()
-
-        variants = layout.get("variants", {})
-        variant = variants.get(str(event_tag))
-        if not variant:
-            return {"event_tag": event_tag, "raw": raw_bytes.hex()}
-
-        out = {"event_tag": event_tag, "name": variant.get("name")}
-        for field in (variant.get("fields") or []):
-            ftype = field["type"]
-            fname = field["name"]
-            if ftype == "u8" or ftype == "u64":
-                parser = TYPE_MAP[ftype]
-                value = parser.parse(raw_bytes[i:i+parser.sizeof()])
-                i += parser.sizeof()
-                out[fname] = int(value)
-            elif ftype == "bytes_len":
-                # bytes com tamanho indicado por outro campo já lido (ref)
-                ref = field["ref"]
-                blen = int(out[ref])
-                value = Bytes(blen).parse(raw_bytes[i:i+blen])
-                i += blen
-                # decodifica como UTF-8 se possível; senão hex
-                try:
-                    out[fname] = value.decode("utf-8")
-                except Exception:
-                    out[fname] = value.hex()
-            else:
-                # tipo não suportado — retorna o restante bruto
-                out[fname] = raw_bytes[i:].hex()
-                break
-        return out
+        return layout.decode(raw_bytes)
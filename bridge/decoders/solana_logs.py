@@ -0,0 +1,54 @@
+# bridge/decoders/solana_logs.py
+from __future__ import annotations
+import base64
+import binascii
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Linhas de log de uma transação Solana (logsSubscribe / meta.logMessages):
+#   Program <id> invoke [n]       → <id> entra na pilha de execução
+#   Program <id> success          → sai da pilha
+#   Program <id> failed: <erro>   → sai da pilha
+#   Program data: <b64> [<b64>…]  → sol_log_data / emit! do programa no topo da pilha
+# "Program log:", "Program return:" e "... consumed N of M compute units" não mexem na pilha.
+# Um frame que termina em "failed" tem o estado revertido: os "Program data:" dele e dos
+# frames internos são descartados.
+
+DATA_PREFIX = "Program data: "
+
+def parse_program_data(logs: Iterable[str], programs: Optional[Set[str]] = None) -> List[Tuple[int, str, bytes]]:
+    """
+    (índice da linha, program_id emissor, bytes) de cada "Program data:", na ordem do log.
+    Com `programs`, o base64 só é decodificado para esses programas. Os campos de uma
+    mesma linha (vários base64) são concatenados; linhas com base64 inválido são puladas.
+    Dados de frames que falharam (e dos frames internos a eles) não entram.
+    """
+    stack: List[str] = []
+    starts: List[int] = []  # len(out) quando cada frame da pilha começou
+    out: List[Tuple[int, str, bytes]] = []
+    for i, line in enumerate(logs):
+        if line.startswith(DATA_PREFIX):
+            if stack and (programs is None or stack[-1] in programs):
+                try:
+                    data = b"".join(base64.b64decode(c, validate=True) for c in line[len(DATA_PREFIX):].split())
+                except (binascii.Error, ValueError):
+                    continue
+                out.append((i, stack[-1], data))
+            continue
+        if not line.startswith("Program "):
+            continue
+        parts = line.split(" ", 3)
+        if len(parts) < 3:
+            continue
+        pid, verb = parts[1], parts[2]
+        if verb == "invoke":
+            stack.append(pid)
+            starts.append(len(out))
+        elif (verb == "success" or verb.startswith("failed")) and pid in stack:
+            # desempilha até o frame do programa (tolera linhas perdidas por "Log truncated")
+            while True:
+                start = starts.pop()
+                if stack.pop() == pid:
+                    break
+            if verb != "success":
+                del out[start:]
+    return out
@@ -1,16 +1,25 @@
 # bridge/event_router.py
 from __future__ import annotations
 import time
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from pydantic import TypeAdapter, ValidationError
 from core.schemas import CoreEvent, ChainPointer
 from core.events import deterministic_event_id
+from telemetry.metrics import EVENTS_DECODE_ERRORS
+
+_EVENT_LIST = TypeAdapter(List[CoreEvent])
 
 class EventRouter:
     """
     Normaliza eventos de diferentes chains e entrega para o handler (ex.: job_queue.enqueue).
+    route_many() normaliza uma página inteira (ex.: um get_logs) numa única validação
+    e entrega a lista ao batch_handler (ex.: job_queue.enqueue_many); itens inválidos
+    da página são descartados em vez de abortar a página.
     """
-    def __init__(self, handler: Callable[[CoreEvent], None]):
+    def __init__(self, handler: Callable[[CoreEvent], None],
+                 batch_handler: Optional[Callable[[List[CoreEvent]], None]] = None):
         self.handler = handler
+        self.batch_handler = batch_handler
 
     def _normalize(self, raw: Dict[str, Any]) -> CoreEvent:
         # Espera-se que raw contenha: chain, tx_hash/slot, log_index (quando houver), type, payload
@@ -35,3 +44,54 @@ class EventRouter:
         event = self._normalize(raw)
         self.handler(event)
         return event
+
+    def normalize_many(self, raws: List[Dict[str, Any]],
+                       errors: Optional[List[Tuple[Dict[str, Any], Exception]]] = None) -> List[CoreEvent]:
+        """
+        Mesmo resultado de _normalize por item, com uma validação pydantic para a lista toda.
+        Itens inválidos não derrubam a página: são descartados (contados em
+        EVENTS_DECODE_ERRORS, where="normalize") e, com `errors`, anexados como (raw, erro).
+        """
+        now = time.time()
+        try:
+            events = _EVENT_LIST.validate_python([{
+                "id": "",
+                "type": raw["type"],
+                "payload": raw.get("payload", {}),
+                "source": {
+                    "chain": raw["chain"],
+                    "block_number": raw.get("block_number"),
+                    "slot": raw.get("slot"),
+                    "tx_hash": raw.get("tx_hash"),
+                    "log_index": raw.get("log_index"),
+                },
+                "observed_at": now,
+            } for raw in raws])
+        except (ValidationError, KeyError, TypeError):
+            # reprocessa item a item para isolar os inválidos
+            out: List[CoreEvent] = []
+            for raw in raws:
+                try:
+                    out.append(self._normalize(raw))
+                except (ValidationError, KeyError, TypeError) as e:
+                    chain = raw.get("chain") if isinstance(raw, dict) else None
+                    EVENTS_DECODE_ERRORS.labels(chain=str(chain or "unknown"), where="normalize").inc()
+                    if errors is not None:
+                        errors.append((raw, e))
+            return out
+        for ev in events:
+            s = ev.source
+            ev.id = deterministic_event_id({"chain": s.chain, "tx_hash": s.tx_hash,
+                                            "log_index": s.log_index, "slot": s.slot}, ev.payload)
+        return events
+
+    def route_many(self, raws: List[Dict[str, Any]]) -> List[CoreEvent]:
+        events = self.normalize_many(raws)
+        if not events:
+            return events
+        if self.batch_handler is not None:
+            self.batch_handler(events)
+        else:
+            for ev in events:
+                self.handler(ev)
+        return events
@@ -1,7 +1,8 @@
 # bridge/historical/evm_scanner.py
 from __future__ import annotations
-from typing import List, Dict, Any, Callable, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from bridge.providers.evm_provider import EVMProvider
+from bridge.historical.scan_plan import LogFilter, fetch_logs
 from telemetry.metrics import EVENTS_TOTAL, EVENTS_DECODE_ERRORS, CHECKPOINT_BASE, CHECKPOINT_BASE_CONTRACT
 from bridge.decoders.evm_abi import EVMAbiDecoder
 
@@ -9,6 +10,10 @@ class EVMHistoricalScanner:
     """
     Scanner histórico paginado por contrato, com checkpoints por address.
     Não emite CHAIN_HEAD; apenas logs normalizados para o EventRouter.
+    Contratos com a mesma faixa dividem um eth_getLogs por página (até `max_addresses`).
+    Com `emit_many`, cada página de um contrato é entregue de uma vez (ex.: EventRouter.route_many).
+    Falha na entrega propaga antes do checkpoint do contrato: a faixa é reescaneada
+    (o id determinístico dos eventos deduplica o que já tinha entrado).
     """
     def __init__(
         self,
@@ -18,7 +23,9 @@ class EVMHistoricalScanner:
         per_contract_cp_get: Callable[[str], Optional[int]],
         per_contract_cp_set: Callable[[str, int], None],
         default_type: str = "BRIDGE_MESSAGE",
-        page_blocks: int = 2000
+        page_blocks: int = 2000,
+        max_addresses: int = 50,
+        emit_many: Optional[Callable[[List[Dict[str, Any]]], None]] = None
     ):
         self.provider = provider
         self.emit = emit
@@ -27,43 +34,65 @@ class EVMHistoricalScanner:
         self.set_cp = per_contract_cp_set
         self.default_type = default_type
         self.page_blocks = int(page_blocks)
+        self.max_addresses = int(max_addresses)
+        self.emit_many = emit_many
 
     def scan_range_for_contract(self, address: str, topics: List[str], from_block: int, to_block: int):
+        self.scan_range_for_contracts([(address, topics)], from_block, to_block)
+
+    def scan_range_for_contracts(self, contracts: List[Tuple[str, List[str]]], from_block: int, to_block: int):
+        filters = [LogFilter(address, topics) for address, topics in contracts]
         cur_from = int(from_block)
         to_block = int(to_block)
         while cur_from <= to_block:
             cur_to = min(cur_from + self.page_blocks - 1, to_block)
-            logs = self.provider.get_logs(address, topics, cur_from, cur_to)
-            for log in logs:
-                try:
-                    topic0 = log.get("topics", [None])[0]
-                    t0 = topic0.hex() if hasattr(topic0, "hex") else str(topic0) if topic0 else ""
-                    decoded = None
-                    if t0 and self.decoder and self.decoder.can_decode(t0):
-                        decoded = self.decoder.decode({
-                            "address": address,
-                            "topics": log.get("topics"),
-                            "data": log.get("data"),
-                        })
-                    payload = decoded or {
-                        "address": address,
-                        "topics": [t.hex() if hasattr(t, "hex") else str(t) for t in (log.get("topics") or [])],
-                        "data": log.get("data"),
-                    }
-                    raw = {
-                        "chain": "base-testnet",
-                        "block_number": int(log["blockNumber"], 16) if isinstance(log["blockNumber"], str) else log["blockNumber"],
-                        "tx_hash": log["transactionHash"].hex() if hasattr(log["transactionHash"], "hex") else str(log["transactionHash"]),
-                        "log_index": log["logIndex"],
-                        "type": self.default_type,
-                        "payload": payload,
-                    }
-                    EVENTS_TOTAL.labels(chain="base-testnet", type=raw["type"]).inc()
-                    self.emit(raw)
-                except Exception as e:
-                    EVENTS_DECODE_ERRORS.labels(chain="base-testnet", where="historical_scan").inc()
-            # atualiza CP por contrato
-            self.set_cp(address, cur_to)
-            CHECKPOINT_BASE_CONTRACT.labels(address=address).set(cur_to)
+            pages = fetch_logs(self.provider, filters, cur_from, cur_to, self.max_addresses)
+            for (address, _), logs in zip(contracts, pages):
+                self._emit_logs(address, logs)
+                # atualiza CP por contrato
+                self.set_cp(address, cur_to)
+                CHECKPOINT_BASE_CONTRACT.labels(address=address).set(cur_to)
             CHECKPOINT_BASE.set(cur_to)
             cur_from = cur_to + 1
+
+    def _emit_logs(self, address: str, logs: List[Dict[str, Any]]):
+        # decode da página inteira: logs do mesmo evento estático saem em lote (colunar)
+        decoded_all: List[Any] = [None] * len(logs)
+        if self.decoder and logs:
+            try:
+                decoded_all = self.decoder.decode_many([
+                    {"address": address, "topics": log.get("topics"), "data": log.get("data")} for log in logs
+                ])
+            except Exception:
+                # falha do lote: conta e segue com os logs crus (payload sem decode)
+                EVENTS_DECODE_ERRORS.labels(chain="base-testnet", where="historical_scan").inc(len(logs))
+        page: List[Dict[str, Any]] = []
+        for log, decoded in zip(logs, decoded_all):
+            try:
+                if isinstance(decoded, Exception):
+                    raise decoded
+                payload = decoded or {
+                    "address": address,
+                    "topics": [t.hex() if hasattr(t, "hex") else str(t) for t in (log.get("topics") or [])],
+                    "data": log.get("data"),
+                }
+                raw = {
+                    "chain": "base-testnet",
+                    "block_number": int(log["blockNumber"], 16) if isinstance(log["blockNumber"], str) else log["blockNumber"],
+                    "tx_hash": log["transactionHash"].hex() if hasattr(log["transactionHash"], "hex") else str(log["transactionHash"]),
+                    "log_index": log["logIndex"],
+                    "type": self.default_type,
+                    "payload": payload,
+                }
+            except Exception as e:
+                EVENTS_DECODE_ERRORS.labels(chain="base-testnet", where="historical_scan").inc()
+                continue
+            EVENTS_TOTAL.labels(chain="base-testnet", type=raw["type"]).inc()
+            page.append(raw)
+        # falha na entrega propaga: o checkpoint não avança e a faixa é reescaneada
+        if self.emit_many is not None:
+            if page:
+                self.emit_many(page)
+        else:
+            for raw in page:
+                self.emit(raw)
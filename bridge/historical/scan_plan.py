@@ -0,0 +1,118 @@
+# bridge/historical/scan_plan.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Union
+from bridge.providers.evm_provider import EVMProvider
+from telemetry.metrics import RPC_GET_LOGS
+
+# Planejador de eth_getLogs multi-contrato: contratos cujo filtro só restringe topic0
+# (topics = [] ou [t0 | [t0a, t0b, ...]]) são agrupados numa única chamada com o array
+# de addresses e a união dos topic0; o resultado é demultiplexado por address + topic0,
+# então cada contrato recebe exatamente os logs da chamada individual, na mesma ordem.
+# Filtros em posições 1..3 não se combinam por OR entre contratos → chamada própria.
+# Se o provedor recusar a chamada por excesso de resultados/tamanho de resposta, o grupo
+# é dividido ao meio (addresses, depois a faixa de blocos) e cada metade é refeita.
+
+# mensagens de "resultado grande demais" dos provedores mais comuns (Infura, Alchemy,
+# QuickNode, Ankr, geth/erigon). Só pela mensagem: o código -32005 também é usado para
+# rate limit, e dividir a chamada aí só dobraria as requisições.
+_TOO_LARGE = ("query returned more than", "too many results", "more than 10000 results",
+              "exceeds max results", "response size", "response is too big", "log response size exceeded",
+              "block range is too wide", "block range too large")
+
+def _hex(t: Any) -> str:
+    if isinstance(t, (bytes, bytearray)):
+        return "0x" + bytes(t).hex()
+    s = str(t).lower()
+    return s if s.startswith("0x") else "0x" + s
+
+class LogFilter:
+    """Filtro de um contrato (address + topics no formato do eth_getLogs)."""
+    __slots__ = ("address", "topics", "topic0s")
+
+    def __init__(self, address: str, topics: Optional[List[Any]] = None):
+        self.address = (address or "").lower()
+        self.topics = list(topics or [])
+        first = self.topics[0] if self.topics else None
+        # None = qualquer topic0
+        self.topic0s = None if first is None else frozenset(_hex(t) for t in (first if isinstance(first, list) else [first]))
+
+    @property
+    def coalescible(self) -> bool:
+        return len(self.topics) <= 1
+
+    def matches(self, log: Dict[str, Any]) -> bool:
+        if self.topic0s is None:
+            return True
+        topics = log.get("topics") or []
+        return bool(topics) and _hex(topics[0]) in self.topic0s
+
+def too_large(e: Exception) -> bool:
+    """Erro do eth_getLogs que some ao reduzir addresses ou faixa de blocos."""
+    text = str(e).lower()
+    return any(m in text for m in _TOO_LARGE)
+
+def _get_logs(provider: EVMProvider, address: Union[str, List[str]], topics: List[Any],
+              from_block: int, to_block: int, chain: str, mode: str) -> List[Dict[str, Any]]:
+    RPC_GET_LOGS.labels(chain=chain, mode=mode).inc()
+    try:
+        return list(provider.get_logs(address, topics, from_block, to_block))
+    except Exception as e:
+        if not too_large(e):
+            raise
+        if isinstance(address, list) and len(address) > 1:
+            # metades por address: a demultiplexação por address mantém a ordem de cada contrato
+            mid = len(address) // 2
+            halves = [(address[:mid], from_block, to_block), (address[mid:], from_block, to_block)]
+        elif from_block < to_block:
+            mid = (from_block + to_block) // 2
+            halves = [(address, from_block, mid), (address, mid + 1, to_block)]
+        else:
+            raise  # um address num único bloco: não há o que dividir
+    out: List[Dict[str, Any]] = []
+    for addr, lo, hi in halves:
+        out += _get_logs(provider, addr, topics, lo, hi, chain, "split")
+    return out
+
+def plan(filters: List[LogFilter], max_addresses: int = 50) -> List[List[int]]:
+    """Grupos de índices de `filters`: um grupo = uma chamada eth_getLogs."""
+    groups: List[List[int]] = []
+    batch: List[int] = []
+    for k, f in enumerate(filters):
+        if not f.coalescible:
+            groups.append([k])
+            continue
+        batch.append(k)
+        if len(batch) >= max(1, max_addresses):
+            groups.append(batch)
+            batch = []
+    if batch:
+        groups.append(batch)
+    return groups
+
+def fetch_logs(provider: EVMProvider, filters: List[LogFilter], from_block: int, to_block: int,
+               max_addresses: int = 50, chain: str = "base-testnet") -> List[List[Dict[str, Any]]]:
+    """
+    Logs de [from_block, to_block] por filtro (alinhado com `filters`), com o mínimo de chamadas;
+    chamadas recusadas por excesso de resultados são divididas e refeitas (too_large).
+    """
+    out: List[List[Dict[str, Any]]] = [[] for _ in filters]
+    for group in plan(filters, max_addresses):
+        if len(group) == 1:
+            f = filters[group[0]]
+            out[group[0]] = _get_logs(provider, f.address, f.topics, from_block, to_block, chain, "single")
+            continue
+        members = [filters[k] for k in group]
+        addresses = list(dict.fromkeys(f.address for f in members))
+        if any(f.topic0s is None for f in members):
+            topics: List[Any] = []
+        else:
+            topics = [sorted(set().union(*(f.topic0s for f in members)))]
+        logs = _get_logs(provider, addresses, topics, from_block, to_block, chain, "coalesced")
+        by_addr: Dict[str, List[int]] = {}
+        for k in group:
+            by_addr.setdefault(filters[k].address, []).append(k)
+        for log in logs:
+            for k in by_addr.get(str(log.get("address") or "").lower(), ()):
+                if filters[k].matches(log):
+                    out[k].append(log)
+    return out
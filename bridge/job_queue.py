@@ -1,38 +1,73 @@
-# services/job_queue.py
+# bridge/job_queue.py
 from __future__ import annotations
 import heapq
+import itertools
+import os
 import time
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 from core.schemas import JobEnvelope, CoreEvent
 from core.state_store import StateStore
+from core.persistence.journal import JournaledState
+
+DEFAULT_PATH = os.getenv("JANUS_HEAP_QUEUE_PATH", ".runtime/job_queue_heap.json")
 
 class JobQueue:
     """
-    Fila de jobs com prioridade por next_run_at, persistida em StateStore.
-    Estratégia simples: min-heap em memória + espelho em disco.
+    Fila de jobs com prioridade por next_run_at: min-heap em memória + JournaledState.
+    Cada enqueue/retry/ack/dead vira uma linha no journal (chave "jobs": job_id -> envelope);
+    o checkpoint periódico grava os pendentes e trunca o journal. Na abertura o heap é
+    reconstruído do checkpoint + replay, então enqueue custa O(log n) + um append.
     """
+    JOBS_KEY = "jobs"
+    DEAD_KEY = "dead"
+    # chaves do formato antigo (heap inteiro no StateStore), migradas na abertura
     KEY = "job_queue_heap"
     DLQ_KEY = "job_queue_dead"
+    MIGRATED_KEY = "legacy_migrated"
 
-    def __init__(self, state: Optional[StateStore] = None, handler: Optional[Callable[[CoreEvent], None]] = None):
+    def __init__(self, state: Optional[StateStore] = None, handler: Optional[Callable[[CoreEvent], None]] = None,
+                 journal: Optional[JournaledState] = None):
         self.state = state or StateStore()
         self.handler = handler
-        self.heap: List[tuple] = []
+        self.journal = journal or JournaledState(DEFAULT_PATH)
+        self.heap: List[Tuple[float, int, JobEnvelope]] = []
+        self._seq = itertools.count()  # desempate: envelopes não são comparáveis
         self._load()
 
     def _load(self):
-        data = self.state.get(self.KEY, [])
-        self.heap = [(item["next_run_at"], item["job"]) for item in data]
-
+        self._migrate_legacy()
+        jobs: Dict[str, dict] = self.journal.get(self.JOBS_KEY, {})
+        self.heap = []
+        for rec in jobs.values():
+            env = JobEnvelope.model_validate(rec)
+            self.heap.append((env.next_run_at, next(self._seq), env))
         heapq.heapify(self.heap)
 
-    def _persist(self):
-        serialized = []
-        for next_run_at, job in self.heap:
-            serialized.append({"next_run_at": next_run_at, "job": job.dict()})
-        self.state.set(self.KEY, serialized)
+    def _migrate_legacy(self):
+        legacy, dead = self.state.get(self.KEY), self.state.get(self.DLQ_KEY)
+        if legacy is None and dead is None:
+            return
+        # pendentes + DLQ + marcador numa única linha de journal: um crash antes de apagar
+        # as chaves antigas não repete a migração (nem duplica a DLQ) na próxima abertura
+        if not self.journal.get(self.MIGRATED_KEY):
+            with self.journal.transaction("legacy"):
+                if legacy:
+                    self.journal.merge(self.JOBS_KEY, {item["job"]["job_id"]: item["job"] for item in legacy})
+                for item in dead or []:
+                    self.journal.append(self.DEAD_KEY, item)
+                self.journal.set(self.MIGRATED_KEY, True)
+            self.journal.checkpoint()
+        with self.state.batch():
+            self.state.delete(self.KEY)
+            self.state.delete(self.DLQ_KEY)
+
+    def _push(self, env: JobEnvelope):
+        self.journal.merge(self.JOBS_KEY, {env.job_id: env.model_dump(mode="json")})
+        heapq.heappush(self.heap, (env.next_run_at, next(self._seq), env))
 
     def enqueue(self, event: CoreEvent, delay: float = 0.0):
+        if event.id in self.journal.get(self.JOBS_KEY, {}):
+            return  # já pendente
         env = JobEnvelope(
             job_id=event.id,
             event=event,
@@ -41,37 +76,41 @@ class JobQueue:
             next_run_at=time.time() + delay,
             acked=False,
         )
-        heapq.heappush(self.heap, (env.next_run_at, env))
-        self._persist()
+        self._push(env)
 
     def _backoff(self, attempts: int) -> float:
         return min(60.0, 2 ** attempts)  # até 60s
 
     def _mark_dead(self, env: JobEnvelope, reason: str):
-        dead = self.state.get(self.DLQ_KEY, [])
-        dead.append({"job": env.dict(), "dead_at": time.time(), "reason": reason})
-        self.state.set(self.DLQ_KEY, dead)
+        self.journal.append(self.DEAD_KEY, {"job": env.model_dump(mode="json"), "dead_at": time.time(), "reason": reason})
+        self.journal.unset(self.JOBS_KEY, [env.job_id])
+
+    def dead(self) -> List[dict]:
+        return list(self.journal.get(self.DEAD_KEY, []))
+
+    def __len__(self) -> int:
+        return len(self.heap)
 
     def tick(self):
         now = time.time()
         ran = 0
-        changed = False
         while self.heap and self.heap[0][0] <= now:
-            _, env = heapq.heappop(self.heap)
-            changed = True
+            _, _, env = heapq.heappop(self.heap)
             try:
                 if self.handler is None:
                     raise RuntimeError("Nenhum handler configurado para JobQueue")
                 self.handler(env.event)
                 env.acked = True
+                self.journal.unset(self.JOBS_KEY, [env.job_id])
             except Exception as e:
                 env.attempts += 1
                 if env.attempts >= env.max_attempts:
                     self._mark_dead(env, str(e))
                 else:
                     env.next_run_at = now + self._backoff(env.attempts)
-                    heapq.heappush(self.heap, (env.next_run_at, env))
+                    self._push(env)
             ran += 1
-        if changed:
-            self._persist()
         return ran
+
+    def close(self):
+        self.journal.close()
@@ -2,7 +2,7 @@
 from __future__ import annotations
 import os
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from web3 import Web3
 from web3.types import FilterParams
 
@@ -30,12 +30,14 @@ class EVMProvider:
             raise RuntimeError("EVMProvider: sem provedor conectado")
         return w3.eth.block_number
 
-    def get_logs(self, address: str, topics: List[str], from_block: int, to_block: int) -> List[Dict[str, Any]]:
+    def get_logs(self, address: Union[str, List[str]], topics: List[Any], from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """`address` pode ser uma lista (eth_getLogs multi-contrato, ver bridge/historical/scan_plan.py)."""
         w3 = self.w3_ws or self.w3_http
         if not w3:
             raise RuntimeError("EVMProvider: sem provedor conectado")
         params: FilterParams = {
-            "address": Web3.to_checksum_address(address),
+            "address": ([Web3.to_checksum_address(a) for a in address] if isinstance(address, list)
+                        else Web3.to_checksum_address(address)),
             "fromBlock": from_block,
             "toBlock": to_block,
             "topics": topics or None,
@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 
 from bridge.providers.solana_provider import SolanaProvider
 from bridge.decoders.solana_borsh import SolanaBorshDecoder
+from bridge.decoders.solana_logs import parse_program_data
 from telemetry.metrics import EVENTS_TOTAL, EVENTS_DECODE_ERRORS, CHAIN_HEAD_GAUGE
 from core.state_store import StateStore
 from resilience.circuit_breaker import CircuitBreaker
@@ -55,6 +56,7 @@ class SolanaListener:
 
         layouts = self.cfg.get("borsh_layouts") or {}
         self.decoder = SolanaBorshDecoder(layouts=layouts)
+        self._layout_programs = set(layouts)  # só estes têm "Program data:" decodificado
 
     def _emit_chain_head_once(self):
         try:
@@ -80,21 +82,47 @@ class SolanaListener:
                 time.sleep(self.adapt.interval())
 
     def _decode_and_emit_ws(self, value: Dict[str, Any]):
+        """
+        Um evento por "Program data:" de programa com layout, decodificado pelo layout do
+        programa que estava executando (pilha invoke/success do log); pointer = assinatura +
+        índice da linha, então a mesma tx recebida por várias assinaturas gera o mesmo id.
+        Tx com erro (value["err"]) teve o estado revertido: nenhum "Program data:" vira evento
+        (o parse já ignora frames "failed"). Sem payload decodificável, emite os logs crus como antes.
+        """
         try:
-            programs: List[str] = self.cfg.get("programs") or []
-            program_id = programs[0] if programs else "unknown"
             raw_logs: List[str] = value.get("logs") or []
-            raw_concat = "\n".join(raw_logs).encode()
-            decoded = self.decoder.decode(program_id, raw_concat) or {"logs": raw_logs}
-
-            raw = {
-                "chain": "solana-testnet",
-                "slot": value.get("slot"),
-                "type": self.evmap.get("default_type", "AGENT_SIGNAL"),
-                "payload": {"signature": value.get("signature"), "err": value.get("err"), "decoded": decoded},
-            }
-            EVENTS_TOTAL.labels(chain="solana-testnet", type=raw["type"]).inc()
-            self.emit(raw)
+            evtype = self.evmap.get("default_type", "AGENT_SIGNAL")
+            raws = []
+            emitted = parse_program_data(raw_logs, self._layout_programs) if value.get("err") is None else []
+            for line_idx, program_id, data in emitted:
+                try:
+                    decoded = self.decoder.decode(program_id, data)
+                except Exception:
+                    # payload fora do layout: conta e segue com os demais da mesma tx
+                    EVENTS_DECODE_ERRORS.labels(chain="solana-testnet", where="program_data").inc()
+                    continue
+                if decoded is None:
+                    continue
+                raws.append({
+                    "chain": "solana-testnet",
+                    "slot": value.get("slot"),
+                    "tx_hash": value.get("signature"),
+                    "log_index": line_idx,
+                    "type": evtype,
+                    "payload": {"signature": value.get("signature"), "err": value.get("err"),
+                                "program_id": program_id, "decoded": decoded},
+                })
+            if not raws:
+                raws.append({
+                    "chain": "solana-testnet",
+                    "slot": value.get("slot"),
+                    "type": evtype,
+                    "payload": {"signature": value.get("signature"), "err": value.get("err"),
+                                "decoded": {"logs": raw_logs}},
+                })
+            for raw in raws:
+                EVENTS_TOTAL.labels(chain="solana-testnet", type=raw["type"]).inc()
+                self.emit(raw)
             # atividade → acelera
             self.adapt.faster()
         except Exception as e:
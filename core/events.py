@@ -1,11 +1,54 @@
 # core/events.py
 from __future__ import annotations
+import json
+from decimal import Decimal
 from typing import Dict, Any
-from hashlib import sha256
+from hashlib import blake2b
+
+# v2: codificação canônica + blake2b (ids diferem dos gerados pela versão com sha256/repr)
+ID_DIGEST_SIZE = 32
+
+def _norm_hash(v: Any) -> Any:
+    """tx_hash como texto estável: bytes/HexBytes → 0x-hex minúsculo; hex em texto → minúsculo."""
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return "0x" + bytes(v).hex()
+    if isinstance(v, str) and v[:2] in ("0x", "0X"):
+        return "0x" + v[2:].lower()
+    return v  # ex.: assinatura base58 da Solana (case-sensitive)
+
+def _json_default(v: Any) -> Any:
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return "0x" + bytes(v).hex()
+    if isinstance(v, Decimal):
+        return str(v)
+    if isinstance(v, (set, frozenset)):
+        return sorted(v)
+    if hasattr(v, "model_dump"):
+        return v.model_dump(mode="json")
+    raise TypeError(f"valor não serializável no id do evento: {type(v).__name__}")
+
+# encoder reaproveitado: json.dumps(**kwargs) monta um JSONEncoder novo a cada chamada
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+def canonical_json(obj: Any) -> bytes:
+    """JSON compacto com chaves ordenadas em todos os níveis; bytes viram 0x-hex."""
+    return _ENCODER.encode(obj).encode("utf-8")
 
 def deterministic_event_id(source: Dict[str, Any], payload: Dict[str, Any]) -> str:
     """
     Gera um ID estável a partir de ponteiros on-chain + payload normalizado.
+      - com (chain, tx_hash, log_index): hash só do ponteiro (um log é único on-chain)
+      - senão: hash da codificação canônica de ponteiro + payload
     """
-    base = f"{source.get('chain')}|{source.get('tx_hash')}|{source.get('log_index')}|{source.get('slot')}|{sorted(payload.items())}"
-    return sha256(base.encode()).hexdigest()
+    chain, tx_hash, log_index = source.get("chain"), source.get("tx_hash"), source.get("log_index")
+    if chain and tx_hash and log_index is not None:
+        base = f"{chain}|{_norm_hash(tx_hash)}|{int(log_index)}".encode("utf-8")
+    else:
+        base = canonical_json({
+            "chain": chain,
+            "tx_hash": _norm_hash(tx_hash),
+            "log_index": log_index,
+            "slot": source.get("slot"),
+            "payload": payload,
+        })
+    return blake2b(base, digest_size=ID_DIGEST_SIZE).hexdigest()
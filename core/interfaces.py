@@ -1,14 +1,43 @@
 # core/interfaces.py
 from __future__ import annotations
-from typing import Protocol, List, Optional
-from core.schemas import CoreEvent, JobEnvelope
+from typing import Protocol, List, Optional, Iterator, Tuple, ContextManager
+from core.schemas import CoreEvent
+from core.records import JobRecord
 
 class JobQueueBackend(Protocol):
-    def enqueue(self, env: JobEnvelope) -> None: ...
-    def pop_due(self, now: float, limit: int) -> List[JobEnvelope]: ...
-    def requeue(self, env: JobEnvelope) -> None: ...
-    def ack(self, env: JobEnvelope) -> None: ...
-    def dead_letter(self, env: JobEnvelope, reason: str) -> None: ...
+    def enqueue(self, env: JobRecord) -> None: ...
+    def pop_due(self, now: float, limit: int) -> List[JobRecord]: ...  # claim com lease (exclusivo por worker)
+    # requeue/ack/dead_letter só valem para o dono do lease: False / ids devolvidos = lease perdido
+    def requeue(self, env: JobRecord) -> bool: ...
+    def ack(self, env: JobRecord) -> bool: ...
+    def dead_letter(self, env: JobRecord, reason: str) -> bool: ...
+    # operações em lote: uma transação (SQLite) / um pipeline (Redis)
+    def enqueue_many(self, envs: List[JobRecord]) -> None: ...
+    def requeue_many(self, envs: List[JobRecord]) -> List[str]: ...
+    def ack_many(self, envs: List[JobRecord]) -> List[str]: ...
+
+class AsyncJobQueueBackend(Protocol):
+    """Mesmo contrato de JobQueueBackend, em corrotinas (AsyncJobQueue)."""
+    async def enqueue(self, env: JobRecord) -> None: ...
+    async def pop_due(self, now: float, limit: int) -> List[JobRecord]: ...
+    async def requeue(self, env: JobRecord) -> bool: ...
+    async def ack(self, env: JobRecord) -> bool: ...
+    async def dead_letter(self, env: JobRecord, reason: str) -> bool: ...
+    async def enqueue_many(self, envs: List[JobRecord]) -> None: ...
+    async def requeue_many(self, envs: List[JobRecord]) -> List[str]: ...
+    async def ack_many(self, envs: List[JobRecord]) -> List[str]: ...
+    async def close(self) -> None: ...
+
+class KVBackend(Protocol):
+    """
+    Backend do StateStore: guarda valores já serializados (JSON) por chave.
+    """
+    def get(self, key: str) -> Optional[str]: ...
+    def set(self, key: str, value: str) -> None: ...
+    def delete(self, key: str) -> None: ...
+    def items(self) -> Iterator[Tuple[str, str]]: ...
+    def transaction(self) -> ContextManager[None]: ...
+    def data_version(self) -> int: ...
 
 class DistributedLock(Protocol):
     def acquire(self, timeout: float = 5.0) -> bool: ...
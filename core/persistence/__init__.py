@@ -2,3 +2,5 @@
 from .store import SnapshotStore, SnapshotMeta, sha256_hex
 from .manifest import SnapshotManifest
 from .persister import AutoPersister
+from .journal import JournaledState
+from .segments import SegmentArchive
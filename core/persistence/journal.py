@@ -0,0 +1,305 @@
+# janus/core/persistence/journal.py
+import json, os, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava de dono
+    fcntl = None
+
+_MISSING = object()
+
+class JournalTx:
+    """
+    Transação de journal (ver JournaledState.transaction): as operações valem em memória
+    na hora, mas só vão ao journal em prepare() (ou no fim do bloco), numa única linha
+    {"op":"tx","e":<tag>,"ops":[...]}. Erro no bloco desfaz as operações em memória.
+    """
+    __slots__ = ("state", "tag", "ops", "undo", "prepared")
+
+    def __init__(self, state: "JournaledState", tag: Optional[str]):
+        self.state, self.tag = state, tag
+        self.ops: List[Dict[str, Any]] = []
+        self.undo: List[Callable[[], None]] = []
+        self.prepared = False
+
+    def prepare(self):
+        """Grava a linha da transação; operações posteriores no bloco são rejeitadas."""
+        if not self.prepared:
+            self.state._write_tx(self)
+
+class JournaledState:
+    """
+    Estado em memória (dict de topo) com persistência incremental:
+      - cada mutação vira uma linha JSON no journal (write-ahead, append-only)
+      - a cada N operações ou T segundos, grava checkpoint compactado
+        (tmp + rename atômico) e trunca o journal
+      - na abertura: carrega checkpoint e reaplica o journal (linha final
+        truncada por crash é ignorada)
+    Operações: set, delete, append (lista), merge (dict), unset (chaves de dict),
+    patch (item de lista por índice), remove (itens de lista pelo campo "id").
+    Valores retornados por get() são referências internas: não mutar, use as operações.
+
+    Transações com tag (id do evento) amarram as operações a um marcador externo:
+    na recuperação, uma linha "tx" só é reaplicada se committed(tag) for verdadeiro
+    e não houver "abort" posterior para ela; as descartadas forçam um checkpoint.
+
+    Dono único: o journal não é compartilhável entre processos nem entre instâncias.
+    A abertura pega um lock exclusivo (fcntl.flock, por descritor aberto) em
+    <snapshot>.lock e falha com RuntimeError se outra instância, deste ou de outro
+    processo, já for a dona.
+    """
+    def __init__(self, snapshot_path: str, journal_path: Optional[str] = None, *,
+                 checkpoint_every: int = 1000, checkpoint_interval_sec: float = 30.0, fsync: bool = False,
+                 committed: Optional[Callable[[str], bool]] = None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or (os.path.splitext(snapshot_path)[0] + ".journal")
+        self.checkpoint_every = int(checkpoint_every)
+        self.checkpoint_interval_sec = float(checkpoint_interval_sec)
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {}
+        self._ops_since_cp = 0
+        self._last_cp = time.time()
+        self._committed = committed
+        self._tx: Optional[JournalTx] = None
+        d = os.path.dirname(self.snapshot_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._owner = self._acquire_owner()
+        self._journal = None
+        dropped = self._recover()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if dropped:
+            # tira do journal as transações descartadas (não podem voltar se o marcador aparecer depois)
+            self.checkpoint()
+
+    def _acquire_owner(self):
+        if fcntl is None:
+            return None
+        f = open(self.snapshot_path + ".lock", "a+")
+        try:
+            # flock vale por descrição de arquivo aberta: um segundo open no mesmo processo
+            # também conflita (lockf é por processo e deixaria duas instâncias no mesmo journal)
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            raise RuntimeError(f"journal {self.journal_path} já está aberto por outra instância")
+        return f
+
+    # ---------- Recuperação ----------
+    def _recover(self) -> int:
+        """Carrega checkpoint + journal; devolve quantas transações foram descartadas."""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                self._data = json.loads(f.read() or "{}")
+        if not os.path.exists(self.journal_path):
+            return 0
+        ops: List[Dict[str, Any]] = []
+        good = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # escrita parcial no fim do journal
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    break
+                good += len(line)
+        # descarta a cauda corrompida para que novas linhas não se colem a ela
+        with open(self.journal_path, "r+b") as f:
+            f.truncate(good)
+        # "abort" anula a última tx com a mesma tag antes dele (retentativas posteriores valem)
+        skip, last = set(), {}
+        for n, op in enumerate(ops):
+            if op["op"] == "tx" and op.get("e") is not None:
+                last[op["e"]] = n
+            elif op["op"] == "abort" and op["e"] in last:
+                skip.add(last.pop(op["e"]))
+        dropped = 0
+        for n, op in enumerate(ops):
+            if op["op"] == "abort":
+                dropped += 1
+                continue
+            if op["op"] == "tx":
+                tag = op.get("e")
+                if n in skip or (tag is not None and self._committed is not None and not self._committed(tag)):
+                    dropped += 1
+                    continue
+                for sub in op["ops"]:
+                    self._apply(sub)
+            else:
+                self._apply(op)
+            self._ops_since_cp += 1
+        return dropped
+
+    # ---------- Aplicação ----------
+    def _apply(self, op: Dict[str, Any], undo: Optional[List[Callable[[], None]]] = None):
+        """Aplica `op`; com `undo`, registra nele como desfazê-la (transações)."""
+        kind, k, data = op["op"], op["k"], self._data
+        if undo is not None:
+            undo.append(self._undo_for(op))
+        if kind == "set":
+            data[k] = op["v"]
+        elif kind == "delete":
+            data.pop(k, None)
+        elif kind == "append":
+            data.setdefault(k, []).append(op["v"])
+        elif kind == "merge":
+            data.setdefault(k, {}).update(op["v"])
+        elif kind == "unset":
+            d = data.get(k) or {}
+            for f in op["f"]:
+                d.pop(f, None)
+        elif kind == "patch":
+            data[k][op["i"]].update(op["v"])
+        elif kind == "remove":
+            ids = set(op["ids"])
+            data[k] = [it for it in data.get(k, []) if it.get("id") not in ids]
+        else:
+            raise ValueError(f"operação de journal desconhecida: {kind}")
+
+    def _undo_for(self, op: Dict[str, Any]) -> Callable[[], None]:
+        kind, k, data = op["op"], op["k"], self._data
+        prev = data.get(k, _MISSING)
+        if kind in ("set", "delete", "remove"):
+            # remove troca a lista inteira: restaurar a referência antiga desfaz
+            def undo():
+                if prev is _MISSING:
+                    data.pop(k, None)
+                else:
+                    data[k] = prev
+            return undo
+        if kind == "append":
+            item = op["v"]
+            def undo():
+                lst = data.get(k) or []
+                for n in range(len(lst) - 1, -1, -1):
+                    if lst[n] is item:
+                        del lst[n]
+                        break
+            return undo
+        if kind in ("merge", "unset", "patch"):
+            target = data[k][op["i"]] if kind == "patch" else (prev if isinstance(prev, dict) else None)
+            fields = op["f"] if kind == "unset" else list(op["v"])
+            old = {f: target.get(f, _MISSING) for f in fields} if target is not None else {}
+            def undo():
+                if target is None:
+                    data.pop(k, None)  # merge criou o dict
+                    return
+                for f, v in old.items():
+                    if v is _MISSING:
+                        target.pop(f, None)
+                    else:
+                        target[f] = v
+            return undo
+        raise ValueError(f"operação de journal desconhecida: {kind}")
+
+    def _write_line(self, op: Dict[str, Any]):
+        self._journal.write(json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _log(self, op: Dict[str, Any]):
+        with self._lock:
+            tx = self._tx
+            if tx is not None:
+                if tx.prepared:
+                    raise RuntimeError("journal: operação após prepare() da transação")
+                self._apply(op, tx.undo)
+                tx.ops.append(op)
+                return
+            self._write_line(op)
+            self._apply(op)
+            self._ops_since_cp += 1
+            self._maybe_checkpoint()
+
+    def _write_tx(self, tx: JournalTx):
+        with self._lock:
+            if tx.ops:
+                self._write_line({"op": "tx", "e": tx.tag, "ops": tx.ops})
+                self._ops_since_cp += len(tx.ops)
+            tx.prepared = True
+
+    def _maybe_checkpoint(self):
+        if self._ops_since_cp >= self.checkpoint_every or time.time() - self._last_cp >= self.checkpoint_interval_sec:
+            self.checkpoint()
+
+    # ---------- API ----------
+    @contextmanager
+    def transaction(self, tag: Optional[str] = None) -> Iterator[JournalTx]:
+        """
+        Agrupa as operações do bloco numa linha de journal. Chame tx.prepare()
+        imediatamente antes de gravar o marcador externo de `tag`; se algo falhar
+        depois disso, um registro "abort" é gravado. Em qualquer erro as operações
+        são desfeitas em memória. O lock do journal fica com a transação até o fim
+        (a ordem em memória é a ordem de replay); transações aninhadas se juntam à externa.
+        """
+        with self._lock:
+            if self._tx is not None:
+                yield self._tx
+                return
+            tx = self._tx = JournalTx(self, tag)
+            try:
+                yield tx
+                tx.prepare()
+            except BaseException:
+                if tx.prepared and tx.ops:
+                    self._write_line({"op": "abort", "e": tx.tag})
+                for undo in reversed(tx.undo):
+                    undo()
+                raise
+            finally:
+                self._tx = None
+            self._maybe_checkpoint()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        self._log({"op": "set", "k": key, "v": value})
+
+    def delete(self, key: str):
+        self._log({"op": "delete", "k": key})
+
+    def append(self, key: str, item: Any):
+        self._log({"op": "append", "k": key, "v": item})
+
+    def merge(self, key: str, fields: Dict[str, Any]):
+        self._log({"op": "merge", "k": key, "v": fields})
+
+    def unset(self, key: str, fields: List[str]):
+        self._log({"op": "unset", "k": key, "f": list(fields)})
+
+    def patch(self, key: str, index: int, fields: Dict[str, Any]):
+        self._log({"op": "patch", "k": key, "i": index, "v": fields})
+
+    def remove(self, key: str, ids: List[str]):
+        self._log({"op": "remove", "k": key, "ids": list(ids)})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+    def checkpoint(self):
+        """Grava o estado compactado e trunca o journal."""
+        with self._lock:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self._data, ensure_ascii=False, separators=(",", ":")))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            self._journal.truncate(0)
+            self._journal.seek(0)
+            self._ops_since_cp = 0
+            self._last_cp = time.time()
+
+    def close(self):
+        with self._lock:
+            self.checkpoint()
+            self._journal.close()
+            if self._owner is not None:
+                self._owner.close()  # libera o lock de dono
+                self._owner = None
@@ -0,0 +1,179 @@
+# janus/core/persistence/segments.py
+import json, os, sqlite3, threading, time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.db"
+
+def record_position(rec: Dict[str, Any]) -> Optional[int]:
+    """Posição on-chain de um registro (block_number na Base, slot na Solana)."""
+    src = rec.get("src") or {}
+    ptr = rec.get("pointer") or {}
+    for v in (src.get("block_number"), src.get("slot"), ptr.get("block_number"), ptr.get("slot")):
+        if v is not None:
+            return int(v)
+    return None
+
+def in_chain(rec: Dict[str, Any], chain: Optional[str]) -> bool:
+    return chain is None or (rec.get("src") or {}).get("chain") == chain
+
+class SegmentArchive:
+    """
+    Tier de arquivo para registros que saíram da janela quente:
+      - segmentos imutáveis JSONL (seg-<seq>.jsonl), gravados via tmp + rename
+      - manifest.json com faixa de bloco/slot e de observed_at por segmento
+      - index.db (SQLite) com id/tx_hash -> (segmento, offset) para busca pontual
+    Consultas por faixa filtram segmentos pelo manifest e só então leem os arquivos.
+    Só vale o que consta no manifest (gravado por último): arquivo/linhas de índice de
+    um segmento interrompido por crash são ignorados e limpos na abertura, e o seq
+    novo nunca reaproveita um número já presente no manifest, no índice ou em disco.
+    Um registro arquivado duas vezes (crash entre o segmento e a remoção do journal)
+    aparece uma vez só nas consultas.
+    """
+    def __init__(self, root_dir: str, name: str):
+        self.root = os.path.join(root_dir, name)
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {"segments": []}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        self._db = sqlite3.connect(os.path.join(self.root, INDEX_FILE), isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+        CREATE TABLE IF NOT EXISTS recs (
+          id TEXT PRIMARY KEY,
+          tx_hash TEXT,
+          seg INTEGER NOT NULL,
+          off INTEGER NOT NULL
+        ) WITHOUT ROWID""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_recs_tx ON recs(tx_hash)")
+        self._seqs = {s["seq"] for s in self._data.get("segments", [])}
+        # linhas de segmentos que não chegaram ao manifest (crash entre índice e manifest)
+        orphans = [seq for (seq,) in self._db.execute("SELECT DISTINCT seg FROM recs") if seq not in self._seqs]
+        if orphans:
+            self._db.executemany("DELETE FROM recs WHERE seg=?", [(seq,) for seq in orphans])
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def _seg_path(self, seq: int) -> str:
+        return os.path.join(self.root, f"seg-{seq:06d}.jsonl")
+
+    def _next_seq(self) -> int:
+        on_disk = [int(n[4:10]) for n in os.listdir(self.root)
+                   if n.startswith("seg-") and n[4:10].isdigit()]
+        indexed = self._db.execute("SELECT MAX(seg) FROM recs").fetchone()[0] or 0
+        return max([0, indexed, *self._seqs, *on_disk]) + 1
+
+    def segments(self) -> List[Dict[str, Any]]:
+        return list(self._data.get("segments", []))
+
+    def __len__(self) -> int:
+        return sum(int(s["count"]) for s in self.segments())
+
+    def append_segment(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            segs = self._data.setdefault("segments", [])
+            seq = self._next_seq()
+            path = self._seg_path(seq)
+            rows, off = [], 0
+            with open(path + ".tmp", "wb") as f:
+                for r in records:
+                    line = (json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                    f.write(line)
+                    tx = (r.get("pointer") or {}).get("tx_hash") or (r.get("src") or {}).get("tx_hash")
+                    rows.append((r.get("id"), (tx or "").lower() or None, seq, off))
+                    off += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+
+            positions = [p for p in (record_position(r) for r in records) if p is not None]
+            observed = [r["observed_at"] for r in records if r.get("observed_at") is not None]
+            meta = {
+                "seq": seq,
+                "file": os.path.basename(path),
+                "count": len(records),
+                "min_pos": min(positions) if positions else None,
+                "max_pos": max(positions) if positions else None,
+                "min_observed_at": min(observed) if observed else None,
+                "max_observed_at": max(observed) if observed else None,
+                "created_at": int(time.time()),
+            }
+            # índice antes do manifest: um segmento só "existe" após constar no manifest
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR IGNORE INTO recs(id,tx_hash,seg,off) VALUES(?,?,?,?)", rows)
+            self._db.execute("COMMIT")
+            segs.append(meta)
+            try:
+                self._save_manifest()
+            except BaseException:
+                segs.pop()
+                self._db.execute("DELETE FROM recs WHERE seg=?", (seq,))
+                raise
+            self._seqs.add(seq)
+            return meta
+
+    def _read_at(self, seq: int, off: int) -> Dict[str, Any]:
+        with open(self._seg_path(seq), "rb") as f:
+            f.seek(off)
+            return json.loads(f.readline())
+
+    def get(self, rec_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT seg, off FROM recs WHERE id=?", (rec_id,)).fetchone()
+            if row is None or row[0] not in self._seqs:
+                return None
+        return self._read_at(*row)
+
+    def by_tx_hash(self, tx_hash: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT seg, off FROM recs WHERE tx_hash=? ORDER BY seg, off",
+                                    ((tx_hash or "").lower(),)).fetchall()
+            rows = [(seg, off) for seg, off in rows if seg in self._seqs]
+        return [self._read_at(seg, off) for seg, off in rows]
+
+    def range(self, from_pos: int, to_pos: int, chain: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Registros com bloco/slot em [from_pos, to_pos] (opcionalmente de uma chain), na ordem de arquivamento."""
+        seen = set()
+        for s in self.segments():
+            if s["min_pos"] is None or s["max_pos"] < from_pos or s["min_pos"] > to_pos:
+                continue
+            with open(self._seg_path(s["seq"]), "rb") as f:
+                for line in f:
+                    r = json.loads(line)
+                    p = record_position(r)
+                    if p is None or not (from_pos <= p <= to_pos) or not in_chain(r, chain):
+                        continue
+                    rid = r.get("id")
+                    if rid is not None:
+                        if rid in seen:
+                            continue  # arquivado de novo após crash antes do snap.remove
+                        seen.add(rid)
+                    yield r
+
+def roll_out(snap, key: str, archive: SegmentArchive, *, keep: int, batch: int,
+             eligible: Optional[Callable[[Dict[str, Any]], bool]] = None,
+             eligible_count: Optional[int] = None) -> List[str]:
+    """
+    Move os `batch` registros elegíveis mais antigos de `snap[key]` para um novo
+    segmento quando houver mais de `keep + batch` elegíveis na janela quente.
+    Grava o segmento antes de removê-los do journal; um crash entre os dois passos
+    deixa o registro duplicado (quente + arquivo), nunca perdido.
+    """
+    items = snap.get(key, [])
+    n = len(items) if eligible_count is None else eligible_count
+    if n < keep + batch:
+        return []
+    out = [r for r in items if eligible is None or eligible(r)][:batch]
+    if not out:
+        return []
+    archive.append_segment(out)
+    ids = [r.get("id") for r in out]
+    snap.remove(key, ids)
+    return ids
@@ -0,0 +1,144 @@
+# core/records.py
+from __future__ import annotations
+from typing import Any, Dict, Optional, Union
+from pydantic_core import from_json, to_json
+from core.schemas import ChainPointer, CoreEvent, JobEnvelope
+
+# Representação interna do caminho quente (fila → handler), usada depois da validação
+# de fronteira (EventRouter/CoreEvent). Mesmos atributos dos modelos pydantic, sem
+# validação por acesso, com __slots__, e payload guardado como texto JSON até ser lido.
+#
+# Formato de fio (compatível com JobEnvelope.model_validate_json, que ignora "v"):
+#   {"v":2,"job_id":..,"attempts":..,"max_attempts":..,"next_run_at":..,"acked":..,"error":..,
+#    "event":{"id":..,"type":..,"source":{..},"observed_at":..,"payload":<JSON cru>}}
+# payload é sempre o último campo: from_json separa o cabeçalho (pequeno) e não faz
+# parse do payload; requeue/DLQ reaproveitam o texto cru sem re-serializar, inclusive
+# depois que o handler leu o payload (o texto é mantido junto do dict).
+
+# JSON via pydantic_core (Rust): mesmo codec do model_dump_json, sem a camada de validação
+def _dumps(obj: Any) -> str:
+    return to_json(obj).decode("utf-8")
+
+WIRE_PREFIX = '{"v":2,'
+PAYLOAD_SEP = ',"payload":'
+
+class PointerRecord:
+    __slots__ = ("chain", "block_number", "slot", "tx_hash", "log_index")
+
+    def __init__(self, chain: str, block_number: Optional[int] = None, slot: Optional[int] = None,
+                 tx_hash: Optional[str] = None, log_index: Optional[int] = None):
+        self.chain = chain
+        self.block_number = block_number
+        self.slot = slot
+        self.tx_hash = tx_hash
+        self.log_index = log_index
+
+    def model_dump(self, mode: Optional[str] = None) -> Dict[str, Any]:
+        return {"chain": self.chain, "block_number": self.block_number, "slot": self.slot,
+                "tx_hash": self.tx_hash, "log_index": self.log_index}
+
+    dict = model_dump
+
+class EventRecord:
+    __slots__ = ("id", "type", "source", "observed_at", "_payload", "_payload_json")
+
+    def __init__(self, id: str, type: str, source: PointerRecord, observed_at: float,
+                 payload: Optional[Dict[str, Any]] = None, payload_json: Optional[str] = None):
+        self.id = id
+        self.type = type
+        self.source = source
+        self.observed_at = observed_at
+        self._payload = payload
+        self._payload_json = payload_json
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        # somente leitura: o texto cru continua valendo e é o que volta para a fila
+        if self._payload is None:
+            self._payload = from_json(self._payload_json) if self._payload_json else {}
+        return self._payload
+
+    @classmethod
+    def from_model(cls, ev) -> "EventRecord":
+        if isinstance(ev, EventRecord):
+            return ev
+        s = ev.source
+        return cls(ev.id, ev.type, PointerRecord(s.chain, s.block_number, s.slot, s.tx_hash, s.log_index),
+                   ev.observed_at, payload=ev.payload)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "EventRecord":
+        return cls(d["id"], d["type"], PointerRecord(**d["source"]), d["observed_at"], payload=d.get("payload") or {})
+
+    def to_model(self) -> CoreEvent:
+        """Volta ao modelo validado (fronteiras: API, replay, persistência de longo prazo)."""
+        return CoreEvent(id=self.id, type=self.type, payload=self.payload,
+                         source=ChainPointer(**self.source.model_dump()), observed_at=self.observed_at)
+
+    def model_dump(self, mode: Optional[str] = None) -> Dict[str, Any]:
+        return {"id": self.id, "type": self.type, "payload": self.payload,
+                "source": self.source.model_dump(), "observed_at": self.observed_at}
+
+    dict = model_dump
+
+# o que handlers de evento recebem: CoreEvent na fronteira, EventRecord vindo da fila
+AnyEvent = Union[CoreEvent, EventRecord]
+
+class JobRecord:
+    __slots__ = ("job_id", "event", "attempts", "max_attempts", "next_run_at", "acked", "error")
+
+    def __init__(self, job_id: str, event: EventRecord, attempts: int = 0, max_attempts: int = 5,
+                 next_run_at: float = 0.0, acked: bool = False, error: Optional[str] = None):
+        self.job_id = job_id
+        self.event = event
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.next_run_at = next_run_at
+        self.acked = acked
+        self.error = error
+
+    @classmethod
+    def from_model(cls, env: JobEnvelope) -> "JobRecord":
+        return cls(env.job_id, EventRecord.from_model(env.event), env.attempts, env.max_attempts,
+                   env.next_run_at, env.acked, env.error)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "JobRecord":
+        return cls(d["job_id"], EventRecord.from_dict(d["event"]), d.get("attempts", 0), d.get("max_attempts", 5),
+                   d["next_run_at"], d.get("acked", False), d.get("error"))
+
+    @classmethod
+    def from_json(cls, s: str) -> "JobRecord":
+        if s.startswith(WIRE_PREFIX) and s.endswith("}}"):
+            head, sep, raw = s.partition(PAYLOAD_SEP)
+            if sep:
+                # fora de strings JSON, ,"payload": só aparece como chave do evento (aspas internas são escapadas)
+                d = from_json(head + "}}")
+                ev = d["event"]
+                event = EventRecord(ev["id"], ev["type"], PointerRecord(**ev["source"]), ev["observed_at"],
+                                    payload_json=raw[:-2])
+                return cls(d["job_id"], event, d["attempts"], d["max_attempts"], d["next_run_at"], d["acked"], d["error"])
+        return cls.from_dict(from_json(s))  # formato do JobEnvelope (linhas antigas)
+
+    def model_dump_json(self) -> str:
+        ev = self.event
+        event = {"id": ev.id, "type": ev.type, "source": ev.source.model_dump(), "observed_at": ev.observed_at}
+        doc = {"v": 2, "job_id": self.job_id, "attempts": self.attempts, "max_attempts": self.max_attempts,
+               "next_run_at": self.next_run_at, "acked": self.acked, "error": self.error, "event": event}
+        if ev._payload_json is None:
+            event["payload"] = ev._payload if ev._payload is not None else {}  # último campo pela ordem de inserção
+            return _dumps(doc)
+        # payload veio da fila: o texto cru entra antes do "}}" final, sem re-serialização
+        return f"{_dumps(doc)[:-2]}{PAYLOAD_SEP}{ev._payload_json or '{}'}}}}}"
+
+    def model_dump(self, mode: Optional[str] = None) -> Dict[str, Any]:
+        return {"job_id": self.job_id, "event": self.event.model_dump(), "attempts": self.attempts,
+                "max_attempts": self.max_attempts, "next_run_at": self.next_run_at,
+                "acked": self.acked, "error": self.error}
+
+    dict = model_dump
+
+    def to_model(self) -> JobEnvelope:
+        return JobEnvelope(job_id=self.job_id, event=self.event.to_model(), attempts=self.attempts,
+                           max_attempts=self.max_attempts, next_run_at=self.next_run_at,
+                           acked=self.acked, error=self.error)
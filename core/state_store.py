@@ -1,45 +1,251 @@
 # core/state_store.py
 from __future__ import annotations
 import json
+import os
 import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional, Dict
+from typing import Any, ContextManager, Optional, Dict, Iterable, Iterator, List, TYPE_CHECKING
+
+from storage.sqlite_kv import SQLiteKVBackend
+from storage.json_kv import JSONFileKVBackend
+
+if TYPE_CHECKING:
+    from core.interfaces import KVBackend
+
+DEFAULT_PATH = os.getenv("JANUS_STATE_PATH", ".runtime/state.db")
+CACHE_CHECK_MS = float(os.getenv("JANUS_STATE_CACHE_CHECK_MS", "50"))
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+def _decode(raw: Optional[str]) -> Any:
+    return None if raw is None else json.loads(raw)
+
+class StateConflict(RuntimeError):
+    """Uma chave lida/esperada numa transação mudou antes do commit."""
+
+class StateBatch:
+    """
+    Escritas acumuladas em memória e aplicadas num único commit do backend.
+    Enquanto ativo (mesma thread), get/set/delete do StateStore passam por aqui,
+    com leitura das próprias escritas.
+    Em modo otimista (transaction()), cada chave lida ou passada a expect()
+    é revalidada no commit; divergência → StateConflict e nada é gravado.
+    """
+    def __init__(self, store: "StateStore", optimistic: bool = False):
+        self._store = store
+        self._optimistic = optimistic
+        self._writes: Dict[str, Optional[str]] = {}   # None = delete
+        self._reads: Dict[str, Any] = {}               # chave → valor decodificado esperado
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        if key in self._writes:
+            raw = self._writes[key]
+        else:
+            raw = self._store._get_raw(key)
+            if self._optimistic and key not in self._reads:
+                self._reads[key] = _decode(raw)
+        return default if raw is None else json.loads(raw)
+
+    def mget(self, keys: Iterable[str], default: Optional[Any] = None) -> Dict[str, Any]:
+        return {k: self.get(k, default) for k in keys}
+
+    def set(self, key: str, value: Any) -> None:
+        self._writes[key] = _encode(value)
+
+    def mset(self, items: Dict[str, Any]) -> None:
+        for k, v in items.items():
+            self.set(k, v)
+
+    def delete(self, key: str) -> None:
+        self._writes[key] = None
+
+    def expect(self, key: str, value: Any) -> None:
+        """Pré-condição de CAS: no commit, `key` deve valer `value`."""
+        self._reads[key] = value
+
+    def _commit(self) -> None:
+        self._store._commit(self._writes, self._reads)
 
 class StateStore:
     """
-    KV Store simples baseado em arquivo para snapshots e marcações de progresso.
-    Substituível por Redis/SQLite posteriormente.
+    KV store para snapshots e marcações de progresso, com backend plugável
+    e cache write-through em processo.
+      - Padrão: SQLite (WAL), uma linha por chave → get/set O(1) no tamanho do estado
+      - path terminando em ".json": backend legado (arquivo único)
+      - Na primeira abertura do SQLite, importa o ".json" legado vizinho, se existir
+    O cache guarda o valor serializado (cada get devolve uma cópia independente),
+    é LRU limitado a `cache_size` chaves (marcadores processed:{id} não crescem sem
+    limite) e é invalidado quando outra conexão/processo commita no mesmo arquivo.
+    A versão do backend é consultada no máximo a cada `cache_check_ms` (0 = todo get)
+    e sempre no início de batch()/transaction(); as escritas do próprio store não a mudam.
     """
-    def __init__(self, path: str = ".runtime/state.json"):
+    def __init__(self, path: str = DEFAULT_PATH, backend: Optional["KVBackend"] = None,
+                 cache_size: int = 10000, cache_check_ms: float = CACHE_CHECK_MS):
         self._path = Path(path)
-        self._lock = threading.Lock()
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        if not self._path.exists():
-            self._write({})
+        self._lock = threading.RLock()
+        if backend is None:
+            if self._path.suffix == ".json":
+                backend = JSONFileKVBackend(str(self._path))
+            else:
+                backend = SQLiteKVBackend(str(self._path))
+        self._backend = backend
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._cache_size = max(0, int(cache_size))
+        self._local = threading.local()
+        self._check_every = max(0.0, float(cache_check_ms)) / 1000.0
+        self._next_check = 0.0
+        self._version = self._backend.data_version()
+        if isinstance(backend, SQLiteKVBackend):
+            self._migrate_legacy(self._path.with_suffix(".json"))
+
+    def _migrate_legacy(self, legacy: Path) -> None:
+        if not legacy.exists():
+            return
+        with self._lock, self._backend.transaction():
+            if next(self._backend.items(), None) is not None:
+                return
+            data = json.loads(legacy.read_text() or "{}")
+            for k, v in data.items():
+                self._backend.set(k, _encode(v))
+        legacy.rename(legacy.with_suffix(".json.migrated"))
 
-    def _read(self) -> Dict[str, Any]:
+    def _sync_cache(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self._check_every
+        v = self._backend.data_version()
+        if v != self._version:
+            self._cache.clear()
+            self._version = v
+
+    def _cache_put(self, key: str, raw: Optional[str]) -> None:
+        self._cache[key] = raw
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _raw(self, key: str) -> Optional[str]:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        raw = self._backend.get(key)
+        self._cache_put(key, raw)
+        return raw
+
+    def _get_raw(self, key: str) -> Optional[str]:
         with self._lock:
-            if self._path.exists():
-                return json.loads(self._path.read_text() or "{}")
-            return {}
+            self._sync_cache()
+            return self._raw(key)
+
+    def _active(self) -> Optional[StateBatch]:
+        stack: List[StateBatch] = getattr(self._local, "stack", None) or []
+        return stack[-1] if stack else None
 
-    def _write(self, data: Dict[str, Any]) -> None:
+    def _commit(self, writes: Dict[str, Optional[str]], expected: Dict[str, Any]) -> None:
+        if not writes and not expected:
+            return
         with self._lock:
-            self._path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+            try:
+                with self._backend.transaction():
+                    # pré-condições lidas do backend (não do cache) dentro da transação
+                    for k, v in expected.items():
+                        if _decode(self._backend.get(k)) != v:
+                            raise StateConflict(k)
+                    for k, raw in writes.items():
+                        if raw is None:
+                            self._backend.delete(k)
+                        else:
+                            self._backend.set(k, raw)
+            except BaseException:
+                for k in list(writes) + list(expected):
+                    self._cache.pop(k, None)
+                raise
+            for k, raw in writes.items():
+                self._cache_put(k, raw)
+
+    @contextmanager
+    def _scope(self, optimistic: bool) -> Iterator[StateBatch]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if not stack:
+            with self._lock:
+                self._sync_cache(force=True)   # fronteira de batch: enxerga commits de terceiros
+        b = StateBatch(self, optimistic=optimistic)
+        stack.append(b)
+        try:
+            yield b
+        finally:
+            stack.pop()
+        parent = self._active()
+        if parent is not None:
+            # escopo aninhado: incorpora no externo (um único commit no final)
+            parent._writes.update(b._writes)
+            for k, v in b._reads.items():
+                parent._reads.setdefault(k, v)
+        else:
+            b._commit()
+
+    def batch(self) -> ContextManager[StateBatch]:
+        """Agrupa escritas num único commit durável (descartadas se houver exceção)."""
+        return self._scope(optimistic=False)
+
+    def transaction(self) -> ContextManager[StateBatch]:
+        """Como batch(), mas com CAS otimista sobre tudo que foi lido; ver StateConflict."""
+        return self._scope(optimistic=True)
 
     def get(self, key: str, default: Optional[Any] = None) -> Any:
-        data = self._read()
-        return data.get(key, default)
+        b = self._active()
+        if b is not None:
+            return b.get(key, default)
+        raw = self._get_raw(key)
+        return default if raw is None else json.loads(raw)
+
+    def mget(self, keys: Iterable[str], default: Optional[Any] = None) -> Dict[str, Any]:
+        return {k: self.get(k, default) for k in keys}
 
     def set(self, key: str, value: Any) -> None:
-        data = self._read()
-        data[key] = value
-        self._write(data)
+        b = self._active()
+        if b is not None:
+            b.set(key, value)
+            return
+        self._commit({key: _encode(value)}, {})
+
+    def mset(self, items: Dict[str, Any]) -> None:
+        b = self._active()
+        if b is not None:
+            b.mset(items)
+            return
+        self._commit({k: _encode(v) for k, v in items.items()}, {})
+
+    def delete(self, key: str) -> None:
+        b = self._active()
+        if b is not None:
+            b.delete(key)
+            return
+        self._commit({key: None}, {})
 
     def compare_and_set(self, key: str, expected: Any, new_value: Any) -> bool:
-        data = self._read()
-        if data.get(key) == expected:
-            data[key] = new_value
-            self._write(data)
+        return self.compare_and_set_many({key: expected}, {key: new_value})
+
+    def compare_and_set_many(self, expected: Dict[str, Any], new_values: Dict[str, Any]) -> bool:
+        """CAS atômico em várias chaves: grava `new_values` só se todas as `expected` conferirem."""
+        b = self._active()
+        if b is not None:
+            if any(b.get(k) != v for k, v in expected.items()):
+                return False
+            for k, v in expected.items():
+                if k not in b._writes:
+                    b.expect(k, v)   # revalidado no commit do batch
+            b.mset(new_values)
             return True
-        return False
+        try:
+            self._commit({k: _encode(v) for k, v in new_values.items()}, expected)
+        except StateConflict:
+            return False
+        return True
@@ -81,9 +81,7 @@ def run_health_server(port: int = 8080, cfg: dict | None = None, emit_raw=None):
             (cfg.get("listeners", {}).get("base-testnet", {}).get("checkpoints", {}) or {}).get("key_scan", "cp:base:scan_block"),
             (cfg.get("listeners", {}).get("solana-testnet", {}).get("checkpoints", {}) or {}).get("key_scan", "cp:sol:scan_slot"),
         ]
-        for k in keys:
-            if k:
-                s.set(k, None)
+        s.mset({k: None for k in keys if k})
         return {"status": "ok", "reset_keys": keys}
 
     @app.post("/admin/reprocess/base/contract")
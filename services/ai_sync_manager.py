@@ -1,12 +1,18 @@
 # services/ai_sync_manager.py
 from __future__ import annotations
-import json
+import copy
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Iterator, List
 
-from core.schemas import CoreEvent
+from core.records import AnyEvent
 from core.state_store import StateStore
+from core.persistence.journal import JournaledState, JournalTx
+from core.persistence.segments import SegmentArchive, roll_out, record_position, in_chain
+from services.bridge_messages import BridgeMessageStore
+from services.pending_confirmations import PendingConfirmations, POINTER_FIELD, DEFAULT_CONFIRMATIONS
 from telemetry.metrics import APPLY_LATENCY, JOBS_PROCESSED, JOBS_FAILED
 from security.ed25519 import verify_ed25519
 from locks.lock_factory import make_lock
@@ -19,28 +25,75 @@ class AISyncManager:
     """
     Aplica eventos ao estado dos agentes (PFNET), confirma cross-chain por CHAIN_HEAD
     e mantém snapshots. Usa locks distribuídos com FENCING (se configurado).
+    O snapshot fica em memória; cada mutação é anexada a um journal e o arquivo
+    de snapshot é reescrito apenas nos checkpoints periódicos (ver JournaledState).
+    As escritas de journal de um evento formam uma transação com o id do evento,
+    gravada logo antes do commit do marcador processed:{id}; na abertura, transações
+    sem marcador são descartadas. O journal tem dono único (um processo por snapshot).
+    Com queue.workers > 1, validação de assinatura e montagem dos registros rodam em
+    paralelo entre partições; só as mutações do snapshot + marcador ficam serializadas
+    pelo lock do journal.
     """
     def __init__(self, snapshot_path: str = ".runtime/agents_state.json", cfg: dict | None = None):
         self.snapshot_path = Path(snapshot_path)
-        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
         self.state = StateStore()
         self.cfg = cfg or {}
 
-        if not self.snapshot_path.exists():
-            self._write_snapshot({})
+        scfg = self.cfg.get("agents_state") or {}
+        self.snap = JournaledState(
+            str(self.snapshot_path),
+            checkpoint_every=int(scfg.get("checkpoint_every_ops", 1000)),
+            checkpoint_interval_sec=float(scfg.get("checkpoint_interval_sec", 30)),
+            fsync=bool(scfg.get("journal_fsync", False)),
+            committed=lambda event_id: self.state.get(f"processed:{event_id}") is not None,
+        )
+        # tier de arquivo: transfers e mensagens confirmadas antigas saem da janela quente
+        acfg = self.cfg.get("archive") or {}
+        archive_root = acfg.get("root", str(self.snapshot_path.parent / "archive"))
+        self.segment_records = int(acfg.get("segment_records", 5000))
+        self.hot_transfers = int(acfg.get("hot_transfers", 10000))
+        self.transfer_archive = SegmentArchive(archive_root, "transfers")
+        self._transfers_mu = threading.Lock()
+        # id -> transfer da janela quente (os dicts são os mesmos do snapshot)
+        self._transfers_by_id: Dict[str, Dict[str, Any]] = {}
+        self._index_transfers()
+        self.bridge = BridgeMessageStore(
+            self.snap,
+            archive=SegmentArchive(archive_root, "bridge_messages"),
+            hot_confirmed=int(acfg.get("hot_bridge_confirmed", 10000)),
+            segment_records=self.segment_records,
+        )
+        # índice de mensagens pendentes: ref = id da mensagem
+        self.pending = PendingConfirmations()
+        self.pending.rebuild((m["id"], m) for m in self.bridge)
+        # tipo → preparo do evento (fora do lock), que devolve as mutações do snapshot
+        self._prepare: Dict[str, Callable[[AnyEvent], Callable[[], None]]] = {
+            "AGENT_SIGNAL": self._handle_agent_signal,
+            "BRIDGE_MESSAGE": self._handle_bridge_message,
+            "TRANSFER": self._handle_transfer,
+            "ORACLE_UPDATE": self._handle_oracle_update,
+        }
 
-    # ---------- Snapshot ----------
-    def _read_snapshot(self) -> Dict[str, Any]:
-        if self.snapshot_path.exists():
-            content = self.snapshot_path.read_text() or "{}"
-            return json.loads(content)
-        return {}
+    def close(self) -> None:
+        self.snap.close()
 
-    def _write_snapshot(self, data: Dict[str, Any]) -> None:
-        self.snapshot_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    def _index_transfers(self) -> None:
+        self._transfers_by_id = {t.get("id"): t for t in self.snap.get("transfers", [])}
+
+    # ---------- Consultas (janela quente + arquivo) ----------
+    def find_transfer(self, transfer_id: str) -> Dict[str, Any] | None:
+        t = self._transfers_by_id.get(transfer_id)
+        return t if t is not None else self.transfer_archive.get(transfer_id)
+
+    def transfers_in_range(self, from_pos: int, to_pos: int, chain: str | None = None) -> List[Dict[str, Any]]:
+        hot = [t for t in self.snap.get("transfers", [])
+               if (p := record_position(t)) is not None and from_pos <= p <= to_pos and in_chain(t, chain)]
+        # crash entre o segmento e o snap.remove deixa o registro nos dois tiers: vale o quente
+        seen = {t.get("id") for t in hot}
+        return [t for t in self.transfer_archive.range(from_pos, to_pos, chain) if t.get("id") not in seen] + hot
 
     # ---------- API ----------
-    def apply_event(self, event: CoreEvent) -> None:
+    def apply_event(self, event: AnyEvent) -> None:
         start = time.time()
         with tracer.start_as_current_span("apply_event", attributes={
             "event.type": event.type,
@@ -49,7 +102,9 @@ class AISyncManager:
         }):
             try:
                 if event.type == "CHAIN_HEAD":
-                    self._handle_chain_head(event)
+                    # transação sem tag: só pelo lock/undo (idempotente, sem marcador)
+                    with self._journaled(None), self.state.batch():
+                        self._handle_chain_head(event)
                     JOBS_PROCESSED.inc()
                     return
 
@@ -65,18 +120,19 @@ class AISyncManager:
                         JOBS_PROCESSED.inc()
                         return
 
-                    if event.type == "AGENT_SIGNAL":
-                        self._handle_agent_signal(event)
-                    elif event.type == "BRIDGE_MESSAGE":
-                        self._handle_bridge_message(event)
-                    elif event.type == "TRANSFER":
-                        self._handle_transfer(event)
-                    elif event.type == "ORACLE_UPDATE":
-                        self._handle_oracle_update(event)
-                    else:
+                    # parte sem estado compartilhado (assinatura, payload, registros) fora do
+                    # lock do journal: eventos de partições diferentes rodam em paralelo até aqui
+                    prepare = self._prepare.get(event.type)
+                    if prepare is None:
                         raise ValueError(f"Tipo de evento não suportado: {event.type}")
+                    mutate = prepare(event)
 
-                    self.state.set(processed_key, {"at": time.time(), "source": event.source.dict()})
+                    # só as mutações do snapshot + marcador "processed" ficam sob o lock do
+                    # journal, num único commit; o journal do evento (tx.prepare) vem antes dele
+                    with self._journaled(event.id) as tx, self.state.batch():
+                        mutate()
+                        self.state.set(processed_key, {"at": time.time(), "source": event.source.dict()})
+                        tx.prepare()
                     JOBS_PROCESSED.inc()
             except Exception:
                 JOBS_FAILED.inc()
@@ -84,8 +140,20 @@ class AISyncManager:
             finally:
                 APPLY_LATENCY.observe(max(0.0, time.time() - start))
 
+    @contextmanager
+    def _journaled(self, tag: str | None) -> Iterator[JournalTx]:
+        """Transação de journal; em falha, os índices derivados do snapshot são refeitos."""
+        try:
+            with self.snap.transaction(tag) as tx:
+                yield tx
+        except BaseException:
+            self.bridge.rebuild()
+            self.pending.rebuild((m["id"], m) for m in self.bridge)
+            self._index_transfers()
+            raise
+
     # ---------- Handlers ----------
-    def _handle_chain_head(self, event: CoreEvent) -> None:
+    def _handle_chain_head(self, event: AnyEvent) -> None:
         with tracer.start_as_current_span("handle_chain_head", attributes={"chain": event.source.chain}):
             key = f"head:{event.source.chain}"
             head = self.state.get(key, {})
@@ -99,9 +167,11 @@ class AISyncManager:
                     head["slot"] = int(slot)
             head["updated_at"] = time.time()
             self.state.set(key, head)
-            self._confirm_pending_messages()
+            self._confirm_pending_messages(event.source.chain)
 
-    def _handle_agent_signal(self, event: CoreEvent) -> None:
+    # Os handlers abaixo validam e montam o que vão gravar sem tocar no snapshot e
+    # devolvem a mutação, que apply_event executa dentro da transação do journal.
+    def _handle_agent_signal(self, event: AnyEvent) -> Callable[[], None]:
         with tracer.start_as_current_span("handle_agent_signal"):
             cfg_verify = bool(self.state.get("cfg:verify_agent_signatures", True))
             p = event.payload or {}
@@ -110,49 +180,51 @@ class AISyncManager:
                 if not ok:
                     raise ValueError("AGENT_SIGNAL: assinatura inválida")
 
-            snap = self._read_snapshot()
             agent_id = p.get("agent_id") or (p.get("decoded", {}) or {}).get("agent_id") or "pfnet:unknown"
             signal = p.get("signal") or (p.get("decoded", {}) or {}).get("name") or "LOG"
-            now = time.time()
-            agent = snap.get(agent_id, {"status": {}, "meta": {}})
+            chain = event.source.chain
+
+        def mutate() -> None:
+            agent = copy.deepcopy(self.snap.get(agent_id, {"status": {}, "meta": {}}))
             agent["status"]["last_signal"] = signal
-            agent["status"]["last_seen"] = now
-            agent["status"]["chain"] = event.source.chain
-            snap[agent_id] = agent
-            self._write_snapshot(snap)
+            agent["status"]["last_seen"] = time.time()
+            agent["status"]["chain"] = chain
+            self.snap.set(agent_id, agent)
+        return mutate
 
-    def _handle_bridge_message(self, event: CoreEvent) -> None:
+    def _handle_bridge_message(self, event: AnyEvent) -> Callable[[], None]:
         with tracer.start_as_current_span("handle_bridge_message"):
-            snap = self._read_snapshot()
-            msgs = snap.get("bridge:messages", [])
-            if not any(m.get("id") == event.id for m in msgs):
-                decoded = event.payload.get("args") or event.payload.get("decoded") or {}
-                msgs.append({
-                    "id": event.id,
-                    "direction": event.payload.get("direction"),
-                    "asset": event.payload.get("asset") or decoded.get("asset"),
-                    "amount": event.payload.get("amount") or decoded.get("amount"),
-                    "src": event.source.dict(),
-                    "observed_at": event.observed_at,
-                    "confirmed": False,
-                    "pointer": {
-                        "block_number": event.source.block_number,
-                        "slot": event.source.slot,
-                        "log_index": event.source.log_index,
-                        "tx_hash": event.source.tx_hash,
-                    },
-                    "decoded": decoded,
-                })
-                snap["bridge:messages"] = msgs
-                self._write_snapshot(snap)
-            self._confirm_pending_messages()
-
-    def _handle_transfer(self, event: CoreEvent) -> None:
+            decoded = event.payload.get("args") or event.payload.get("decoded") or {}
+            pointer = {
+                "block_number": event.source.block_number,
+                "slot": event.source.slot,
+                "log_index": event.source.log_index,
+                "tx_hash": event.source.tx_hash,
+            }
+            msg = {
+                "id": event.id,
+                "direction": event.payload.get("direction"),
+                "asset": event.payload.get("asset") or decoded.get("asset"),
+                "amount": event.payload.get("amount") or decoded.get("amount"),
+                "src": event.source.dict(),
+                "observed_at": event.observed_at,
+                "confirmed": False,
+                "pointer": pointer,
+                "decoded": decoded,
+            }
+            chain = event.source.chain
+
+        def mutate() -> None:
+            if event.id not in self.bridge:
+                added = self.bridge.add(msg)
+                if added and self.pending.add(chain, pointer, event.id):
+                    self._confirm_pending_messages(chain)
+        return mutate
+
+    def _handle_transfer(self, event: AnyEvent) -> Callable[[], None]:
         with tracer.start_as_current_span("handle_transfer"):
-            snap = self._read_snapshot()
-            transfers = snap.get("transfers", [])
             decoded = event.payload.get("args") or {}
-            transfers.append({
+            rec = {
                 "id": event.id,
                 "asset": event.payload.get("asset") or decoded.get("token"),
                 "amount": event.payload.get("amount") or decoded.get("value"),
@@ -160,53 +232,32 @@ class AISyncManager:
                 "from": event.payload.get("from") or decoded.get("from"),
                 "src": event.source.dict(),
                 "observed_at": event.observed_at,
-            })
-            snap["transfers"] = transfers
-            self._write_snapshot(snap)
+            }
 
-    def _handle_oracle_update(self, event: CoreEvent) -> None:
+        def mutate() -> None:
+            self.snap.append("transfers", rec)
+            self._transfers_by_id[event.id] = rec
+            with self._transfers_mu:
+                for tid in roll_out(self.snap, "transfers", self.transfer_archive,
+                                    keep=self.hot_transfers, batch=self.segment_records):
+                    self._transfers_by_id.pop(tid, None)
+        return mutate
+
+    def _handle_oracle_update(self, event: AnyEvent) -> Callable[[], None]:
         with tracer.start_as_current_span("handle_oracle_update"):
-            snap = self._read_snapshot()
-            oracle = snap.get("oracle", {})
-            oracle.update(event.payload or {})
-            snap["oracle"] = oracle
-            self._write_snapshot(snap)
+            fields = dict(event.payload or {})
+        return lambda: self.snap.merge("oracle", fields)
 
     # ---------- Confirmações ----------
-    def _confirm_pending_messages(self) -> None:
+    def _confirm_pending_messages(self, chain: str | None = None) -> None:
+        """Confirma só as mensagens que o head atual acabou de liberar (via PendingConfirmations)."""
         with tracer.start_as_current_span("confirm_pending_messages"):
-            snap = self._read_snapshot()
-            msgs = snap.get("bridge:messages", [])
-            if not msgs:
-                return
-
-            base_req = int(self.state.get("confirmations:base-testnet", 2))
-            sola_req = int(self.state.get("confirmations:solana-testnet", 1))
-            head_base = self.state.get("head:base-testnet", {})
-            head_sola = self.state.get("head:solana-testnet", {})
-
-            changed = False
             now = time.time()
-            for m in msgs:
-                if m.get("confirmed"):
+            for ch, field in POINTER_FIELD.items():
+                if chain is not None and ch != chain:
                     continue
-                src_chain = (m.get("src") or {}).get("chain")
-                ptr = m.get("pointer") or {}
-                if src_chain == "base-testnet":
-                    bn = ptr.get("block_number")
-                    head_bn = head_base.get("block_number")
-                    if bn is not None and head_bn is not None and head_bn >= int(bn) + base_req:
-                        m["confirmed"] = True
-                        m["confirmed_at"] = now
-                        changed = True
-                elif src_chain == "solana-testnet":
-                    slot = ptr.get("slot")
-                    head_slot = head_sola.get("slot")
-                    if slot is not None and head_slot is not None and head_slot >= int(slot) + sola_req:
-                        m["confirmed"] = True
-                        m["confirmed_at"] = now
-                        changed = True
-
-            if changed:
-                snap["bridge:messages"] = msgs
-                self._write_snapshot(snap)
+                required = int(self.state.get(f"confirmations:{ch}", DEFAULT_CONFIRMATIONS[ch]))
+                head = self.state.get(f"head:{ch}", {}).get(field)
+                for msg_id in self.pending.pop_confirmed(ch, head, required):
+                    self.bridge.patch(msg_id, {"confirmed": True, "confirmed_at": now})
+            self.bridge.roll()
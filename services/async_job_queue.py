@@ -0,0 +1,170 @@
+# services/async_job_queue.py
+from __future__ import annotations
+import asyncio
+import inspect
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, Union
+from core.schemas import CoreEvent
+from core.records import JobRecord, EventRecord
+from core.interfaces import AsyncJobQueueBackend
+from storage.async_threaded_queue import AsyncThreadedQueueBackend
+try:
+    from storage.async_redis_queue import AsyncRedisQueueBackend  # opcional
+except Exception:
+    AsyncRedisQueueBackend = None  # type: ignore
+
+from rate.rate_limiter import RateLimiter
+from rate.backpressure import Backpressure
+from services.job_queue import (KeyBlocks, after_lane_failure, make_backend, partition_key, plan_tick,
+                                start_retention)
+from telemetry.metrics import JOBS_PROCESSED, JOBS_FAILED, QUEUE_WAIT, LEASES_LOST, POOL_BUSY
+
+Handler = Callable[[EventRecord], Union[Awaitable[None], None]]
+
+class AsyncJobQueue:
+    """
+    Versão asyncio do JobQueue: mesma config (seção queue), mesmas regras de
+    rate-limit/backpressure/backoff/DLQ, mas backend e handler são aguardados no
+    event loop, que pode ser compartilhado com listeners (ex.: WS da Solana).
+      - redis        → AsyncRedisQueueBackend (redis.asyncio, nativo)
+      - redis_stream/sqlite → backend de make_backend() via executor (AsyncThreadedQueueBackend),
+        com o mesmo compactor de retenção; o planejamento do tick é o plan_tick() do JobQueue
+    Handlers podem ser corrotinas ou funções comuns (rodadas com asyncio.to_thread).
+    Até queue.workers partições (partition_key) executam ao mesmo tempo; dentro de
+    uma partição a ordem do lote é mantida.
+    """
+    def __init__(self, handler: Handler, config: Optional[dict] = None,
+                 backend: Optional[AsyncJobQueueBackend] = None):
+        self.handler = handler
+        self._is_coro = inspect.iscoroutinefunction(handler)
+        cfg = config or {}
+        qcfg = (cfg.get("queue") or {})
+        kind = (qcfg.get("backend") or "sqlite").lower()
+        self.max_attempts = int(qcfg.get("max_attempts", 5))
+        self.batch = int(qcfg.get("tick_batch", 50))
+        self.workers = max(1, int(qcfg.get("workers", 1)))
+        self.idle_sleep = float(qcfg.get("idle_sleep_sec", 0.2))
+
+        if backend is not None:
+            self.backend = backend
+        elif kind == "redis" and AsyncRedisQueueBackend:
+            url = os.getenv((qcfg.get("redis") or {}).get("url_env", "REDIS_URL"), "")
+            self.backend = AsyncRedisQueueBackend(url=url, backoff_cap=float(qcfg.get("backoff_seconds_cap", 60)),
+                                                  lease_seconds=float(qcfg.get("lease_seconds", 30)),
+                                                  worker_id=qcfg.get("worker_id"))
+        else:
+            # redis_stream/sqlite: o mesmo backend síncrono do JobQueue, via executor
+            sync_backend = make_backend(qcfg)
+            start_retention(sync_backend, qcfg)
+            self.backend = AsyncThreadedQueueBackend(sync_backend)
+
+        self.limiter = RateLimiter(cfg.get("rate_limits") or {})
+        bpcfg = cfg.get("backpressure") or {}
+        self.bp = Backpressure(
+            high_watermark_inflight=int(bpcfg.get("high_watermark_inflight", 200)),
+            resume_threshold=int(bpcfg.get("resume_threshold", 120))
+        )
+        self._sem = asyncio.Semaphore(self.workers)
+        self._blocks = KeyBlocks(grace=float(qcfg.get("lease_seconds", 30)))
+        self._running = False
+
+    # ----------------- API -----------------
+    def _envelope(self, event: CoreEvent, run_at: float) -> JobRecord:
+        return JobRecord(
+            job_id=event.id,
+            event=EventRecord.from_model(event),
+            attempts=0,
+            max_attempts=self.max_attempts,
+            next_run_at=run_at,
+            acked=False,
+        )
+
+    async def enqueue(self, event: CoreEvent, delay: float = 0.0):
+        await self.backend.enqueue(self._envelope(event, time.time() + delay))
+
+    async def enqueue_many(self, events: List[CoreEvent], delay: float = 0.0):
+        run_at = time.time() + delay
+        await self.backend.enqueue_many([self._envelope(ev, run_at) for ev in events])
+
+    def _backoff(self, attempts: int) -> float:
+        return min(60.0, 2 ** attempts)
+
+    async def _handle(self, event: EventRecord) -> None:
+        if self._is_coro:
+            await self.handler(event)  # type: ignore[misc]
+        else:
+            await asyncio.to_thread(self.handler, event)
+
+    async def _run(self, env: JobRecord, now: float, acked: List[JobRecord], requeued: List[JobRecord]) -> bool:
+        QUEUE_WAIT.observe(max(0.0, time.time() - env.next_run_at))
+        POOL_BUSY.inc()
+        try:
+            await self._handle(env.event)
+            env.acked = True
+            acked.append(env)
+            JOBS_PROCESSED.inc()
+            return True
+        except Exception as e:
+            env.attempts += 1
+            if env.attempts >= env.max_attempts:
+                if not await self.backend.dead_letter(env, str(e)):
+                    LEASES_LOST.labels(op="dead_letter").inc()
+            else:
+                env.error = str(e)
+                env.next_run_at = now + self._backoff(env.attempts)
+                requeued.append(env)
+            JOBS_FAILED.inc()
+            return False
+        finally:
+            POOL_BUSY.dec()
+            self.bp.on_finish()
+
+    async def _run_lane(self, lane: List[JobRecord], now: float, acked: List[JobRecord], requeued: List[JobRecord]) -> int:
+        async with self._sem:
+            pk = partition_key(lane[0]) if lane else ""
+            for i, env in enumerate(lane):
+                if await self._run(env, now, acked, requeued):
+                    self._blocks.release(pk, env)
+                    continue
+                # o restante da partição espera o retry do job que falhou
+                after_lane_failure(self._blocks, pk, env, lane[i + 1:], requeued, self.bp.on_finish)
+                return i + 1
+            return len(lane)
+
+    async def tick(self) -> int:
+        """Um lote: claim, despacho concorrente por partição, ack/requeue em uma chamada cada."""
+        now = time.time()
+        due: List[JobRecord] = await self.backend.pop_due(now, self.batch)
+        processed = 0
+        acked: List[JobRecord] = []
+        requeued: List[JobRecord] = []
+        try:
+            lanes = plan_tick(due, now, requeued, limiter=self.limiter,
+                              dispatch=self.bp.on_dispatch, finish=self.bp.on_finish,
+                              blocks=self._blocks)
+            counts = await asyncio.gather(*(self._run_lane(lane, now, acked, requeued) for lane in lanes.values()))
+            processed = sum(counts)
+        finally:
+            lost_acks = await self.backend.ack_many(acked)
+            lost_requeues = await self.backend.requeue_many(requeued)
+            # lease perdido: outro worker assumiu o job (reexecução at-least-once)
+            if lost_acks:
+                LEASES_LOST.labels(op="ack").inc(len(lost_acks))
+            if lost_requeues:
+                LEASES_LOST.labels(op="requeue").inc(len(lost_requeues))
+        return processed
+
+    async def run(self):
+        """Loop de consumo; dorme idle_sleep_sec quando não há jobs vencidos."""
+        self._running = True
+        while self._running:
+            if await self.tick() == 0:
+                await asyncio.sleep(self.idle_sleep)
+
+    def stop(self):
+        self._running = False
+
+    async def close(self):
+        self.stop()
+        await self.backend.close()
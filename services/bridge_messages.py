@@ -0,0 +1,113 @@
+# services/bridge_messages.py
+from __future__ import annotations
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.persistence.journal import JournaledState
+from core.persistence.segments import SegmentArchive, roll_out, record_position, in_chain
+
+class BridgeMessageStore:
+    """
+    Mensagens de bridge persistidas no JournaledState (chave "bridge:messages"),
+    com índices hash em memória:
+      - id       -> posição na lista (dedupe O(1))
+      - tx_hash  -> posições (uma tx pode emitir várias mensagens)
+    Os índices são derivados do snapshot e reconstruídos numa passada na abertura.
+    Com `archive`, mensagens confirmadas além de `hot_confirmed` saem da janela
+    quente em segmentos de `segment_records` e continuam consultáveis por id/tx_hash.
+    """
+    KEY = "bridge:messages"
+
+    def __init__(self, snap: JournaledState, archive: Optional[SegmentArchive] = None,
+                 hot_confirmed: int = 10000, segment_records: int = 5000):
+        self.snap = snap
+        self.archive = archive
+        self.hot_confirmed = int(hot_confirmed)
+        self.segment_records = int(segment_records)
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, int] = {}
+        self._by_tx: Dict[str, List[int]] = {}
+        self._confirmed = 0
+        self.rebuild()
+
+    def _index(self, pos: int, msg: Dict[str, Any]) -> None:
+        self._by_id[msg.get("id")] = pos
+        tx = (msg.get("pointer") or {}).get("tx_hash")
+        if tx:
+            self._by_tx.setdefault(tx.lower(), []).append(pos)
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._by_tx.clear()
+            self._confirmed = 0
+            for pos, m in enumerate(self.snap.get(self.KEY, [])):
+                self._index(pos, m)
+                self._confirmed += bool(m.get("confirmed"))
+
+    def __contains__(self, msg_id: str) -> bool:
+        if msg_id in self._by_id:
+            return True
+        return self.archive is not None and self.archive.get(msg_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, msg_id: str) -> Optional[Dict[str, Any]]:
+        pos = self._by_id.get(msg_id)
+        if pos is not None:
+            return self.snap.get(self.KEY)[pos]
+        return self.archive.get(msg_id) if self.archive is not None else None
+
+    def by_tx_hash(self, tx_hash: str) -> List[Dict[str, Any]]:
+        msgs = self.snap.get(self.KEY, [])
+        hot = [msgs[p] for p in self._by_tx.get((tx_hash or "").lower(), [])]
+        if self.archive is None:
+            return hot
+        seen = {m.get("id") for m in hot}
+        return [m for m in self.archive.by_tx_hash(tx_hash) if m.get("id") not in seen] + hot
+
+    def range(self, from_pos: int, to_pos: int, chain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Mensagens (arquivo + janela quente) com bloco/slot em [from_pos, to_pos]."""
+        hot = [m for m in self.snap.get(self.KEY, [])
+               if (p := record_position(m)) is not None and from_pos <= p <= to_pos and in_chain(m, chain)]
+        if self.archive is None:
+            return hot
+        seen = {m.get("id") for m in hot}
+        return [m for m in self.archive.range(from_pos, to_pos, chain) if m.get("id") not in seen] + hot
+
+    def add(self, msg: Dict[str, Any]) -> bool:
+        """Anexa a mensagem; False se o id já existe (janela quente ou arquivo)."""
+        with self._lock:
+            if msg.get("id") in self:
+                return False
+            pos = len(self.snap.get(self.KEY, []))
+            self.snap.append(self.KEY, msg)
+            self._index(pos, msg)
+            return True
+
+    def patch(self, msg_id: str, fields: Dict[str, Any]) -> bool:
+        with self._lock:
+            pos = self._by_id.get(msg_id)
+            if pos is None:
+                return False
+            was = bool(self.snap.get(self.KEY)[pos].get("confirmed"))
+            self.snap.patch(self.KEY, pos, fields)
+            self._confirmed += bool(fields.get("confirmed", was)) - was
+            return True
+
+    def roll(self) -> List[str]:
+        """Arquiva as confirmadas mais antigas se a janela quente passou do limite."""
+        if self.archive is None:
+            return []
+        with self._lock:
+            ids = roll_out(self.snap, self.KEY, self.archive,
+                           keep=self.hot_confirmed, batch=self.segment_records,
+                           eligible=lambda m: bool(m.get("confirmed")),
+                           eligible_count=self._confirmed)
+            if ids:
+                self.rebuild()  # posições mudaram
+            return ids
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self.snap.get(self.KEY, [])))
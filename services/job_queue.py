@@ -1,28 +1,180 @@
 # services/job_queue.py
 from __future__ import annotations
+import threading
 import time
-from typing import Optional, Callable, List
-from core.schemas import JobEnvelope, CoreEvent
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Dict, List
+from core.schemas import CoreEvent
+from core.records import JobRecord, EventRecord
 from core.state_store import StateStore
 from core.events import deterministic_event_id
 from core.interfaces import JobQueueBackend
 from storage.sqlite_queue import SQLiteQueueBackend
 try:
     from storage.redis_queue import RedisQueueBackend  # opcional
+    from storage.redis_stream_queue import RedisStreamQueueBackend
 except Exception:
     RedisQueueBackend = None  # type: ignore
+    RedisStreamQueueBackend = None  # type: ignore
 
 from rate.rate_limiter import RateLimiter
 from rate.backpressure import Backpressure
-from telemetry.metrics import JOBS_PROCESSED, JOBS_FAILED
+from telemetry.metrics import JOBS_PROCESSED, JOBS_FAILED, QUEUE_WAIT, LEASES_LOST, POOL_BUSY, POOL_UTILIZATION
+
+def partition_key(env: JobRecord) -> str:
+    """
+    Chave de ordenação do worker pool: jobs com a mesma chave rodam em sequência.
+      agent_id (payload/decoded) → "agent:<id>"
+      endereço do contrato       → "<chain>:<address>"
+      caso contrário              → "<chain>:<type>" (ex.: CHAIN_HEAD por chain)
+    """
+    ev = env.event
+    p = ev.payload or {}
+    agent_id = p.get("agent_id") or (p.get("decoded") or {}).get("agent_id")
+    if agent_id:
+        return f"agent:{agent_id}"
+    address = p.get("address")
+    if address:
+        return f"{ev.source.chain}:{str(address).lower()}"
+    return f"{ev.source.chain}:{ev.type}"
+
+def make_backend(qcfg: dict) -> JobQueueBackend:
+    """Backend síncrono da seção queue do sync.yaml (também usado por tools/dlq_cli e /admin/dlq)."""
+    backend = (qcfg.get("backend") or "sqlite").lower()
+    backoff_cap = float(qcfg.get("backoff_seconds_cap", 60))
+    lease = float(qcfg.get("lease_seconds", 30))
+    worker_id = qcfg.get("worker_id")  # None → host:pid:aleatório
+    if backend == "redis_stream" and RedisStreamQueueBackend:
+        import os
+        rcfg = qcfg.get("redis") or {}
+        url = os.getenv(rcfg.get("url_env", "REDIS_URL"), "")
+        return RedisStreamQueueBackend(url=url, backoff_cap=backoff_cap, lease_seconds=lease,
+                                       worker_id=worker_id,
+                                       stream=rcfg.get("stream", "janus:stream"),
+                                       group=rcfg.get("group", "janus:workers"))  # type: ignore
+    if backend == "redis" and RedisQueueBackend:
+        import os
+        url = os.getenv((qcfg.get("redis") or {}).get("url_env", "REDIS_URL"), "")
+        return RedisQueueBackend(url=url, backoff_cap=backoff_cap,
+                                 lease_seconds=lease, worker_id=worker_id)  # type: ignore
+    scfg = qcfg.get("sqlite") or {}
+    return SQLiteQueueBackend(path=scfg.get("path", ".runtime/janus_queue.db"), backoff_cap=backoff_cap,
+                              synchronous=str(scfg.get("synchronous", "NORMAL")),
+                              lease_seconds=lease, worker_id=worker_id)
+
+def start_retention(backend: JobQueueBackend, qcfg: dict) -> None:
+    """Liga o compactor em background (queue.sqlite.retention) se o backend for SQLite."""
+    ret = (qcfg.get("sqlite") or {}).get("retention") or {}
+    if isinstance(backend, SQLiteQueueBackend) and ret.get("enabled", True):
+        backend.start_compactor(retention_seconds=float(ret.get("acked_seconds", 86400)),
+                                interval_sec=float(ret.get("interval_sec", 300)),
+                                chunk=int(ret.get("chunk", 1000)),
+                                archive=bool(ret.get("archive", False)))
+
+class KeyBlocks:
+    """
+    Partições bloqueadas por um job que falhou e aguarda retry (pk → [job_id, retry_at, nº adiados, ids]).
+    Os demais jobs da partição que saírem da fila vão para depois do retry, na ordem em que
+    saem da fila; só os adiados desde a última falha (ids) podem rodar no mesmo tick do
+    bloqueador, atrás dele. Os que não vieram no lote da falha, ou foram adiados por uma
+    falha anterior do mesmo job, são adiados de novo quando aparecerem. O bloqueio cai
+    quando o job tem sucesso ou vai para a DLQ, ou `grace` segundos depois do retry sem
+    que ele apareça (lease perdido para outro worker).
+    """
+    def __init__(self, grace: float = 30.0):
+        self.grace = grace
+        self._blocks: Dict[str, list] = {}
+
+    def block(self, pk: str, env: JobRecord) -> None:
+        self._blocks[pk] = [env.job_id, env.next_run_at, 0, set()]
+
+    def release(self, pk: str, env: JobRecord) -> None:
+        b = self._blocks.get(pk)
+        if b is not None and b[0] == env.job_id:
+            del self._blocks[pk]
+
+    def get(self, pk: str, now: float) -> Optional[list]:
+        b = self._blocks.get(pk)
+        if b is not None and now > b[1] + self.grace:
+            del self._blocks[pk]
+            return None
+        return b
+
+    def defer(self, pk: str, env: JobRecord) -> None:
+        """Reagenda `env` para logo depois do retry do job que bloqueia a partição."""
+        b = self._blocks[pk]
+        b[2] += 1
+        b[3].add(env.job_id)
+        env.next_run_at = b[1] + b[2] * 1e-3
+
+def plan_tick(due: List[JobRecord], now: float, requeued: List[JobRecord], *, limiter: RateLimiter,
+              dispatch: Callable[[], bool], finish: Callable[[], None],
+              partitioned: bool = True, blocks: Optional[KeyBlocks] = None) -> Dict[str, List[JobRecord]]:
+    """
+    Distribui o lote de um tick (JobQueue e AsyncJobQueue) em partições (lanes) na ordem do lote.
+      - sem capacidade no backpressure (dispatch() False): o restante vai para `requeued`
+      - partição bloqueada em `blocks` (job anterior esperando retry): o job é adiado para
+        depois do retry, a menos que o bloqueador esteja antes dele no lote e o job tenha
+        sido adiado pela última falha do bloqueador
+      - rate limit da chave "<chain>:<type>": o job é adiado (+0.25s) e, com `partitioned`,
+        os demais da mesma partition_key neste tick também (não passam na frente dele)
+    Sem `partitioned`, tudo cai na lane "".
+    """
+    lanes: Dict[str, List[JobRecord]] = OrderedDict()
+    deferred = set()
+    heads = set()  # partições cujo bloqueador já está numa lane deste tick
+    for i, env in enumerate(due):
+        if not dispatch():
+            requeued.extend(due[i:])
+            break
+        k = f"{env.event.source.chain}:{env.event.type}"
+        pk = partition_key(env) if partitioned else ""
+        b = blocks.get(pk, now) if blocks is not None and partitioned else None
+        if b is not None and b[0] != env.job_id and (pk not in heads or env.job_id not in b[3]):
+            blocks.defer(pk, env)
+            requeued.append(env)
+            finish()
+            continue
+        if pk in deferred or not limiter.allow(k):
+            env.next_run_at = now + 0.25  # throttle suave
+            requeued.append(env)
+            if partitioned:
+                deferred.add(pk)
+            finish()
+            continue
+        if b is not None and b[0] == env.job_id:
+            heads.add(pk)
+        lanes.setdefault(pk, []).append(env)
+    return lanes
+
+def after_lane_failure(blocks: KeyBlocks, pk: str, env: JobRecord, rest: List[JobRecord],
+                       requeued: List[JobRecord], finish: Callable[[], None]) -> None:
+    """Job da partição falhou: bloqueia a partição até o retry e adia o restante da lane."""
+    if env.attempts >= env.max_attempts:
+        blocks.release(pk, env)  # foi para a DLQ: a partição segue sem ele
+        for j, later in enumerate(rest, start=1):
+            later.next_run_at = env.next_run_at + j * 1e-3
+    else:
+        blocks.block(pk, env)
+        for later in rest:
+            blocks.defer(pk, later)
+    for later in rest:
+        requeued.append(later)
+        finish()
 
 class JobQueue:
     """
-    Orquestrador de fila com backend plugável (SQLite/Redis), rate-limit e backpressure.
+    Orquestrador de fila com backend plugável (SQLite/Redis/Redis Streams), rate-limit e backpressure.
+    Com queue.workers > 1, cada tick particiona o lote por partition_key() e executa
+    as partições em paralelo num pool de threads; dentro de uma partição a ordem do lote
+    é mantida, e uma falha adia o restante da partição para depois do retry.
+    Jobs circulam como JobRecord/EventRecord (core.records): o handler recebe um
+    EventRecord, com os mesmos atributos do CoreEvent e payload lido sob demanda.
     """
     def __init__(
         self,
-        handler: Callable[[CoreEvent], None],
+        handler: Callable[[EventRecord], None],
         state: Optional[StateStore] = None,
         config: Optional[dict] = None
     ):
@@ -30,18 +182,15 @@ class JobQueue:
         self.handler = handler
         cfg = config or {}
         qcfg = (cfg.get("queue") or {})
-        backend = (qcfg.get("backend") or "sqlite").lower()
-        backoff_cap = float(qcfg.get("backoff_seconds_cap", 60))
         self.max_attempts = int(qcfg.get("max_attempts", 5))
         self.batch = int(qcfg.get("tick_batch", 50))
+        self.workers = max(1, int(qcfg.get("workers", 1)))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="janus-job") if self.workers > 1 else None
+        self._bp_lock = threading.Lock()
+        self._blocks = KeyBlocks(grace=float(qcfg.get("lease_seconds", 30)))
 
-        if backend == "redis" and RedisQueueBackend:
-            import os
-            url = os.getenv((qcfg.get("redis") or {}).get("url_env", "REDIS_URL"), "")
-            self.backend: JobQueueBackend = RedisQueueBackend(url=url, backoff_cap=backoff_cap)  # type: ignore
-        else:
-            path = (qcfg.get("sqlite") or {}).get("path", ".runtime/janus_queue.db")
-            self.backend = SQLiteQueueBackend(path=path, backoff_cap=backoff_cap)
+        self.backend: JobQueueBackend = make_backend(qcfg)
+        start_retention(self.backend, qcfg)
 
         # Rate limiters
         self.limiter = RateLimiter(cfg.get("rate_limits") or {})
@@ -54,58 +203,117 @@ class JobQueue:
         )
 
     # ----------------- API -----------------
-    def enqueue(self, event: CoreEvent, delay: float = 0.0):
-        env = JobEnvelope(
+    def _envelope(self, event: CoreEvent, run_at: float) -> JobRecord:
+        return JobRecord(
             job_id=event.id,
-            event=event,
+            event=EventRecord.from_model(event),
             attempts=0,
             max_attempts=self.max_attempts,
-            next_run_at=time.time() + delay,
+            next_run_at=run_at,
             acked=False,
         )
-        self.backend.enqueue(env)
+
+    def enqueue(self, event: CoreEvent, delay: float = 0.0):
+        self.backend.enqueue(self._envelope(event, time.time() + delay))
+
+    def enqueue_many(self, events: List[CoreEvent], delay: float = 0.0):
+        """Enfileira vários eventos numa única transação/pipeline do backend."""
+        run_at = time.time() + delay
+        self.backend.enqueue_many([self._envelope(ev, run_at) for ev in events])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            close()
 
     def _backoff(self, attempts: int) -> float:
         return min(60.0, 2 ** attempts)
 
+    def _dispatch(self) -> bool:
+        with self._bp_lock:
+            return self.bp.on_dispatch()
+
+    def _finish(self) -> None:
+        with self._bp_lock:
+            self.bp.on_finish()
+
+    def _run(self, env: JobRecord, now: float, acked: List[JobRecord], requeued: List[JobRecord]) -> bool:
+        """Executa um job; True em sucesso. Falhas vão para requeue (backoff) ou DLQ."""
+        QUEUE_WAIT.observe(max(0.0, time.time() - env.next_run_at))
+        POOL_BUSY.inc()
+        try:
+            self.handler(env.event)
+            env.acked = True
+            acked.append(env)
+            JOBS_PROCESSED.inc()
+            return True
+        except Exception as e:
+            env.attempts += 1
+            if env.attempts >= env.max_attempts:
+                if not self.backend.dead_letter(env, str(e)):
+                    LEASES_LOST.labels(op="dead_letter").inc()
+            else:
+                env.error = str(e)
+                env.next_run_at = now + self._backoff(env.attempts)
+                requeued.append(env)
+            JOBS_FAILED.inc()
+            return False
+        finally:
+            POOL_BUSY.dec()
+            self._finish()
+
+    def _run_lane(self, lane: List[JobRecord], now: float, acked: List[JobRecord], requeued: List[JobRecord]) -> int:
+        pk = partition_key(lane[0]) if lane else ""
+        for i, env in enumerate(lane):
+            if self._run(env, now, acked, requeued):
+                self._blocks.release(pk, env)
+                continue
+            # preserva a ordem da chave: o restante só roda depois do job que falhou
+            after_lane_failure(self._blocks, pk, env, lane[i + 1:], requeued, self._finish)
+            return i + 1
+        return len(lane)
+
+    def _timed_lane(self, lane: List[JobRecord], now: float, acked: List[JobRecord], requeued: List[JobRecord]):
+        t0 = time.perf_counter()
+        n = self._run_lane(lane, now, acked, requeued)
+        return n, time.perf_counter() - t0
+
     def tick(self) -> int:
         """
         Processa até 'batch' jobs vencidos respeitando backpressure e rate limits.
+        Acks e reagendamentos do lote são gravados em uma chamada cada no backend.
         """
         now = time.time()
-        due: List[JobEnvelope] = self.backend.pop_due(now, self.batch)
+        due: List[JobRecord] = self.backend.pop_due(now, self.batch)
         processed = 0
-        for env in due:
-            if not self.bp.on_dispatch():
-                # sem capacidade – pare este tick
-                break
-
-            # Chave de rate-limit: por chain + type
-            k = f"{env.event.source.chain}:{env.event.type}"
-            if not self.limiter.allow(k):
-                # reprograma levemente (throttle suave)
-                env.next_run_at = now + 0.25
-                self.backend.requeue(env)
-                self.bp.on_finish()
-                continue
+        acked: List[JobRecord] = []
+        requeued: List[JobRecord] = []
+        try:
+            lanes = plan_tick(due, now, requeued, limiter=self.limiter, dispatch=self._dispatch,
+                              finish=self._finish, partitioned=self._pool is not None,
+                              blocks=self._blocks)
 
-            try:
-                self.handler(env.event)
-                env.acked = True
-                self.backend.ack(env)
-                JOBS_PROCESSED.inc()
-            except Exception as e:
-                env.attempts += 1
-                if env.attempts >= env.max_attempts:
-                    self.backend.dead_letter(env, str(e))
-                    JOBS_FAILED.inc()
-                else:
-                    env.error = str(e)
-                    env.next_run_at = now + self._backoff(env.attempts)
-                    self.backend.requeue(env)
-                    JOBS_FAILED.inc()
-            finally:
-                processed += 1
-                self.bp.on_finish()
+            if self._pool is None:
+                for env in lanes.get("", []):
+                    self._run(env, now, acked, requeued)
+                    processed += 1
+            else:
+                t0 = time.perf_counter()
+                futures = [self._pool.submit(self._timed_lane, lane, now, acked, requeued) for lane in lanes.values()]
+                results = [f.result() for f in futures]
+                processed = sum(n for n, _ in results)
+                wall = time.perf_counter() - t0
+                # tempo ocupado somado das partições / capacidade do pool no tick
+                POOL_UTILIZATION.set(min(1.0, sum(b for _, b in results) / (wall * self.workers)) if wall > 0 else 0.0)
+        finally:
+            lost_acks = self.backend.ack_many(acked)
+            lost_requeues = self.backend.requeue_many(requeued)
+            # lease perdido: outro worker assumiu o job (reexecução at-least-once)
+            if lost_acks:
+                LEASES_LOST.labels(op="ack").inc(len(lost_acks))
+            if lost_requeues:
+                LEASES_LOST.labels(op="requeue").inc(len(lost_requeues))
 
         return processed
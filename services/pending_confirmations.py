@@ -0,0 +1,62 @@
+# services/pending_confirmations.py
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+from typing import Dict, List, Tuple, Any, Iterable
+
+# chain -> campo do ponteiro usado para medir confirmações
+POINTER_FIELD = {
+    "base-testnet": "block_number",
+    "solana-testnet": "slot",
+}
+DEFAULT_CONFIRMATIONS = {
+    "base-testnet": 2,
+    "solana-testnet": 1,
+}
+
+class PendingConfirmations:
+    """
+    Índice de mensagens de bridge ainda não confirmadas: um min-heap por chain,
+    ordenado pelo ponteiro de origem (block_number ou slot).
+    O requisito de confirmações é aplicado na hora do pop (head >= ptr + req),
+    então mudar confirmations:<chain> não exige reconstruir o índice.
+    Um avanço de head custa O(k log n), onde k = mensagens recém-confirmadas.
+    """
+    def __init__(self):
+        self._heaps: Dict[str, List[Tuple[int, int, Any]]] = {}
+        self._seq = itertools.count()  # desempate estável (ordem de chegada)
+        self._lock = threading.Lock()
+
+    def add(self, chain: str, pointer: Dict[str, Any], ref: Any) -> bool:
+        field = POINTER_FIELD.get(chain)
+        ptr = (pointer or {}).get(field) if field else None
+        if ptr is None:
+            return False
+        with self._lock:
+            heapq.heappush(self._heaps.setdefault(chain, []), (int(ptr), next(self._seq), ref))
+        return True
+
+    def rebuild(self, items: Iterable[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Reconstrói a partir de pares (ref, mensagem), ignorando as já confirmadas."""
+        with self._lock:
+            self._heaps.clear()
+        for ref, m in items:
+            if not m.get("confirmed"):
+                self.add((m.get("src") or {}).get("chain"), m.get("pointer") or {}, ref)
+
+    def pop_confirmed(self, chain: str, head: Any, required: int) -> List[Any]:
+        """Remove e devolve as refs cujo ponteiro + required <= head."""
+        if head is None:
+            return []
+        limit = int(head) - int(required)
+        out: List[Any] = []
+        with self._lock:
+            heap = self._heaps.get(chain)
+            while heap and heap[0][0] <= limit:
+                out.append(heapq.heappop(heap)[2])
+        return out
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(h) for h in self._heaps.values())
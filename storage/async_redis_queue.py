@@ -0,0 +1,64 @@
+# storage/async_redis_queue.py
+from __future__ import annotations
+import os, socket, uuid
+from typing import List
+from redis.asyncio import Redis
+from core.interfaces import AsyncJobQueueBackend
+from core.records import JobRecord
+from storage.redis_queue import CLAIM_SCRIPT, OWNED_SCRIPT, owned_args
+
+# Mesmas chaves e scripts (claim e dono do lease) do RedisQueueBackend (janus:due / janus:job:<id> / janus:dlq):
+# os backends síncrono e assíncrono podem consumir a mesma fila ao mesmo tempo.
+
+class AsyncRedisQueueBackend(AsyncJobQueueBackend):
+    def __init__(self, url: str, backoff_cap: float = 60.0, lease_seconds: float = 30.0,
+                 worker_id: str | None = None, client: Redis | None = None):
+        self.r = client or Redis.from_url(url, decode_responses=True)
+        self.backoff_cap = backoff_cap
+        self.key_due = "janus:due"
+        self.key_dlq = "janus:dlq"
+        self.lease_seconds = float(lease_seconds)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._claim = self.r.register_script(CLAIM_SCRIPT)
+        self._owned = self.r.register_script(OWNED_SCRIPT)
+
+    async def enqueue(self, env: JobRecord) -> None:
+        await self.enqueue_many([env])
+
+    async def pop_due(self, now: float, limit: int) -> List[JobRecord]:
+        payloads = await self._claim(keys=[self.key_due], args=[now, limit, now + self.lease_seconds, self.worker_id, "janus:job:"])
+        return [JobRecord.from_json(pl) for pl in payloads]
+
+    async def requeue(self, env: JobRecord) -> bool:
+        return not await self.requeue_many([env])
+
+    async def ack(self, env: JobRecord) -> bool:
+        return not await self.ack_many([env])
+
+    async def enqueue_many(self, envs: List[JobRecord]) -> None:
+        if not envs:
+            return
+        # MULTI/EXEC: payload e agenda entram juntos; NX nos dois não mexe em job já
+        # enfileirado (nem no score de um job em lease, que outro worker pegaria antes da hora)
+        pipe = self.r.pipeline(transaction=True)
+        for env in envs:
+            pipe.hsetnx(f"janus:job:{env.job_id}", "payload", env.model_dump_json())
+        pipe.zadd(self.key_due, {env.job_id: env.next_run_at for env in envs}, nx=True)
+        await pipe.execute()
+
+    async def requeue_many(self, envs: List[JobRecord]) -> List[str]:
+        if not envs:
+            return []
+        return await self._owned(keys=[self.key_due, self.key_dlq], args=owned_args(self.worker_id, "requeue", envs))
+
+    async def ack_many(self, envs: List[JobRecord]) -> List[str]:
+        if not envs:
+            return []
+        return await self._owned(keys=[self.key_due, self.key_dlq], args=owned_args(self.worker_id, "ack", envs))
+
+    async def dead_letter(self, env: JobRecord, reason: str) -> bool:
+        return not await self._owned(keys=[self.key_due, self.key_dlq],
+                                     args=owned_args(self.worker_id, "dead", [env], reason))
+
+    async def close(self) -> None:
+        await self.r.aclose()
@@ -0,0 +1,51 @@
+# storage/async_threaded_queue.py
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from core.interfaces import AsyncJobQueueBackend, JobQueueBackend
+from core.records import JobRecord
+
+class AsyncThreadedQueueBackend(AsyncJobQueueBackend):
+    """
+    Adapta um JobQueueBackend bloqueante (SQLite, Redis Streams) ao contrato assíncrono:
+    cada chamada roda num executor dedicado e o event loop segue livre enquanto espera.
+    Com o SQLiteQueueBackend, max_workers=1 mantém uma única conexão persistente
+    (as escritas do SQLite são serializadas de qualquer forma).
+    """
+    def __init__(self, backend: JobQueueBackend, max_workers: int = 1):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="janus-queue-io")
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def enqueue(self, env: JobRecord) -> None:
+        await self._call(self.backend.enqueue, env)
+
+    async def pop_due(self, now: float, limit: int) -> List[JobRecord]:
+        return await self._call(self.backend.pop_due, now, limit)
+
+    async def requeue(self, env: JobRecord) -> bool:
+        return await self._call(self.backend.requeue, env)
+
+    async def ack(self, env: JobRecord) -> bool:
+        return await self._call(self.backend.ack, env)
+
+    async def dead_letter(self, env: JobRecord, reason: str) -> bool:
+        return await self._call(self.backend.dead_letter, env, reason)
+
+    async def enqueue_many(self, envs: List[JobRecord]) -> None:
+        await self._call(self.backend.enqueue_many, envs)
+
+    async def requeue_many(self, envs: List[JobRecord]) -> List[str]:
+        return await self._call(self.backend.requeue_many, envs)
+
+    async def ack_many(self, envs: List[JobRecord]) -> List[str]:
+        return await self._call(self.backend.ack_many, envs)
+
+    async def close(self) -> None:
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            await self._call(close)
+        self._executor.shutdown(wait=True)
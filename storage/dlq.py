@@ -0,0 +1,208 @@
+# storage/dlq.py
+from __future__ import annotations
+import json, sqlite3, threading, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from core.records import JobRecord
+
+# Leitura paginada e redrive em lote da DLQ dos backends de fila:
+#  - SQLite: tabela dlq (cursor = rowid, filtros via json_extract no payload)
+#  - Redis/Redis Streams: LIST janus:dlq (cursor = índice na lista, filtros em memória)
+# Redrive = enqueue_many no backend da fila (dedupe por job_id) e só então remoção
+# da DLQ; um crash no meio deixa a entrada nos dois lugares, nunca em nenhum.
+# Purge = só a remoção, com os mesmos filtros e lotes.
+
+Entry = Dict[str, Any]
+
+def matches(entry: Entry, reason: Optional[str] = None, chain: Optional[str] = None,
+            event_type: Optional[str] = None, job_ids: Optional[set] = None) -> bool:
+    ev = (entry.get("job") or {}).get("event") or {}
+    if reason and reason not in (entry.get("reason") or ""):
+        return False
+    if chain and (ev.get("source") or {}).get("chain") != chain:
+        return False
+    if event_type and ev.get("type") != event_type:
+        return False
+    if job_ids is not None and entry.get("job_id") not in job_ids:
+        return False
+    return True
+
+class SQLiteDeadLetters:
+    """Uma conexão por thread (como SQLiteQueueBackend): o threadpool do /admin/dlq não
+    compartilha transações entre requisições concorrentes."""
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._all: List[sqlite3.Connection] = []
+        self._all_lock = threading.Lock()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            c.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = c
+            with self._all_lock:
+                self._all.append(c)
+        return c
+
+    def page(self, after: int = 0, limit: int = 100, reason: Optional[str] = None, chain: Optional[str] = None,
+             event_type: Optional[str] = None, job_ids: Optional[set] = None) -> Tuple[List[Entry], Optional[int]]:
+        """Até `limit` entradas com rowid > after que passam no filtro; next = cursor ou None no fim."""
+        sql = "SELECT rowid, job_id, payload, attempts, reason, dead_at FROM dlq WHERE rowid>?"
+        args: List[Any] = [after]
+        if reason:
+            sql += " AND instr(reason, ?) > 0"
+            args.append(reason)
+        if chain:
+            sql += " AND json_extract(payload, '$.event.source.chain')=?"
+            args.append(chain)
+        if event_type:
+            sql += " AND json_extract(payload, '$.event.type')=?"
+            args.append(event_type)
+        if job_ids is not None:
+            sql += f" AND job_id IN ({','.join('?' * len(job_ids))})"
+            args.extend(job_ids)
+        rows = self.db.execute(sql + " ORDER BY rowid LIMIT ?", (*args, limit)).fetchall()
+        out = [{"id": rid, "job_id": jid, "job": json.loads(pl), "attempts": att, "reason": rs, "dead_at": at}
+               for rid, jid, pl, att, rs, at in rows]
+        return out, (rows[-1][0] if len(rows) == limit else None)
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM dlq").fetchone()[0]
+
+    def delete(self, entries: List[Entry]) -> None:
+        c = self.db
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.executemany("DELETE FROM dlq WHERE rowid=?", [(e["id"],) for e in entries])
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        c.execute("COMMIT")
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        with self._all_lock:
+            for c in self._all:
+                c.close()
+            self._all.clear()
+
+# Marca a entrada (se ainda for a mesma no índice) com um tombstone; flush() remove todos
+# de uma vez, então os índices das páginas seguintes não se deslocam durante o redrive.
+TOMBSTONE = "__janus_dlq_redriven__"
+MARK_SCRIPT = """
+local n = 0
+for i = 1, #ARGV, 2 do
+  local idx = tonumber(ARGV[i])
+  if redis.call('LINDEX', KEYS[1], idx) == ARGV[i + 1] then
+    redis.call('LSET', KEYS[1], idx, ARGV[#ARGV])
+    n = n + 1
+  end
+end
+return n
+"""
+
+class RedisDeadLetters:
+    def __init__(self, client, key: str = "janus:dlq"):
+        self.r = client
+        self.key = key
+        self._mark = self.r.register_script(MARK_SCRIPT)
+
+    def page(self, after: int = 0, limit: int = 100, reason: Optional[str] = None, chain: Optional[str] = None,
+             event_type: Optional[str] = None, job_ids: Optional[set] = None) -> Tuple[List[Entry], Optional[int]]:
+        """Lê blocos de `limit` índices a partir de `after`; pode devolver menos entradas se o filtro descartar."""
+        raw = self.r.lrange(self.key, after, after + limit - 1)
+        out: List[Entry] = []
+        for i, item in enumerate(raw):
+            if item == TOMBSTONE:
+                continue
+            d = json.loads(item)
+            e = {"id": after + i, "job_id": (d.get("job") or {}).get("job_id"), "job": d.get("job"),
+                 "attempts": (d.get("job") or {}).get("attempts"), "reason": d.get("reason"),
+                 "dead_at": d.get("dead_at"), "_raw": item}
+            if matches(e, reason, chain, event_type, job_ids):
+                out.append(e)
+        return out, (after + limit if len(raw) == limit else None)
+
+    def count(self) -> int:
+        return self.r.llen(self.key)
+
+    def delete(self, entries: List[Entry]) -> None:
+        if not entries:
+            return
+        args: List[Any] = []
+        for e in entries:
+            args += [e["id"], e["_raw"]]
+        self._mark(keys=[self.key], args=[*args, TOMBSTONE])
+
+    def flush(self) -> None:
+        self.r.lrem(self.key, 0, TOMBSTONE)
+
+    def close(self) -> None:
+        pass
+
+def open_dead_letters(qcfg: Dict[str, Any]):
+    """DLQ do backend configurado em queue.backend (mesma seção usada pelo JobQueue)."""
+    backend = (qcfg.get("backend") or "sqlite").lower()
+    if backend in ("redis", "redis_stream"):
+        import os
+        from redis import Redis
+        url = os.getenv((qcfg.get("redis") or {}).get("url_env", "REDIS_URL"), "")
+        return RedisDeadLetters(Redis.from_url(url, decode_responses=True))
+    return SQLiteDeadLetters((qcfg.get("sqlite") or {}).get("path", ".runtime/janus_queue.db"))
+
+def iter_entries(dlq, page_size: int = 500, **filters) -> Iterator[Entry]:
+    cursor: Optional[int] = 0
+    while cursor is not None:
+        entries, cursor = dlq.page(after=cursor, limit=page_size, **filters)
+        yield from entries
+
+def redrive(dlq, backend, *, batch: int = 500, max_items: Optional[int] = None,
+            dry_run: bool = False, **filters) -> int:
+    """
+    Devolve à fila as entradas que passam no filtro, em lotes de `batch`
+    (um enqueue_many + uma remoção por lote). Tentativas e erro são zerados.
+    """
+    total = 0
+    cursor: Optional[int] = 0
+    try:
+        while cursor is not None and (max_items is None or total < max_items):
+            entries, cursor = dlq.page(after=cursor, limit=batch, **filters)
+            if max_items is not None:
+                entries = entries[:max_items - total]
+            if not entries:
+                continue
+            if not dry_run:
+                now = time.time()
+                envs = []
+                for e in entries:
+                    env = JobRecord.from_dict(e["job"])
+                    env.attempts, env.error, env.acked, env.next_run_at = 0, None, False, now
+                    envs.append(env)
+                backend.enqueue_many(envs)
+                dlq.delete(entries)
+            total += len(entries)
+    finally:
+        if not dry_run:
+            dlq.flush()
+    return total
+
+def purge(dlq, *, batch: int = 500, max_items: Optional[int] = None, dry_run: bool = False, **filters) -> int:
+    """Apaga da DLQ (sem devolver à fila) as entradas que passam no filtro, em lotes de `batch`."""
+    total = 0
+    cursor: Optional[int] = 0
+    try:
+        while cursor is not None and (max_items is None or total < max_items):
+            entries, cursor = dlq.page(after=cursor, limit=batch, **filters)
+            if max_items is not None:
+                entries = entries[:max_items - total]
+            if entries and not dry_run:
+                dlq.delete(entries)
+            total += len(entries)
+    finally:
+        if not dry_run:
+            dlq.flush()
+    return total
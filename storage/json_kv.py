@@ -0,0 +1,86 @@
+# storage/json_kv.py
+from __future__ import annotations
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+class JSONFileKVBackend:
+    """
+    Backend legado: um único arquivo JSON reescrito a cada escrita.
+    Mantido para depuração e compatibilidade; custo O(tamanho do estado) por operação.
+    """
+    def __init__(self, path: str = ".runtime/state.json"):
+        self._path = Path(path)
+        self._lock = threading.RLock()
+        self._tx: Optional[Dict[str, Any]] = None
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._path.exists():
+            self._path.write_text("{}")
+        # data_version conta só escritas de terceiros (mesmo contrato do PRAGMA data_version)
+        self._seen_mtime = self._mtime()
+        self._foreign = 0
+
+    def _mtime(self) -> int:
+        try:
+            return self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _read(self) -> Dict[str, Any]:
+        if self._tx is not None:
+            return self._tx
+        if self._path.exists():
+            return json.loads(self._path.read_text() or "{}")
+        return {}
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        if self._tx is None:
+            self._path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+            self._seen_mtime = self._mtime()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            data = self._read()
+        return json.dumps(data[key], ensure_ascii=False) if key in data else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            data = self._read()
+            data[key] = json.loads(value)
+            self._write(data)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            data = self._read()
+            if key in data:
+                del data[key]
+                self._write(data)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        with self._lock:
+            data = self._read()
+        return iter([(k, json.dumps(v, ensure_ascii=False)) for k, v in sorted(data.items())])
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            if self._tx is not None:
+                yield
+                return
+            self._tx = self._read()
+            try:
+                yield
+            except BaseException:
+                self._tx = None
+                raise
+            data, self._tx = self._tx, None
+            self._write(data)
+
+    def data_version(self) -> int:
+        with self._lock:
+            m = self._mtime()
+            if m != self._seen_mtime:
+                self._seen_mtime, self._foreign = m, self._foreign + 1
+            return self._foreign
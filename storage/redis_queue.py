@@ -1,55 +1,125 @@
 # storage/redis_queue.py
 from __future__ import annotations
-import time, json, os
+import time, json, os, socket, uuid
 from typing import List
 from redis import Redis
 from core.interfaces import JobQueueBackend
-from core.schemas import JobEnvelope
+from core.records import JobRecord
 
 # Estrutura:
 #  - ZSET janus:due -> score=next_run_at, member=job_id
 #  - HASH janus:job:<job_id> -> payload JSON
 #  - LIST janus:dlq -> append de itens mortos (JSON)
+#
+# Claim com lease: o script move o score dos jobs vencidos para now+lease, grava
+# o dono no hash e devolve os payloads — um único round trip por lote.
+# Se o worker morrer sem ack/requeue, o job volta a vencer sozinho.
+# Ids sem hash (órfãos) saem do ZSET. As chaves janus:job:* são montadas no
+# script (fora de KEYS), o que pressupõe Redis standalone, não cluster.
+# ack/requeue/DLQ passam por OWNED_SCRIPT: só o worker gravado no claim altera o job;
+# os demais ids voltam como leases perdidos.
+
+CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local out = {}
+for _, id in ipairs(ids) do
+  local key = ARGV[5] .. id
+  local pl = redis.call('HGET', key, 'payload')
+  if pl then
+    redis.call('ZADD', KEYS[1], ARGV[3], id)
+    redis.call('HSET', key, 'worker', ARGV[4])
+    out[#out + 1] = pl
+  else
+    redis.call('ZREM', KEYS[1], id)
+  end
+end
+return out
+"""
+
+# KEYS: due, dlq | ARGV: worker, prefixo, modo (ack|requeue|dead), itens
+#   ack: id | requeue: id, payload, score | dead: id, entrada da DLQ
+OWNED_SCRIPT = """
+local worker, prefix, mode = ARGV[1], ARGV[2], ARGV[3]
+local step = 1
+if mode == 'requeue' then step = 3 elseif mode == 'dead' then step = 2 end
+local lost = {}
+for i = 4, #ARGV, step do
+  local id = ARGV[i]
+  local key = prefix .. id
+  if redis.call('HGET', key, 'worker') ~= worker then
+    lost[#lost + 1] = id
+  elseif mode == 'requeue' then
+    redis.call('HSET', key, 'payload', ARGV[i + 1])
+    redis.call('HDEL', key, 'worker')
+    redis.call('ZADD', KEYS[1], ARGV[i + 2], id)
+  else
+    if mode == 'dead' then
+      redis.call('RPUSH', KEYS[2], ARGV[i + 1])
+    end
+    redis.call('DEL', key)
+    redis.call('ZREM', KEYS[1], id)
+  end
+end
+return lost
+"""
+
+def owned_args(worker_id: str, mode: str, envs: List[JobRecord], reason: str = "") -> List[object]:
+    """ARGV do OWNED_SCRIPT (compartilhado com o AsyncRedisQueueBackend)."""
+    args: List[object] = [worker_id, "janus:job:", mode]
+    for env in envs:
+        args.append(env.job_id)
+        if mode == "requeue":
+            args += [env.model_dump_json(), env.next_run_at]
+        elif mode == "dead":
+            args.append(json.dumps({"job": env.model_dump(mode="json"), "reason": reason, "dead_at": time.time()}))
+    return args
 
 class RedisQueueBackend(JobQueueBackend):
-    def __init__(self, url: str, backoff_cap: float = 60.0):
-        self.r = Redis.from_url(url, decode_responses=True)
+    def __init__(self, url: str, backoff_cap: float = 60.0, lease_seconds: float = 30.0, worker_id: str | None = None,
+                 client: Redis | None = None):
+        self.r = client or Redis.from_url(url, decode_responses=True)
         self.backoff_cap = backoff_cap
         self.key_due = "janus:due"
         self.key_dlq = "janus:dlq"
+        self.lease_seconds = float(lease_seconds)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._claim = self.r.register_script(CLAIM_SCRIPT)
+        self._owned = self.r.register_script(OWNED_SCRIPT)
+
+    def enqueue(self, env: JobRecord) -> None:
+        self.enqueue_many([env])
+
+    def pop_due(self, now: float, limit: int) -> List[JobRecord]:
+        # claim atômico (lease); remoção definitiva na ack, devolução na requeue
+        payloads = self._claim(keys=[self.key_due], args=[now, limit, now + self.lease_seconds, self.worker_id, "janus:job:"])
+        return [JobRecord.from_json(pl) for pl in payloads]
 
-    def enqueue(self, env: JobEnvelope) -> None:
-        key = f"janus:job:{env.job_id}"
-        self.r.hsetnx(key, "payload", env.model_dump_json())
-        self.r.zadd(self.key_due, {env.job_id: env.next_run_at})
-
-    def pop_due(self, now: float, limit: int) -> List[JobEnvelope]:
-        # obtém e retorna sem remover (remoção na ack/requeue)
-        ids = self.r.zrangebyscore(self.key_due, "-inf", now, 0, limit)
-        out: List[JobEnvelope] = []
-        for jid in ids:
-            pl = self.r.hget(f"janus:job:{jid}", "payload")
-            if pl:
-                out.append(JobEnvelope.model_validate_json(pl))
-        return out
-
-    def requeue(self, env: JobEnvelope) -> None:
-        key = f"janus:job:{env.job_id}"
-        self.r.hset(key, "payload", env.model_dump_json())
-        self.r.zadd(self.key_due, {env.job_id: env.next_run_at})
-
-    def ack(self, env: JobEnvelope) -> None:
-        key = f"janus:job:{env.job_id}"
-        pipe = self.r.pipeline()
-        pipe.delete(key)
-        pipe.zrem(self.key_due, env.job_id)
+    def requeue(self, env: JobRecord) -> bool:
+        return not self.requeue_many([env])
+
+    def ack(self, env: JobRecord) -> bool:
+        return not self.ack_many([env])
+
+    def enqueue_many(self, envs: List[JobRecord]) -> None:
+        if not envs:
+            return
+        # MULTI/EXEC: payload e agenda entram juntos; NX nos dois não mexe em job já
+        # enfileirado (nem no score de um job em lease, que outro worker pegaria antes da hora)
+        pipe = self.r.pipeline(transaction=True)
+        for env in envs:
+            pipe.hsetnx(f"janus:job:{env.job_id}", "payload", env.model_dump_json())
+        pipe.zadd(self.key_due, {env.job_id: env.next_run_at for env in envs}, nx=True)
         pipe.execute()
 
-    def dead_letter(self, env: JobEnvelope, reason: str) -> None:
-        self.r.rpush(self.key_dlq, json.dumps({
-            "job": json.loads(env.model_dump_json()),
-            "reason": reason,
-            "dead_at": time.time()
-        }))
-        self.r.zrem(self.key_due, env.job_id)
-        self.r.delete(f"janus:job:{env.job_id}")
+    def requeue_many(self, envs: List[JobRecord]) -> List[str]:
+        if not envs:
+            return []
+        return self._owned(keys=[self.key_due, self.key_dlq], args=owned_args(self.worker_id, "requeue", envs))
+
+    def ack_many(self, envs: List[JobRecord]) -> List[str]:
+        if not envs:
+            return []
+        return self._owned(keys=[self.key_due, self.key_dlq], args=owned_args(self.worker_id, "ack", envs))
+
+    def dead_letter(self, env: JobRecord, reason: str) -> bool:
+        return not self._owned(keys=[self.key_due, self.key_dlq], args=owned_args(self.worker_id, "dead", [env], reason))
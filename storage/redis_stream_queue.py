@@ -0,0 +1,176 @@
+# storage/redis_stream_queue.py
+from __future__ import annotations
+import time, json, os, socket, uuid
+from typing import Dict, List
+from redis import Redis
+from redis.exceptions import ResponseError
+from core.interfaces import JobQueueBackend
+from core.records import JobRecord
+
+# Estrutura:
+#  - STREAM janus:stream (consumer group janus:workers) -> jobs prontos, campo "payload"
+#  - ZSET   janus:stream:delayed -> score=next_run_at, member=payload JSON (backoff/agendados)
+#  - HASH   janus:stream:ids -> job_id -> 1 (dedupe de enqueue enquanto o job existir)
+#  - LIST   janus:dlq -> itens mortos (mesmo formato do RedisQueueBackend)
+#
+# Cada nó é um consumer do grupo: XREADGROUP entrega cada mensagem a um único consumer,
+# a PEL registra o dono e XAUTOCLAIM recupera mensagens de consumers que morreram
+# (ociosas há mais de lease_seconds). Ack = XACK + XDEL.
+# XACK não confere o consumer: ack/requeue/DLQ passam por OWNED_SCRIPT, que só libera a
+# mensagem se ela ainda estiver na PEL deste consumer (XPENDING); depois de um XAUTOCLAIM
+# por outro nó, o antigo dono recebe o id de volta como lease perdido e não mexe em nada.
+# enqueue grava o marcador de dedupe e a mensagem/agenda na mesma MULTI/EXEC (WATCH no
+# hash de ids): um crash no meio não deixa marcador sem job.
+
+# KEYS: stream, ids, dlq, delayed | ARGV: grupo, consumer, modo (ack|requeue|dead), now, itens
+#   ack: msg_id, job_id | requeue: msg_id, job_id, payload, next_run_at | dead: msg_id, job_id, entrada
+OWNED_SCRIPT = """
+local group, consumer, mode, now = ARGV[1], ARGV[2], ARGV[3], tonumber(ARGV[4])
+local step = 2
+if mode == 'requeue' then step = 4 elseif mode == 'dead' then step = 3 end
+local lost = {}
+for i = 5, #ARGV, step do
+  local msg, job = ARGV[i], ARGV[i + 1]
+  local mine = msg ~= '' and #redis.call('XPENDING', KEYS[1], group, msg, msg, 1, consumer) > 0
+  if not mine then
+    lost[#lost + 1] = job
+  else
+    redis.call('XACK', KEYS[1], group, msg)
+    redis.call('XDEL', KEYS[1], msg)
+    if mode == 'requeue' then
+      if tonumber(ARGV[i + 3]) <= now then
+        redis.call('XADD', KEYS[1], '*', 'payload', ARGV[i + 2])
+      else
+        redis.call('ZADD', KEYS[4], ARGV[i + 3], ARGV[i + 2])
+      end
+    else
+      if mode == 'dead' then
+        redis.call('RPUSH', KEYS[3], ARGV[i + 2])
+      end
+      redis.call('HDEL', KEYS[2], job)
+    end
+  end
+end
+return lost
+"""
+
+class RedisStreamQueueBackend(JobQueueBackend):
+    def __init__(self, url: str = "", backoff_cap: float = 60.0, lease_seconds: float = 30.0,
+                 worker_id: str | None = None, stream: str = "janus:stream", group: str = "janus:workers",
+                 client: Redis | None = None):
+        self.r = client or Redis.from_url(url, decode_responses=True)
+        self.backoff_cap = backoff_cap
+        self.lease_ms = int(float(lease_seconds) * 1000)
+        self.consumer = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.key_stream = stream
+        self.key_delayed = f"{stream}:delayed"
+        self.key_ids = f"{stream}:ids"
+        self.key_dlq = "janus:dlq"
+        self.group = group
+        self._inflight: Dict[str, str] = {}  # job_id -> id da mensagem no stream
+        self._owned = self.r.register_script(OWNED_SCRIPT)
+        try:
+            self.r.xgroup_create(self.key_stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    # ----------------- internos -----------------
+    def _schedule(self, pipe, env: JobRecord, now: float) -> None:
+        payload = env.model_dump_json()
+        if env.next_run_at <= now:
+            pipe.xadd(self.key_stream, {"payload": payload})
+        else:
+            pipe.zadd(self.key_delayed, {payload: env.next_run_at})
+
+    def _promote_delayed(self, now: float, limit: int) -> None:
+        # WATCH + MULTI/EXEC: XADD e ZREM dos vencidos entram juntos (ou nada), então um
+        # crash não perde nem duplica itens; se outro nó mexer no ZSET entre a leitura e
+        # o EXEC, redis-py refaz a leitura (dois nós nunca promovem o mesmo item)
+        def promote(pipe) -> None:
+            due: List[str] = pipe.zrangebyscore(self.key_delayed, "-inf", now, start=0, num=limit)
+            if not due:
+                return
+            pipe.multi()
+            for payload in due:
+                pipe.xadd(self.key_stream, {"payload": payload})
+            pipe.zrem(self.key_delayed, *due)
+        self.r.transaction(promote, self.key_delayed)
+
+    def _decode(self, entries) -> List[JobRecord]:
+        out: List[JobRecord] = []
+        for msg_id, fields in entries or []:
+            if not fields or "payload" not in fields:
+                continue  # entrada apagada entre o claim e a leitura
+            env = JobRecord.from_json(fields["payload"])
+            self._inflight[env.job_id] = msg_id
+            out.append(env)
+        return out
+
+    def _release(self, mode: str, envs: List[JobRecord], reason: str = "") -> List[str]:
+        """OWNED_SCRIPT para `envs`; devolve os job_ids cujo lease foi perdido."""
+        args: List[object] = [self.group, self.consumer, mode, time.time()]
+        for env in envs:
+            args += [self._inflight.pop(env.job_id, ""), env.job_id]
+            if mode == "requeue":
+                args += [env.model_dump_json(), env.next_run_at]
+            elif mode == "dead":
+                args.append(json.dumps({"job": env.model_dump(mode="json"), "reason": reason, "dead_at": time.time()}))
+        return self._owned(keys=[self.key_stream, self.key_ids, self.key_dlq, self.key_delayed], args=args)
+
+    # ----------------- JobQueueBackend -----------------
+    def enqueue(self, env: JobRecord) -> None:
+        self.enqueue_many([env])
+
+    def enqueue_many(self, envs: List[JobRecord]) -> None:
+        if not envs:
+            return
+        # WATCH no hash de ids: se outro nó enfileirar/ackar no meio, redis-py refaz a leitura
+        def add(pipe) -> None:
+            known = pipe.hmget(self.key_ids, [env.job_id for env in envs])
+            seen = set()
+            fresh = []
+            for env, k in zip(envs, known):
+                if k is None and env.job_id not in seen:
+                    seen.add(env.job_id)
+                    fresh.append(env)
+            if not fresh:
+                return
+            now = time.time()
+            pipe.multi()
+            pipe.hset(self.key_ids, mapping={env.job_id: 1 for env in fresh})
+            for env in fresh:
+                self._schedule(pipe, env, now)
+        self.r.transaction(add, self.key_ids)
+
+    def pop_due(self, now: float, limit: int) -> List[JobRecord]:
+        self._promote_delayed(now, limit)
+        # 1) mensagens órfãs de consumers mortos
+        res = self.r.xautoclaim(self.key_stream, self.group, self.consumer,
+                                min_idle_time=self.lease_ms, start_id="0-0", count=limit)
+        out = self._decode(res[1] if res else [])
+        # 2) mensagens novas
+        if len(out) < limit:
+            for _stream, entries in self.r.xreadgroup(self.group, self.consumer, {self.key_stream: ">"},
+                                                      count=limit - len(out)) or []:
+                out.extend(self._decode(entries))
+        return out
+
+    def requeue(self, env: JobRecord) -> bool:
+        return not self.requeue_many([env])
+
+    def requeue_many(self, envs: List[JobRecord]) -> List[str]:
+        if not envs:
+            return []
+        return self._release("requeue", envs)
+
+    def ack(self, env: JobRecord) -> bool:
+        return not self.ack_many([env])
+
+    def ack_many(self, envs: List[JobRecord]) -> List[str]:
+        if not envs:
+            return []
+        return self._release("ack", envs)
+
+    def dead_letter(self, env: JobRecord, reason: str) -> bool:
+        return not self._release("dead", [env], reason)
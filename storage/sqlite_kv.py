@@ -0,0 +1,76 @@
+# storage/sqlite_kv.py
+from __future__ import annotations
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+class SQLiteKVBackend:
+    """
+    KV embarcado em SQLite (WAL): uma linha por chave, escrita por chave.
+    Uma conexão por instância, serializada por RLock; transações aninhadas
+    reaproveitam a transação externa.
+    """
+    def __init__(self, path: str = ".runtime/state.db", synchronous: str = "NORMAL"):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._c = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._c.execute("PRAGMA journal_mode=WAL")
+        self._c.execute(f"PRAGMA synchronous={synchronous}")
+        self._c.execute("""
+        CREATE TABLE IF NOT EXISTS kv (
+          k TEXT PRIMARY KEY,
+          v TEXT NOT NULL
+        ) WITHOUT ROWID""")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._c.execute("SELECT v FROM kv WHERE k=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._c.execute("INSERT INTO kv(k,v) VALUES(?,?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (key, value))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._c.execute("DELETE FROM kv WHERE k=?", (key,))
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        with self._lock:
+            rows = self._c.execute("SELECT k, v FROM kv ORDER BY k").fetchall()
+        return iter(rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            self._c.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield
+            except BaseException:
+                self._c.execute("ROLLBACK")
+                raise
+            else:
+                self._c.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def data_version(self) -> int:
+        # muda apenas quando OUTRA conexão commita — usado para invalidar caches
+        with self._lock:
+            return int(self._c.execute("PRAGMA data_version").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._c.close()
@@ -1,21 +1,117 @@
-# storage/sqlite_queue.py
 from __future__ import annotations
-import sqlite3, json, time
+import sqlite3, json, time, threading, os, socket, uuid
+from contextlib import contextmanager
 from typing import List
-from core.schemas import JobEnvelope, CoreEvent
+from core.schemas import CoreEvent
+from core.records import JobRecord
 from core.interfaces import JobQueueBackend
 
+# SQL fixo: o cache de statements de cada conexão (cached_statements) reaproveita o prepare
+SQL_ENQUEUE = """
+  INSERT OR IGNORE INTO jobs(job_id,payload,attempts,max_attempts,next_run_at,acked,error,created_at)
+  VALUES(?,?,?,?,?,?,?,?)
+"""
+# claim atômico: marca o lease e devolve os jobs numa única instrução
+SQL_CLAIM_DUE = """
+  UPDATE jobs SET leased_until=?, worker_id=?
+  WHERE job_id IN (
+    SELECT job_id FROM jobs
+    WHERE acked=0 AND next_run_at<=? AND (leased_until IS NULL OR leased_until<=?)
+    ORDER BY next_run_at ASC
+    LIMIT ?
+  )
+  RETURNING payload, attempts, next_run_at, error
+"""
+# requeue/ack/DLQ só valem para o dono do lease: depois que o lease vence e outro
+# worker faz o claim, a escrita atrasada do antigo dono não afeta nada (lease perdido)
+SQL_REQUEUE = """
+  UPDATE jobs SET attempts=?, next_run_at=?, error=?, leased_until=NULL, worker_id=NULL
+  WHERE job_id=? AND worker_id=? AND acked=0
+"""
+SQL_ACK = "UPDATE jobs SET acked=1, acked_at=?, leased_until=NULL WHERE job_id=? AND worker_id=? AND acked=0"
+# lease vencido sem ack/requeue = worker morreu ou travou: conta como tentativa e libera
+# a linha; sem isso um job que derruba o worker é reassumido para sempre e nunca vai à DLQ
+SQL_EXPIRE_LEASES = """
+  UPDATE jobs SET attempts=attempts+1, error='lease expirado', leased_until=NULL, worker_id=NULL
+  WHERE acked=0 AND next_run_at<=? AND leased_until<=?
+  RETURNING job_id, payload, attempts, max_attempts, next_run_at
+"""
+SQL_DLQ_INSERT = "INSERT INTO dlq(job_id,payload,attempts,reason,dead_at) VALUES(?,?,?,?,?)"
+SQL_DELETE = "DELETE FROM jobs WHERE job_id=? AND worker_id=? AND acked=0"
+SQL_PURGE = "DELETE FROM jobs WHERE job_id=?"  # retenção/leases vencidos: sem dono
+# retenção: acked antigos (acked_at NULL = ack anterior à coluna) saem em chunks
+SQL_EXPIRED = "SELECT job_id FROM jobs WHERE acked=1 AND (acked_at IS NULL OR acked_at<?) LIMIT ?"
+SQL_ARCHIVE = """
+  INSERT OR REPLACE INTO jobs_archive(job_id,payload,attempts,acked_at,created_at)
+  SELECT job_id,payload,attempts,acked_at,created_at FROM jobs WHERE job_id=?
+"""
+
 class SQLiteQueueBackend(JobQueueBackend):
-    def __init__(self, path: str, backoff_cap: float = 60.0):
+    """
+    Fila em SQLite com uma conexão persistente por thread (WAL + synchronous ajustável).
+    As conexões ficam abertas entre chamadas; close() encerra todas.
+    pop_due faz claim com lease (leased_until/worker_id): vários workers/processos
+    podem consumir a mesma fila sem pegar o mesmo job; leases vencidos voltam a ser elegíveis.
+    ack/requeue/dead_letter conferem o dono (worker_id) e informam os leases perdidos.
+    Jobs acked ficam fora do índice parcial de pendentes; compact() (ou o compactor em
+    background de start_compactor) apaga/arquiva os que passaram da retenção e devolve
+    as páginas livres com incremental_vacuum (bancos criados antes disso: ver
+    enable_incremental_vacuum).
+    """
+    def __init__(self, path: str, backoff_cap: float = 60.0, synchronous: str = "NORMAL",
+                 lease_seconds: float = 30.0, worker_id: str | None = None):
         self.path = path
         self.backoff_cap = backoff_cap
+        self.synchronous = synchronous
+        self.lease_seconds = float(lease_seconds)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._all: List[sqlite3.Connection] = []
+        self._all_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._compactor: threading.Thread | None = None
         self._ensure_schema()
 
-    def _conn(self):
-        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                check_same_thread=False, cached_statements=64)
+            if c.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is None:
+                # banco novo: auto_vacuum só pega antes da primeira tabela (e do WAL)
+                c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = c
+            with self._all_lock:
+                self._all.append(c)
+        return c
+
+    @contextmanager
+    def _tx(self):
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        else:
+            c.execute("COMMIT")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        with self._all_lock:
+            for c in self._all:
+                c.close()
+            self._all.clear()
+        self._local = threading.local()
 
     def _ensure_schema(self):
-        with self._conn() as c:
+        with self._tx() as c:
             c.execute("""
             CREATE TABLE IF NOT EXISTS jobs (
               job_id TEXT PRIMARY KEY,
@@ -35,41 +131,139 @@ class SQLiteQueueBackend(JobQueueBackend):
               reason TEXT,
               dead_at REAL
             )""")
-            c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_next ON jobs(next_run_at)")
-
-    def enqueue(self, env: JobEnvelope) -> None:
-        with self._conn() as c:
             c.execute("""
-              INSERT OR IGNORE INTO jobs(job_id,payload,attempts,max_attempts,next_run_at,acked,error,created_at)
-              VALUES(?,?,?,?,?,?,?,?)
-            """, (env.job_id, env.model_dump_json(), env.attempts, env.max_attempts, env.next_run_at, int(env.acked), env.error, time.time()))
-
-    def pop_due(self, now: float, limit: int) -> List[JobEnvelope]:
-        out: List[JobEnvelope] = []
-        with self._conn() as c:
-            rows = c.execute("""
-              SELECT payload FROM jobs
-              WHERE acked=0 AND next_run_at<=?
-              ORDER BY next_run_at ASC
-              LIMIT ?
-            """, (now, limit)).fetchall()
-        for (payload_json,) in rows:
-            out.append(JobEnvelope.model_validate_json(payload_json))
+            CREATE TABLE IF NOT EXISTS jobs_archive (
+              job_id TEXT PRIMARY KEY,
+              payload TEXT NOT NULL,
+              attempts INTEGER,
+              acked_at REAL,
+              created_at REAL
+            )""")
+            # colunas de lease/retenção (bancos criados antes do claim atômico)
+            cols = {row[1] for row in c.execute("PRAGMA table_info(jobs)")}
+            if "leased_until" not in cols:
+                c.execute("ALTER TABLE jobs ADD COLUMN leased_until REAL")
+            if "worker_id" not in cols:
+                c.execute("ALTER TABLE jobs ADD COLUMN worker_id TEXT")
+            if "acked_at" not in cols:
+                c.execute("ALTER TABLE jobs ADD COLUMN acked_at REAL")
+            # índices parciais: pop_due só enxerga pendentes; a retenção só varre acked
+            c.execute("DROP INDEX IF EXISTS idx_jobs_next")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs(next_run_at) WHERE acked=0")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_acked ON jobs(acked_at) WHERE acked=1")
+
+    def enqueue(self, env: JobRecord) -> None:
+        self._conn().execute(SQL_ENQUEUE, (env.job_id, env.model_dump_json(), env.attempts, env.max_attempts,
+                                           env.next_run_at, int(env.acked), env.error, time.time()))
+
+    def pop_due(self, now: float, limit: int) -> List[JobRecord]:
+        with self._tx() as c:
+            for job_id, payload_json, attempts, max_attempts, next_run_at in c.execute(SQL_EXPIRE_LEASES, (now, now)).fetchall():
+                if attempts >= max_attempts:
+                    env = JobRecord.from_json(payload_json)
+                    env.attempts, env.next_run_at, env.error = attempts, next_run_at, "lease expirado"
+                    c.execute(SQL_PURGE, (job_id,))
+                    c.execute(SQL_DLQ_INSERT, (job_id, env.model_dump_json(), attempts, env.error, now))
+            rows = c.execute(SQL_CLAIM_DUE, (now + self.lease_seconds, self.worker_id, now, now, limit)).fetchall()
+        out: List[JobRecord] = []
+        # RETURNING não garante ordem; tentativas/erro atuais vivem nas colunas, não no payload
+        for payload_json, attempts, next_run_at, error in sorted(rows, key=lambda r: r[2]):
+            env = JobRecord.from_json(payload_json)
+            env.attempts, env.next_run_at, env.error = attempts, next_run_at, error
+            out.append(env)
         return out
 
-    def requeue(self, env: JobEnvelope) -> None:
-        with self._conn() as c:
-            c.execute("""
-              UPDATE jobs SET attempts=?, next_run_at=?, error=?
-              WHERE job_id=?
-            """, (env.attempts, env.next_run_at, env.error, env.job_id))
-
-    def ack(self, env: JobEnvelope) -> None:
-        with self._conn() as c:
-            c.execute("UPDATE jobs SET acked=1 WHERE job_id=?", (env.job_id,))
-
-    def dead_letter(self, env: JobEnvelope, reason: str) -> None:
-        with self._conn() as c:
-            c.execute("INSERT INTO dlq(job_id,payload,attempts,reason,dead_at) VALUES(?,?,?,?,?)",
-                      (env.job_id, env.model_dump_json(), env.attempts, reason, time.time()))
-            c.execute("DELETE FROM jobs WHERE job_id=?", (env.job_id,))
+    def requeue(self, env: JobRecord) -> bool:
+        return not self.requeue_many([env])
+
+    def ack(self, env: JobRecord) -> bool:
+        return not self.ack_many([env])
+
+    def enqueue_many(self, envs: List[JobRecord]) -> None:
+        if not envs:
+            return
+        now = time.time()
+        rows = [(e.job_id, e.model_dump_json(), e.attempts, e.max_attempts, e.next_run_at, int(e.acked), e.error, now)
+                for e in envs]
+        with self._tx() as c:
+            c.executemany(SQL_ENQUEUE, rows)
+
+    def requeue_many(self, envs: List[JobRecord]) -> List[str]:
+        """Devolve os job_id cujo lease foi perdido (nada gravado para eles)."""
+        if not envs:
+            return []
+        w = self.worker_id
+        with self._tx() as c:
+            return [e.job_id for e in envs
+                    if c.execute(SQL_REQUEUE, (e.attempts, e.next_run_at, e.error, e.job_id, w)).rowcount == 0]
+
+    def ack_many(self, envs: List[JobRecord]) -> List[str]:
+        """Devolve os job_id cujo lease foi perdido (nada gravado para eles)."""
+        if not envs:
+            return []
+        w = self.worker_id
+        with self._tx() as c:
+            now = time.time()
+            return [e.job_id for e in envs if c.execute(SQL_ACK, (now, e.job_id, w)).rowcount == 0]
+
+    def dead_letter(self, env: JobRecord, reason: str) -> bool:
+        """False se o lease foi perdido (o job segue com o novo dono, fora da DLQ)."""
+        with self._tx() as c:
+            if c.execute(SQL_DELETE, (env.job_id, self.worker_id)).rowcount == 0:
+                return False
+            c.execute(SQL_DLQ_INSERT, (env.job_id, env.model_dump_json(), env.attempts, reason, time.time()))
+            return True
+
+    # ----------------- retenção -----------------
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Converte um banco antigo para auto_vacuum=INCREMENTAL (bancos novos já nascem assim).
+        Roda um VACUUM completo (reescreve o arquivo com o lock de escrita): passo de
+        manutenção explícito (tools/queue_cli.py compact --enable-incremental-vacuum).
+        Devolve False se o banco já estava convertido.
+        """
+        c = self._conn()
+        if c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        c.execute("VACUUM")
+        return True
+
+    def compact(self, retention_seconds: float, chunk: int = 1000, archive: bool = False,
+                vacuum_pages: int = 2000) -> int:
+        """
+        Remove (ou move para jobs_archive) jobs acked há mais de retention_seconds,
+        em transações de até `chunk` linhas para não segurar o lock de escrita.
+        Devolve o total removido.
+        """
+        cutoff = time.time() - float(retention_seconds)
+        total = 0
+        while not self._stop.is_set():
+            with self._tx() as c:
+                ids = [(r[0],) for r in c.execute(SQL_EXPIRED, (cutoff, chunk)).fetchall()]
+                if archive:
+                    c.executemany(SQL_ARCHIVE, ids)
+                c.executemany(SQL_PURGE, ids)
+            total += len(ids)
+            if len(ids) < chunk:
+                break
+        if total:
+            # executescript roda o pragma até o fim (execute() libera só uma página por step)
+            self._conn().executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        return total
+
+    def start_compactor(self, retention_seconds: float, interval_sec: float = 300.0,
+                        chunk: int = 1000, archive: bool = False) -> None:
+        """Roda compact() periodicamente numa thread daemon até close()."""
+        if self._compactor is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval_sec):
+                try:
+                    self.compact(retention_seconds, chunk=chunk, archive=archive)
+                except sqlite3.Error:
+                    pass  # banco ocupado/fechando: tenta no próximo ciclo
+
+        self._compactor = threading.Thread(target=loop, name="janus-queue-compactor", daemon=True)
+        self._compactor.start()
@@ -8,9 +8,14 @@ METRICS_STARTED = False
 # Contadores e histogramas
 EVENTS_TOTAL = Counter("janus_events_total", "Eventos recebidos", ["chain", "type"])
 EVENTS_DECODE_ERRORS = Counter("janus_decode_errors_total", "Falhas de decodificação", ["chain", "where"])
+RPC_GET_LOGS = Counter("janus_rpc_get_logs_total", "Chamadas eth_getLogs", ["chain", "mode"])  # mode: single|coalesced|split
 JOBS_PROCESSED = Counter("janus_jobs_processed_total", "Jobs processados")
 JOBS_FAILED = Counter("janus_jobs_failed_total", "Jobs falhados")
 APPLY_LATENCY = Histogram("janus_apply_event_seconds", "Latência do apply_event")
+QUEUE_WAIT = Histogram("janus_queue_wait_seconds", "Atraso entre next_run_at e o início do handler")
+LEASES_LOST = Counter("janus_queue_leases_lost_total", "ack/requeue/DLQ recusados: lease já era de outro worker", ["op"])
+POOL_BUSY = Gauge("janus_worker_pool_busy", "Workers do JobQueue executando handlers")
+POOL_UTILIZATION = Gauge("janus_worker_pool_utilization", "Fração de workers ocupados no último tick (0-1)")
 CHAIN_HEAD_GAUGE = Gauge("janus_chain_head", "Head por cadeia", ["chain", "unit"])  # unit: block|slot
 READY_GAUGE = Gauge("janus_ready", "Sinalização de prontidão (0/1)")
 
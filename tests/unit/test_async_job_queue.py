@@ -0,0 +1,60 @@
+import asyncio
+import time
+from core.schemas import ChainPointer, CoreEvent
+from services.async_job_queue import AsyncJobQueue
+from storage.async_threaded_queue import AsyncThreadedQueueBackend
+from storage.sqlite_queue import SQLiteQueueBackend
+
+def _ev(i: int, agent: str) -> CoreEvent:
+    return CoreEvent(id=f"{agent}{i}", type="AGENT_SIGNAL", payload={"agent_id": agent},
+                     source=ChainPointer(chain="base-testnet", block_number=i), observed_at=0.0)
+
+def _config(tmp_path, workers: int = 4) -> dict:
+    return {"queue": {"workers": workers, "max_attempts": 2,
+                      "sqlite": {"path": str(tmp_path / "queue.db"), "retention": {"enabled": False}}}}
+
+def test_sqlite_backend_comes_from_make_backend(tmp_path):
+    async def main():
+        q = AsyncJobQueue(lambda ev: None, config=_config(tmp_path))
+        assert isinstance(q.backend, AsyncThreadedQueueBackend)
+        assert isinstance(q.backend.backend, SQLiteQueueBackend)
+        await q.close()
+    asyncio.run(main())
+
+def test_async_tick_orders_per_key_and_dead_letters(tmp_path):
+    calls = []
+    async def handler(ev):
+        calls.append(ev.id)
+        if ev.id == "x1":
+            raise RuntimeError("sempre falha")
+        await asyncio.sleep(0)
+
+    async def main():
+        q = AsyncJobQueue(handler, config=_config(tmp_path))
+        q._backoff = lambda attempts: 0.0
+        await q.enqueue_many([_ev(1, "x"), _ev(2, "x"), _ev(1, "y")])
+        assert await q.tick() == 2                      # x1 falha, x2 espera; y1 roda
+        assert sorted(calls) == ["x1", "y1"]
+        time.sleep(0.01)
+        await q.tick()                                  # x1 esgota as tentativas → DLQ; x2 adiado
+        time.sleep(0.01)
+        await q.tick()
+        assert calls[2:] == ["x1", "x2"]
+        assert await q.backend.pop_due(time.time() + 3600, 10) == []
+        await q.close()
+    asyncio.run(main())
+
+def test_async_lanes_run_concurrently(tmp_path):
+    async def main():
+        started = asyncio.Event()
+        waiting = []
+        async def handler(ev):
+            waiting.append(ev.id)
+            if len(waiting) == 2:
+                started.set()
+            await asyncio.wait_for(started.wait(), 2)  # só termina se as duas partições rodarem juntas
+        q = AsyncJobQueue(handler, config=_config(tmp_path, workers=2))
+        await q.enqueue_many([_ev(1, "x"), _ev(1, "y")])
+        assert await q.tick() == 2
+        await q.close()
+    asyncio.run(main())
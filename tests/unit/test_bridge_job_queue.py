@@ -0,0 +1,24 @@
+from bridge.job_queue import JobQueue
+from core.persistence.journal import JournaledState
+from core.schemas import ChainPointer, CoreEvent, JobEnvelope
+from core.state_store import StateStore
+
+def _job(i: int) -> dict:
+    ev = CoreEvent(id=f"ev{i}", type="TRANSFER", payload={"n": i},
+                   source=ChainPointer(chain="base-testnet", block_number=i), observed_at=0.0)
+    return JobEnvelope(job_id=ev.id, event=ev, next_run_at=0.0).model_dump(mode="json")
+
+def test_legacy_migration_is_not_repeated_after_crash(tmp_path):
+    state = StateStore(str(tmp_path / "state.db"))
+    legacy = {JobQueue.KEY: [{"job": _job(1)}], JobQueue.DLQ_KEY: [{"job": _job(2), "dead_at": 0.0, "reason": "x"}]}
+    state.mset(legacy)
+    q = JobQueue(state=state, journal=JournaledState(str(tmp_path / "heap.json")))
+    assert len(q) == 1 and len(q.dead()) == 1
+    assert state.get(JobQueue.KEY) is None and state.get(JobQueue.DLQ_KEY) is None
+    q.close()
+
+    state.mset(legacy)                          # crash entre o checkpoint e a remoção das chaves antigas
+    q = JobQueue(state=state, journal=JournaledState(str(tmp_path / "heap.json")))
+    assert len(q) == 1 and [d["job"]["job_id"] for d in q.dead()] == ["ev2"]
+    assert state.get(JobQueue.KEY) is None and state.get(JobQueue.DLQ_KEY) is None
+    q.close()
@@ -0,0 +1,37 @@
+from core.persistence.journal import JournaledState
+from core.persistence.segments import SegmentArchive
+from services.bridge_messages import BridgeMessageStore
+
+def _msg(i: int, tx: str = "0xAA") -> dict:
+    return {"id": f"m{i}", "src": {"chain": "base-testnet", "block_number": i},
+            "pointer": {"block_number": i, "tx_hash": tx}, "confirmed": False}
+
+def test_upsert_dedupe_and_tx_index(tmp_path):
+    snap = JournaledState(str(tmp_path / "state.json"))
+    store = BridgeMessageStore(snap)
+    assert store.add(_msg(1)) and store.add(_msg(2)) and store.add(_msg(3, tx="0xbb"))
+    assert not store.add(_msg(1))
+    assert len(store) == 3 and "m2" in store and "m9" not in store
+    assert [m["id"] for m in store.by_tx_hash("0xaa")] == ["m1", "m2"]
+    assert not store.patch("m9", {"confirmed": True})
+
+def test_status_transitions_survive_reopen_and_roll(tmp_path):
+    path = str(tmp_path / "state.json")
+    archive = SegmentArchive(str(tmp_path / "archive"), "bridge_messages")
+    snap = JournaledState(path)
+    store = BridgeMessageStore(snap, archive=archive, hot_confirmed=1, segment_records=2)
+    for i in range(1, 5):
+        store.add(_msg(i))
+    store.patch("m2", {"confirmed": True})
+    store.patch("m2", {"confirmed": False})  # volta a pendente: não conta como confirmada
+    for i in (1, 2, 3):
+        store.patch(f"m{i}", {"confirmed": True, "confirmed_at": 1.0})
+    assert store.roll() == ["m1", "m2"]
+    assert [m["id"] for m in store] == ["m3", "m4"]
+    assert store.get("m1")["confirmed"] and not store.add(_msg(1))  # dedupe também no arquivo
+    assert store.patch("m4", {"confirmed": True}) and store.get("m4")["confirmed"]
+    snap.close()
+
+    again = BridgeMessageStore(JournaledState(path), archive=archive, hot_confirmed=1, segment_records=2)
+    assert [m["id"] for m in again.range(1, 4)] == ["m1", "m2", "m3", "m4"]
+    assert again.get("m3")["confirmed_at"] == 1.0
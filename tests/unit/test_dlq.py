@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.records import EventRecord, JobRecord, PointerRecord
+from storage.dlq import SQLiteDeadLetters, iter_entries, purge, redrive
+from storage.sqlite_queue import SQLiteQueueBackend
+
+def _job(i: int, chain: str) -> JobRecord:
+    ev = EventRecord(f"ev{i}", "TRANSFER", PointerRecord(chain, block_number=i), 0.0, payload={"n": i})
+    return JobRecord(ev.id, ev, attempts=5, next_run_at=0.0)
+
+def _setup(tmp_path):
+    path = str(tmp_path / "queue.db")
+    backend = SQLiteQueueBackend(path)
+    backend.enqueue_many([_job(i, "base-testnet" if i % 2 else "solana-testnet") for i in range(6)])
+    for job in backend.pop_due(time.time(), 6):
+        assert backend.dead_letter(job, "timeout" if job.job_id < "ev4" else "bad payload")
+    return backend, SQLiteDeadLetters(path)
+
+def test_list_pages_with_filters(tmp_path):
+    backend, dlq = _setup(tmp_path)
+    page, cursor = dlq.page(limit=4)
+    assert [e["job_id"] for e in page] == ["ev0", "ev1", "ev2", "ev3"] and cursor is not None
+    assert [e["job_id"] for e in iter_entries(dlq, page_size=2, chain="base-testnet")] == ["ev1", "ev3", "ev5"]
+    assert [e["job_id"] for e in iter_entries(dlq, reason="payload")] == ["ev4", "ev5"]
+    backend.close()
+    dlq.close()
+
+def test_redrive_requeues_with_reset_attempts(tmp_path):
+    backend, dlq = _setup(tmp_path)
+    assert redrive(dlq, backend, batch=1, chain="base-testnet", dry_run=True) == 3 and dlq.count() == 6
+    assert redrive(dlq, backend, batch=1, chain="base-testnet", max_items=2) == 2
+    assert dlq.count() == 4
+    jobs = backend.pop_due(time.time() + 1, 10)
+    assert [(j.job_id, j.attempts, j.error) for j in jobs] == [("ev1", 0, None), ("ev3", 0, None)]
+    assert jobs[0].event.payload == {"n": 1}
+    backend.close()
+    dlq.close()
+
+def test_purge_deletes_only_matching(tmp_path):
+    backend, dlq = _setup(tmp_path)
+    assert purge(dlq, batch=2, reason="timeout", dry_run=True) == 4 and dlq.count() == 6
+    assert purge(dlq, batch=2, reason="timeout") == 4
+    assert [e["job_id"] for e in iter_entries(dlq)] == ["ev4", "ev5"]
+    assert backend.pop_due(time.time() + 1, 10) == []
+    backend.close()
+    dlq.close()
+
+def test_shared_dlq_isolates_transactions_per_thread(tmp_path):
+    backend, dlq = _setup(tmp_path)            # uma instância, como no /admin/dlq
+    dlq.db.execute("BEGIN")                    # requisição em andamento nesta thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(purge, dlq, batch=2, reason="timeout").result() == 4
+    dlq.db.execute("ROLLBACK")
+    assert dlq.count() == 2
+    backend.close()
+    dlq.close()
@@ -0,0 +1,20 @@
+from core.events import deterministic_event_id, canonical_json
+
+# vetores fixos: mudar qualquer um destes quebra a idempotência de eventos já gravados
+POINTER_ID = "a619a34ebf7c07a8e1138d342ac94f4a9e984e5cf5856f1552613541e6cb0e4a"
+PAYLOAD_ID = "54040865378d0e49ec4d020131c4dd059fe67519c343ae46cbe0ea3d645196bf"
+HEAD_ID = "35ed4581dd5fac5b6d03b02a827a388a3a316f726f814c920fbc24983c93e764"
+
+def test_pointer_id_ignores_payload_and_hash_encoding():
+    assert deterministic_event_id({"chain": "base-testnet", "tx_hash": "0xABCDEF", "log_index": 3}, {"x": 1}) == POINTER_ID
+    assert deterministic_event_id({"chain": "base-testnet", "tx_hash": bytes.fromhex("abcdef"), "log_index": 3},
+                                  {"decoded": {"y": 2}}) == POINTER_ID
+
+def test_payload_id_is_canonical_for_nested_dicts_and_bytes():
+    src = {"chain": "solana-testnet", "tx_hash": "5VERv8NMvzbJMEkV", "slot": 123}
+    assert deterministic_event_id(src, {"b": {"z": 1, "a": [1, 2]}, "a": b"\x01"}) == PAYLOAD_ID
+    assert deterministic_event_id(src, {"a": "0x01", "b": {"a": [1, 2], "z": 1}}) == PAYLOAD_ID
+    assert deterministic_event_id({"chain": "base-testnet", "block_number": 10}, {"block_number": 10}) == HEAD_ID
+
+def test_canonical_json_is_compact_and_sorted():
+    assert canonical_json({"b": 1, "a": {"d": b"\xff", "c": None}}) == b'{"a":{"c":null,"d":"0xff"},"b":1}'
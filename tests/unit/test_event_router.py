@@ -0,0 +1,49 @@
+import pytest
+from bridge.event_router import EventRouter
+from bridge.historical.evm_scanner import EVMHistoricalScanner
+
+def _raw(i: int, **over) -> dict:
+    raw = {"chain": "base-testnet", "block_number": 10, "tx_hash": f"0x{i:02x}", "log_index": i,
+           "type": "BRIDGE_MESSAGE", "payload": {"n": i}}
+    raw.update(over)
+    return raw
+
+def test_route_many_drops_invalid_item_and_keeps_page():
+    batches, errors = [], []
+    router = EventRouter(lambda ev: None, batch_handler=batches.append)
+    page = [_raw(0), _raw(1, type="NOT_A_TYPE"), _raw(2)]
+    events = router.route_many(page)
+    assert [e.payload["n"] for e in events] == [0, 2]
+    assert [[e.id for e in b] for b in batches] == [[e.id for e in events]]
+    assert events[0].id == router._normalize(_raw(0)).id
+
+    bad = {"block_number": 1, "type": "BRIDGE_MESSAGE"}  # sem chain
+    assert [e.payload["n"] for e in router.normalize_many([bad, _raw(3)], errors)] == [3]
+    assert errors[0][0] is bad and isinstance(errors[0][1], KeyError)
+
+class _Provider:
+    def __init__(self, logs):
+        self.logs = logs
+
+    def get_logs(self, address, topics, from_block, to_block):
+        return [l for l in self.logs if from_block <= l["blockNumber"] <= to_block]
+
+def _log(bn: int, idx: int) -> dict:
+    return {"address": "0xaa", "topics": [], "data": "0x", "blockNumber": bn,
+            "transactionHash": f"0x{bn:02x}{idx:02x}", "logIndex": idx}
+
+def test_historical_scanner_keeps_checkpoint_when_delivery_fails():
+    cps, pages = {}, []
+    def emit_many(page):
+        pages.append([r["log_index"] for r in page])
+        if len(pages) == 1:
+            raise RuntimeError("fila indisponível")
+    scanner = EVMHistoricalScanner(
+        provider=_Provider([_log(1, 0), _log(1, 1), _log(3, 0)]), emit=lambda raw: None, decoder=None,
+        per_contract_cp_get=cps.get, per_contract_cp_set=cps.__setitem__,
+        page_blocks=2, emit_many=emit_many)
+    with pytest.raises(RuntimeError):
+        scanner.scan_range_for_contract("0xaa", [], 1, 4)
+    assert pages == [[0, 1]] and cps == {}  # a página não entregue será reescaneada
+    scanner.scan_range_for_contract("0xaa", [], 1, 4)
+    assert pages == [[0, 1], [0, 1], [0]] and cps == {"0xaa": 4}
@@ -3,6 +3,7 @@ import json
 import pytest
 from bridge.decoders.evm_abi import EVMAbiDecoder
 from web3 import Web3
+from eth_abi import encode
 
 @pytest.fixture
 def simple_abi(tmp_path):
@@ -29,9 +30,9 @@ def test_decoder_recognizes_event(simple_abi):
     log = {
         "address": "0x0000000000000000000000000000000000000000",
         "topics": [topic0,
-                   Web3.to_bytes(hexstr="0x0000000000000000000000000000000000000001"),
-                   Web3.to_bytes(hexstr="0x0000000000000000000000000000000000000002")],
-        "data": Web3.to_hex(Web3.to_bytes(123))
+                   encode(["address"], ["0x0000000000000000000000000000000000000001"]),
+                   encode(["address"], ["0x0000000000000000000000000000000000000002"])],
+        "data": Web3.to_hex(encode(["uint256"], [123]))
     }
     decoded = decoder.decode(log)
     assert decoded is not None
@@ -39,3 +40,51 @@ def test_decoder_recognizes_event(simple_abi):
     assert decoded["args"]["from"] == "0x0000000000000000000000000000000000000001"
     assert decoded["args"]["to"]   == "0x0000000000000000000000000000000000000002"
     assert int(decoded["args"]["value"]) == 123
+
+def test_decode_many_matches_per_log(simple_abi):
+    decoder = EVMAbiDecoder(abi_files=[simple_abi])
+    topic0 = Web3.keccak(text="Transfer(address,address,uint256)").hex()
+    logs = [{
+        "address": "0x0000000000000000000000000000000000000000",
+        "topics": [topic0,
+                   encode(["address"], ["0x%040x" % (i + 1)]),
+                   encode(["address"], ["0x%040x" % (i + 2)])],
+        "data": Web3.to_hex(encode(["uint256"], [i * 10 ** 30 if i % 2 else i]))
+    } for i in range(40)]
+    logs[3]["data"] = "0x" + "01" * 32 + "00" * 32  # tamanho inesperado → caminho por log
+    logs[4]["data"] = "0x"                           # sem dados → erro do eth_abi
+    out = decoder.decode_many(logs)
+    assert isinstance(out[4], Exception)
+    assert [d for i, d in enumerate(out) if i != 4] == [decoder.decode(lg) for i, lg in enumerate(logs) if i != 4]
+
+def test_address_scoped_abi_and_cache(simple_abi, tmp_path):
+    # mesma assinatura Transfer, mas com value indexado (ex.: ERC-721 tokenId)
+    nft = tmp_path / "Nft.json"
+    nft.write_text(json.dumps([{"anonymous": False, "name": "Transfer", "type": "event", "inputs": [
+        {"indexed": True, "name": "from", "type": "address"},
+        {"indexed": True, "name": "to", "type": "address"},
+        {"indexed": True, "name": "tokenId", "type": "uint256"}]}]))
+    nft_addr = "0x00000000000000000000000000000000000000AA"
+    cache = tmp_path / "abi_cache.json"
+    topic0 = Web3.keccak(text="Transfer(address,address,uint256)").hex()
+    frm, to = encode(["address"], ["0x" + "00" * 19 + "01"]), encode(["address"], ["0x" + "00" * 19 + "02"])
+    for _ in range(2):  # 2ª instância carrega do cache
+        decoder = EVMAbiDecoder(abi_files=[simple_abi], contracts=[{"address": nft_addr, "abi_files": [str(nft)]}],
+                                cache_path=str(cache))
+        token = decoder.decode({"address": "0x" + "bb" * 20, "topics": [topic0, frm, to],
+                                "data": Web3.to_hex(encode(["uint256"], [5]))})
+        nft_log = decoder.decode({"address": nft_addr.lower(), "topics": [topic0, frm, to, encode(["uint256"], [7])],
+                                  "data": "0x"})
+        assert token["args"]["value"] == 5
+        assert nft_log["args"]["tokenId"] == 7
+    assert len(json.loads(cache.read_text())["abis"]) == 2
+
+def test_cache_merges_abis_from_other_instances(simple_abi, tmp_path):
+    other = tmp_path / "Other.json"
+    other.write_text(json.dumps([{"anonymous": False, "name": "Ping", "type": "event",
+                                  "inputs": [{"indexed": False, "name": "n", "type": "uint256"}]}]))
+    cache = tmp_path / "abi_cache.json"
+    EVMAbiDecoder(abi_files=[simple_abi], cache_path=str(cache))
+    EVMAbiDecoder(abi_files=[str(other)], cache_path=str(cache))  # não apaga o ABI do primeiro
+    assert len(json.loads(cache.read_text())["abis"]) == 2
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
@@ -0,0 +1,76 @@
+import threading
+import time
+from core.schemas import ChainPointer, CoreEvent
+from core.state_store import StateStore
+from services.job_queue import JobQueue
+
+def _ev(i: int, agent: str, type: str = "AGENT_SIGNAL") -> CoreEvent:
+    return CoreEvent(id=f"{agent}{i}", type=type, payload={"agent_id": agent},
+                     source=ChainPointer(chain="base-testnet", block_number=i), observed_at=0.0)
+
+def _queue(tmp_path, handler, workers: int = 4, rate_limits=None, batch: int = 50) -> JobQueue:
+    cfg = {"queue": {"workers": workers, "tick_batch": batch,
+                     "sqlite": {"path": str(tmp_path / "queue.db"), "retention": {"enabled": False}}},
+           "rate_limits": rate_limits or {}}
+    q = JobQueue(handler, state=StateStore(str(tmp_path / "state.db")), config=cfg)
+    q._backoff = lambda attempts: 0.0  # retry imediato: o teste controla os ticks
+    return q
+
+def _drain(q: JobQueue, ticks: int = 5):
+    for _ in range(ticks):
+        time.sleep(0.01)  # o restante da partição vence alguns ms depois do retry
+        q.tick()
+
+def test_failure_defers_rest_of_key_across_ticks(tmp_path):
+    calls, lock, failures = [], threading.Lock(), {"x1": 2}
+    def handler(ev):
+        with lock:
+            calls.append(ev.id)
+            if failures.get(ev.id):
+                failures[ev.id] -= 1
+                raise RuntimeError("falha transitória")
+    q = _queue(tmp_path, handler)
+    q.enqueue_many([_ev(1, "x"), _ev(2, "x"), _ev(3, "x"), _ev(1, "y"), _ev(2, "y")])
+    q.tick()
+    assert sorted(calls) == ["x1", "y1", "y2"]           # x2/x3 esperam o retry de x1
+    q.tick()
+    assert [c for c in calls if c.startswith("x")] == ["x1", "x1"]
+    _drain(q)
+    assert [c for c in calls if c.startswith("x")] == ["x1", "x1", "x1", "x2", "x3"]
+    assert [c for c in calls if c.startswith("y")] == ["y1", "y2"]
+    q.close()
+
+def test_failure_blocks_key_jobs_outside_the_batch(tmp_path):
+    calls, failures = [], {"x1": 1}
+    def handler(ev):
+        calls.append(ev.id)
+        if failures.get(ev.id):
+            failures[ev.id] -= 1
+            raise RuntimeError("falha transitória")
+    q = _queue(tmp_path, handler, batch=2)
+    q.enqueue_many([_ev(1, "x"), _ev(2, "x"), _ev(3, "x")])
+    q.tick()  # lote [x1, x2]: x1 falha, x2 adiado; x3 ficou de fora do lote
+    _drain(q)
+    assert calls == ["x1", "x1", "x2", "x3"]  # x3 não passa na frente do retry de x1
+    q.close()
+
+def test_rate_limited_job_defers_rest_of_key_within_tick(tmp_path):
+    calls = []
+    q = _queue(tmp_path, lambda ev: calls.append(ev.id),
+               rate_limits={"base-testnet:ORACLE_UPDATE": {"rps": 0, "burst": 1}})
+    q.enqueue_many([_ev(1, "x", "ORACLE_UPDATE"), _ev(2, "x", "ORACLE_UPDATE"), _ev(3, "x"), _ev(1, "y")])
+    q.tick()
+    assert sorted(calls) == ["x1", "y1"]  # x2 limitado; x3 (sem limite) não passa na frente
+    q.close()
+
+def test_distinct_keys_run_in_parallel(tmp_path):
+    barrier = threading.Barrier(3, timeout=5)
+    ran = []
+    def handler(ev):
+        barrier.wait()  # só passa se as três partições estiverem rodando ao mesmo tempo
+        ran.append(ev.id)
+    q = _queue(tmp_path, handler, workers=3)
+    q.enqueue_many([_ev(1, "x"), _ev(1, "y"), _ev(1, "z")])
+    assert q.tick() == 3
+    assert sorted(ran) == ["x1", "y1", "z1"]
+    q.close()
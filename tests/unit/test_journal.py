@@ -0,0 +1,97 @@
+from core.persistence.journal import JournaledState
+
+def _crash(j: JournaledState) -> None:
+    # processo morre sem checkpoint: o SO fecha os arquivos e solta o lock de dono
+    j._journal.close()
+    j._owner.close()
+
+def test_replays_journal_after_restart(tmp_path):
+    path = str(tmp_path / "agents_state.json")
+    j = JournaledState(path, checkpoint_every=1000)
+    j.append("bridge:messages", {"id": "a", "confirmed": False})
+    j.patch("bridge:messages", 0, {"confirmed": True})
+    j.merge("oracle", {"price": 1})
+    j.set("pfnet:1", {"status": {"last_signal": "LOG"}})
+    _crash(j)
+
+    again = JournaledState(path)
+    assert again.snapshot() == {
+        "bridge:messages": [{"id": "a", "confirmed": True}],
+        "oracle": {"price": 1},
+        "pfnet:1": {"status": {"last_signal": "LOG"}},
+    }
+
+def test_checkpoint_truncates_and_ignores_torn_tail(tmp_path):
+    path = str(tmp_path / "agents_state.json")
+    j = JournaledState(path, checkpoint_every=2)
+    j.append("transfers", {"id": 1})
+    j.append("transfers", {"id": 2})   # dispara checkpoint
+    j.append("transfers", {"id": 3})
+    with open(j.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op":"append","k":"transf')  # crash no meio da escrita
+    _crash(j)
+
+    again = JournaledState(path)
+    again.append("transfers", {"id": 4})
+    _crash(again)
+    assert [t["id"] for t in JournaledState(path).get("transfers")] == [1, 2, 3, 4]
+
+def test_unset_removes_dict_keys_on_replay(tmp_path):
+    path = str(tmp_path / "queue.json")
+    j = JournaledState(path)
+    j.merge("jobs", {"a": {"n": 1}, "b": {"n": 2}})
+    j.unset("jobs", ["a", "missing"])
+    _crash(j)
+    assert JournaledState(path).get("jobs") == {"b": {"n": 2}}
+
+def test_transaction_without_marker_is_dropped_on_reload(tmp_path):
+    path = str(tmp_path / "agents_state.json")
+    marked = {"e1"}
+    j = JournaledState(path, committed=lambda tag: tag in marked)
+    with j.transaction("e1"):
+        j.append("transfers", {"id": "t1"})
+    with j.transaction("e2") as tx:
+        j.append("transfers", {"id": "t2"})
+        tx.prepare()  # crash antes do commit do marcador de e2
+    _crash(j)
+
+    again = JournaledState(path, committed=lambda tag: tag in marked)
+    assert [t["id"] for t in again.get("transfers")] == ["t1"]
+    _crash(again)
+    marked.add("e2")  # retentativa de e2 grava o marcador depois: a tx antiga não volta
+    assert [t["id"] for t in JournaledState(path, committed=lambda tag: tag in marked).get("transfers")] == ["t1"]
+
+def test_failed_transaction_is_undone_and_aborted(tmp_path):
+    path = str(tmp_path / "agents_state.json")
+    j = JournaledState(path)
+    j.merge("oracle", {"price": 1})
+    try:
+        with j.transaction("e1") as tx:
+            j.merge("oracle", {"price": 2, "src": "x"})
+            j.append("transfers", {"id": "t1"})
+            tx.prepare()
+            raise RuntimeError("commit do marcador falhou")
+    except RuntimeError:
+        pass
+    assert j.snapshot() == {"oracle": {"price": 1}, "transfers": []}
+    _crash(j)
+    assert JournaledState(path).get("oracle") == {"price": 1}
+
+def test_second_process_cannot_open_journal(tmp_path):
+    import subprocess, sys
+    path = str(tmp_path / "agents_state.json")
+    j = JournaledState(path)
+    code = "import sys; from core.persistence.journal import JournaledState; JournaledState(sys.argv[1])"
+    r = subprocess.run([sys.executable, "-c", code, path], capture_output=True, text=True)
+    assert r.returncode != 0 and "outra instância" in r.stderr
+    j.close()
+    assert subprocess.run([sys.executable, "-c", code, path]).returncode == 0
+
+def test_second_instance_in_same_process_cannot_open_journal(tmp_path):
+    import pytest
+    path = str(tmp_path / "agents_state.json")
+    j = JournaledState(path)
+    with pytest.raises(RuntimeError, match="outra instância"):
+        JournaledState(path)
+    j.close()
+    JournaledState(path).close()
@@ -0,0 +1,32 @@
+from services.pending_confirmations import PendingConfirmations
+
+def test_pops_in_pointer_order_as_head_advances():
+    p = PendingConfirmations()
+    for ref, bn in (("c", 12), ("a", 10), ("b", 10), ("d", 11)):
+        assert p.add("base-testnet", {"block_number": bn}, ref)
+    assert not p.add("base-testnet", {"slot": 5}, "x")  # ponteiro da chain errada
+    assert p.pop_confirmed("base-testnet", 11, 2) == []
+    assert p.pop_confirmed("base-testnet", 12, 2) == ["a", "b"]  # empate: ordem de chegada
+    assert p.pop_confirmed("base-testnet", 14, 2) == ["d", "c"]
+    assert len(p) == 0
+
+def test_head_regression_and_requirement_change():
+    p = PendingConfirmations()
+    p.add("solana-testnet", {"slot": 100}, "m1")
+    p.add("solana-testnet", {"slot": 105}, "m2")
+    assert p.pop_confirmed("solana-testnet", 101, 1) == ["m1"]
+    # reorg: head volta; nada novo sai e o que já saiu não volta
+    assert p.pop_confirmed("solana-testnet", 99, 1) == []
+    assert p.pop_confirmed("solana-testnet", None, 1) == []
+    # confirmations:<chain> maior vale no próximo pop, sem rebuild
+    assert p.pop_confirmed("solana-testnet", 110, 6) == []
+    assert p.pop_confirmed("solana-testnet", 110, 5) == ["m2"]
+
+def test_rebuild_skips_confirmed():
+    p = PendingConfirmations()
+    p.add("base-testnet", {"block_number": 1}, "old")
+    p.rebuild([
+        ("a", {"src": {"chain": "base-testnet"}, "pointer": {"block_number": 5}, "confirmed": False}),
+        ("b", {"src": {"chain": "base-testnet"}, "pointer": {"block_number": 3}, "confirmed": True}),
+    ])
+    assert p.pop_confirmed("base-testnet", 100, 0) == ["a"]
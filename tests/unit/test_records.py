@@ -0,0 +1,22 @@
+from core.records import EventRecord, JobRecord, PointerRecord
+from core.schemas import JobEnvelope
+
+def _job() -> JobRecord:
+    payload = {"address": "0xAB", "decoded": {"amount": 10, "memo": 'a,"payload":b'}}
+    ev = EventRecord("ev1", "TRANSFER", PointerRecord("base-testnet", block_number=7), 1.0, payload=payload)
+    return JobRecord(ev.id, ev, attempts=1, next_run_at=2.0)
+
+def test_requeue_after_payload_read_reuses_raw_text():
+    wire = _job().model_dump_json()
+    rec = JobRecord.from_json(wire)
+    raw = rec.event._payload_json
+    assert rec.event.payload["decoded"]["memo"] == 'a,"payload":b'
+    rec.attempts += 1
+    again = rec.model_dump_json()
+    assert rec.event._payload_json is raw and again.endswith(f',"payload":{raw}}}}}')
+    back = JobRecord.from_json(again)
+    assert back.attempts == 2 and back.event.payload == _job().event.payload
+
+def test_wire_format_is_readable_by_pydantic():
+    env = JobEnvelope.model_validate_json(JobRecord.from_json(_job().model_dump_json()).model_dump_json())
+    assert env.event.payload["address"] == "0xAB" and env.event.source.block_number == 7
@@ -0,0 +1,53 @@
+import time
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # CLAIM_SCRIPT/OWNED_SCRIPT rodam no Lua do fakeredis
+
+from core.records import EventRecord, JobRecord, PointerRecord
+from storage.redis_queue import RedisQueueBackend
+
+def _env(i: int, run_at: float) -> JobRecord:
+    ev = EventRecord(f"ev{i}", "TRANSFER", PointerRecord("base-testnet", block_number=i), run_at, payload={"n": i})
+    return JobRecord(ev.id, ev, next_run_at=run_at)
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def _backend(server, worker: str, lease: float = 30.0) -> RedisQueueBackend:
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return RedisQueueBackend("", lease_seconds=lease, worker_id=worker, client=client)
+
+def test_claim_is_exclusive_and_ack_removes(server):
+    a, b = _backend(server, "a"), _backend(server, "b")
+    now = time.time()
+    a.enqueue_many([_env(i, now) for i in range(4)])
+    got_a, got_b = a.pop_due(now, 3), b.pop_due(now, 3)
+    assert len(got_a) == 3 and len(got_b) == 1
+    assert not {e.job_id for e in got_a} & {e.job_id for e in got_b}
+    assert a.ack_many(got_a) == [] and b.ack(got_b[0])
+    assert a.pop_due(now + 3600, 10) == [] and a.r.zcard(a.key_due) == 0
+
+def test_enqueue_does_not_reschedule_leased_job(server):
+    a, b = _backend(server, "a"), _backend(server, "b")
+    now = time.time()
+    a.enqueue(_env(1, now))
+    (job,) = a.pop_due(now, 10)
+    b.enqueue(_env(1, now))  # reenvio do mesmo evento enquanto o lease vale
+    assert b.pop_due(now + 1, 10) == []
+    assert a.ack(job)
+
+def test_expired_lease_is_reclaimed_and_stale_owner_rejected(server):
+    a, b = _backend(server, "a", lease=5), _backend(server, "b", lease=5)
+    now = time.time()
+    a.enqueue_many([_env(1, now), _env(2, now)])
+    stale = a.pop_due(now, 10)
+    assert b.pop_due(now + 1, 10) == []            # lease de a ainda vale
+    taken = b.pop_due(now + 6, 10)                 # lease vencido: b assume
+    assert sorted(e.job_id for e in taken) == ["ev1", "ev2"]
+    assert sorted(a.ack_many(stale)) == ["ev1", "ev2"]
+    stale[0].next_run_at = now
+    assert a.requeue_many(stale[:1]) == ["ev1"] and not a.dead_letter(stale[1], "x")
+    assert b.requeue_many(taken[:1]) == [] and b.dead_letter(taken[1], "boom")
+    assert b.r.llen(b.key_dlq) == 1 and [e.job_id for e in b.pop_due(now + 3600, 10)] == ["ev1"]
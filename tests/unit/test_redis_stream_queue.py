@@ -0,0 +1,70 @@
+import time
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # ack/requeue/DLQ passam pelo OWNED_SCRIPT (Lua)
+
+from core.records import EventRecord, JobRecord, PointerRecord
+from storage.redis_stream_queue import RedisStreamQueueBackend
+
+def _env(i: int, run_at: float) -> JobRecord:
+    ev = EventRecord(f"ev{i}", "TRANSFER", PointerRecord("base-testnet", block_number=i), run_at, payload={"n": i})
+    return JobRecord(ev.id, ev, next_run_at=run_at)
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def _backend(server, worker: str, lease: float = 30.0) -> RedisStreamQueueBackend:
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return RedisStreamQueueBackend(client=client, worker_id=worker, lease_seconds=lease)
+
+def test_consumers_share_work_without_duplicates(server):
+    a, b = _backend(server, "a"), _backend(server, "b")
+    now = time.time()
+    a.enqueue_many([_env(i, now) for i in range(10)])
+    a.enqueue(_env(0, now))  # duplicado ignorado
+    got_a = a.pop_due(now, 6)
+    got_b = b.pop_due(now, 6)
+    ids = [e.job_id for e in got_a + got_b]
+    assert len(ids) == 10 and len(set(ids)) == 10
+    a.ack_many(got_a)
+    b.ack_many(got_b)
+    assert a.pop_due(now, 10) == []
+
+def test_delayed_retry_and_crash_recovery(server):
+    a, b = _backend(server, "a", lease=0.0), _backend(server, "b", lease=0.0)
+    now = time.time()
+    a.enqueue(_env(1, now))
+    env = a.pop_due(now, 1)[0]
+    env.attempts, env.next_run_at = 1, now + 60
+    a.requeue(env)
+    assert a.pop_due(now, 1) == []
+    retried = a.pop_due(now + 61, 1)
+    assert [e.attempts for e in retried] == [1]
+    # "a" morre sem ack: "b" recupera via XAUTOCLAIM
+    recovered = b.pop_due(now + 61, 1)
+    assert [e.job_id for e in recovered] == ["ev1"]
+
+def test_delayed_items_are_promoted_once(server):
+    a, b = _backend(server, "a"), _backend(server, "b")
+    now = time.time()
+    a.enqueue_many([_env(i, now + 10) for i in range(4)] + [_env(9, now + 100)])
+    assert a.pop_due(now, 10) == []
+    got = a.pop_due(now + 11, 2) + b.pop_due(now + 11, 10) + a.pop_due(now + 11, 10)
+    assert sorted(e.job_id for e in got) == ["ev0", "ev1", "ev2", "ev3"]
+    assert a.r.zcard(a.key_delayed) == 1  # ev9 ainda não venceu
+
+def test_stale_consumer_cannot_release_reclaimed_message(server):
+    a, b = _backend(server, "a", lease=0.0), _backend(server, "b", lease=0.0)
+    now = time.time()
+    a.enqueue_many([_env(1, now), _env(2, now)])
+    stale = a.pop_due(now, 10)
+    taken = b.pop_due(now, 10)  # XAUTOCLAIM: b assume as mensagens ociosas de a
+    assert sorted(e.job_id for e in taken) == ["ev1", "ev2"]
+    assert a.ack_many(stale[:1]) == ["ev1"]
+    stale[1].next_run_at = now
+    assert a.requeue_many(stale[1:]) == ["ev2"] and not a.dead_letter(stale[0], "x")
+    assert a.r.xlen(a.key_stream) == 2 and a.r.zcard(a.key_delayed) == 0  # nada duplicado
+    assert b.ack_many(taken) == []
+    assert a.r.xlen(a.key_stream) == 0 and a.r.hlen(a.key_ids) == 0 and a.r.llen(a.key_dlq) == 0
@@ -0,0 +1,52 @@
+# tests/unit/test_scan_plan.py
+import pytest
+from bridge.historical.scan_plan import LogFilter, fetch_logs, plan
+
+T0, T1, T2 = "0x" + "aa" * 32, "0x" + "bb" * 32, "0x" + "cc" * 32
+A, B, C = "0x" + "01" * 20, "0x" + "02" * 20, "0x" + "03" * 20
+
+class FakeProvider:
+    def __init__(self, logs):
+        self.logs = logs
+        self.calls = []
+
+    def get_logs(self, address, topics, from_block, to_block):
+        self.calls.append((address, topics))
+        addrs = {a.lower() for a in (address if isinstance(address, list) else [address])}
+        return [lg for lg in self.logs if lg["address"].lower() in addrs
+                and all(not want or lg["topics"][i] in (want if isinstance(want, list) else [want])
+                        for i, want in enumerate(topics))]
+
+def test_coalesces_and_demultiplexes_per_contract():
+    logs = [{"address": A.upper().replace("0X", "0x"), "topics": [T0]}, {"address": B, "topics": [T1]},
+            {"address": A, "topics": [T1]}, {"address": C, "topics": [T2, T0]}, {"address": B, "topics": [T0]}]
+    filters = [LogFilter(A, [T0]), LogFilter(B, [[T1, T2]]), LogFilter(C, [T2, T0])]
+    provider = FakeProvider(logs)
+    out = fetch_logs(provider, filters, 1, 10)
+    assert out == [[logs[0]], [logs[1]], [logs[3]]]  # A não recebe o T1 que veio pela união
+    assert provider.calls == [(C, [T2, T0]), ([A, B], [[T0, T1, T2]])]
+    assert plan(filters, max_addresses=1) == [[0], [1], [2]]
+
+def test_splits_addresses_then_range_when_result_too_large():
+    class Capped(FakeProvider):
+        def get_logs(self, address, topics, from_block, to_block):
+            got = [lg for lg in super().get_logs(address, topics, from_block, to_block)
+                   if from_block <= lg["blockNumber"] <= to_block]
+            if len(got) > 2:
+                raise ValueError({"code": -32005, "message": "query returned more than 10000 results"})
+            return got
+    logs = [{"address": a, "topics": [T0], "blockNumber": n} for n in (1, 2, 3, 4) for a in (A, B)]
+    provider = Capped(logs)
+    out = fetch_logs(provider, [LogFilter(A, [T0]), LogFilter(B, [T0])], 1, 4)
+    assert out == [[lg for lg in logs if lg["address"] == a] for a in (A, B)]
+    assert len(provider.calls) == 7  # [A,B] → [A] → 1..2, 3..4 ; [B] → 1..2, 3..4
+
+def test_other_provider_errors_are_not_split():
+    class Broken(FakeProvider):
+        def get_logs(self, address, topics, from_block, to_block):
+            self.calls.append(address)
+            raise ValueError({"code": -32005, "message": "project ID request rate exceeded"})
+    provider = Broken([])
+    with pytest.raises(ValueError):
+        fetch_logs(provider, [LogFilter(A, [T0]), LogFilter(B, [T0])], 1, 4)
+    assert provider.calls == [[A.lower(), B.lower()]]
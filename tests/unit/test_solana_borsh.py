@@ -0,0 +1,63 @@
+# tests/unit/test_solana_borsh.py
+import struct
+from bridge.decoders.solana_borsh import SolanaBorshDecoder, b58encode
+
+PID = "11111111111111111111111111111111"
+
+def _s(text):
+    return struct.pack("<I", len(text)) + text.encode()
+
+def test_legacy_layout_output_unchanged():
+    dec = SolanaBorshDecoder({PID: {"discriminator": "u8", "variants": {
+        "2": {"name": "BridgeNotice", "fields": [
+            {"name": "amount", "type": "u64"},
+            {"name": "asset_len", "type": "u8"},
+            {"name": "asset", "type": "bytes_len", "ref": "asset_len"}]}}}})
+    assert dec.decode(PID, b"\x02" + struct.pack("<Q", 500) + b"\x04USDC") == \
+        {"event_tag": 2, "name": "BridgeNotice", "amount": 500, "asset_len": 4, "asset": "USDC"}
+    assert dec.decode(PID, b"\x09\xff") == {"event_tag": 9, "raw": "09ff"}
+    assert dec.decode("outro", b"\x02") is None
+
+def test_full_type_set():
+    dec = SolanaBorshDecoder({PID: {"discriminator": "u32",
+        "types": {"Leg": [{"name": "mint", "type": "pubkey"}, {"name": "amount", "type": "i128"}]},
+        "variants": {"7": {"name": "Rich", "fields": [
+            {"name": "a", "type": "u16"}, {"name": "b", "type": "i32"}, {"name": "ok", "type": "bool"},
+            {"name": "big", "type": "u128"}, {"name": "tag", "type": "[u8; 4]"},
+            {"name": "dst", "type": "string"}, {"name": "memo", "type": "option<string>"},
+            {"name": "none", "type": "option<u64>"}, {"name": "legs", "type": "vec<Leg>"},
+            {"name": "w", "type": "vec<u8>"},
+            {"name": "inner", "type": "struct", "fields": [{"name": "x", "type": "i8"}, {"name": "y", "type": "bytes"}]},
+        ]}}}})
+    raw = (struct.pack("<IHi?", 7, 65535, -5, True) + (2 ** 100 + 3).to_bytes(16, "little") + b"\xde\xad\xbe\xef"
+           + _s("base") + b"\x01" + _s("ref") + b"\x00"
+           + struct.pack("<I", 1) + bytes(32) + (-(2 ** 70)).to_bytes(16, "little", signed=True)
+           + struct.pack("<I", 2) + b"\x01\x02" + struct.pack("<b", -1) + struct.pack("<I", 1) + b"\xaa")
+    assert dec.decode(PID, raw) == {
+        "event_tag": 7, "name": "Rich", "a": 65535, "b": -5, "ok": True, "big": 2 ** 100 + 3, "tag": "deadbeef",
+        "dst": "base", "memo": "ref", "none": None, "legs": [{"mint": PID, "amount": -(2 ** 70)}],
+        "w": "0102", "inner": {"x": -1, "y": "aa"}}
+    assert b58encode(bytes(31) + b"\x01") == "1" * 31 + "2"
+
+def test_vec_count_bounded_by_buffer():
+    import pytest
+    dec = SolanaBorshDecoder({PID: {"discriminator": "u8", "types": {"Empty": []},
+        "variants": {"1": {"name": "V", "fields": [{"name": "xs", "type": "vec<u64>"}]},
+                     "2": {"name": "S", "fields": [{"name": "xs", "type": "vec<string>"}]},
+                     "3": {"name": "Z", "fields": [{"name": "xs", "type": "vec<[u8; 0]>"}]},
+                     "4": {"name": "E", "fields": [{"name": "xs", "type": "vec<Empty>"}]}}}})
+    huge = struct.pack("<I", 2 ** 32 - 1)
+    for tag in (1, 2, 3, 4):
+        with pytest.raises(ValueError):
+            dec.decode(PID, bytes([tag]) + huge)
+    assert dec.decode(PID, b"\x03" + struct.pack("<I", 0))["xs"] == []
+    assert dec.decode(PID, b"\x02" + struct.pack("<I", 2) + _s("a") + _s(""))["xs"] == ["a", ""]
+
+def test_unsupported_layout_is_skipped():
+    other = "So11111111111111111111111111111111111111112"
+    dec = SolanaBorshDecoder({PID: {"discriminator": "f64", "variants": {"1": {"name": "X", "fields": []}}},
+                              other: {"discriminator": "u8", "variants": {"1": {"name": "Ok", "fields": [
+                                  {"name": "v", "type": "u8"}, {"name": "rest", "type": "mystery"}]}}}})
+    assert dec.decode(PID, b"\x01" * 8) is None
+    assert "discriminator" in dec.unsupported[PID]
+    assert dec.decode(other, b"\x01\x05\xab") == {"event_tag": 1, "name": "Ok", "v": 5, "rest": "ab"}
@@ -0,0 +1,39 @@
+# tests/unit/test_solana_listener.py
+import base64
+import importlib
+import struct
+import sys
+import types
+
+from bridge.decoders.solana_borsh import SolanaBorshDecoder
+
+PID = "11111111111111111111111111111111"
+LAYOUT = {"discriminator": "u8", "variants": {"1": {"name": "Ping", "fields": [{"name": "n", "type": "u64"}]}}}
+
+def _listener(monkeypatch, emitted):
+    # o SDK solana não é dependência dos testes: só o provider é substituído
+    monkeypatch.setitem(sys.modules, "bridge.providers.solana_provider", types.SimpleNamespace(SolanaProvider=object))
+    monkeypatch.delitem(sys.modules, "bridge.solana_listener", raising=False)
+    mod = importlib.import_module("bridge.solana_listener")
+    monkeypatch.delitem(sys.modules, "bridge.solana_listener")
+    lst = mod.SolanaListener.__new__(mod.SolanaListener)
+    lst.emit, lst.evmap = emitted.append, {}
+    lst.decoder, lst._layout_programs = SolanaBorshDecoder({PID: LAYOUT}), {PID}
+    lst.adapt = types.SimpleNamespace(faster=lambda: None)
+    return lst
+
+def _value(err, n: int = 7):
+    data = base64.b64encode(b"\x01" + struct.pack("<Q", n)).decode()
+    return {"signature": "sig1", "slot": 10, "err": err,
+            "logs": [f"Program {PID} invoke [1]", f"Program data: {data}", f"Program {PID} success"]}
+
+def test_ws_value_emits_decoded_program_data(monkeypatch):
+    emitted = []
+    _listener(monkeypatch, emitted)._decode_and_emit_ws(_value(None))
+    assert [(e["log_index"], e["payload"]["decoded"]) for e in emitted] == [(1, {"event_tag": 1, "name": "Ping", "n": 7})]
+
+def test_failed_tx_does_not_emit_program_data(monkeypatch):
+    emitted = []
+    _listener(monkeypatch, emitted)._decode_and_emit_ws(_value({"InstructionError": [0, {"Custom": 1}]}))
+    assert len(emitted) == 1 and "program_id" not in emitted[0]["payload"]
+    assert emitted[0]["payload"]["err"] and emitted[0]["payload"]["decoded"] == {"logs": _value(None)["logs"]}
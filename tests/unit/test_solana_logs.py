@@ -0,0 +1,40 @@
+# tests/unit/test_solana_logs.py
+import base64
+from bridge.decoders.solana_logs import parse_program_data
+
+A = "AgentProg1111111111111111111111111111111111"
+B = "BridgeProg111111111111111111111111111111111"
+
+def _b64(raw):
+    return base64.b64encode(raw).decode()
+
+def test_program_data_attributed_to_invoking_program():
+    logs = [
+        f"Program {A} invoke [1]",
+        "Program log: Instruction: Heartbeat",
+        f"Program {B} invoke [2]",
+        f"Program data: {_b64(b'inner')}",
+        f"Program {B} consumed 1200 of 190000 compute units",
+        f"Program {B} success",
+        f"Program data: {_b64(b'ab')} {_b64(b'cd')}",
+        "Program data: %%%invalido",
+        f"Program {A} success",
+        f"Program {B} invoke [1]",
+        f"Program {B} failed: custom program error: 0x1",
+    ]
+    assert parse_program_data(logs) == [(3, B, b"inner"), (6, A, b"abcd")]
+    assert parse_program_data(logs, programs={A}) == [(6, A, b"abcd")]
+
+def test_failed_frame_drops_its_data_and_inner_frames():
+    logs = [
+        f"Program {A} invoke [1]",
+        f"Program data: {_b64(b'kept')}",
+        f"Program {A} success",
+        f"Program {A} invoke [1]",
+        f"Program data: {_b64(b'outer')}",
+        f"Program {B} invoke [2]",
+        f"Program data: {_b64(b'inner')}",
+        f"Program {B} success",
+        f"Program {A} failed: custom program error: 0x1",
+    ]
+    assert parse_program_data(logs) == [(1, A, b"kept")]
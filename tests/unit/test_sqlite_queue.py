@@ -0,0 +1,103 @@
+import time
+from core.records import EventRecord, JobRecord, PointerRecord
+from storage.dlq import SQLiteDeadLetters
+from storage.sqlite_queue import SQLiteQueueBackend
+
+def _job(i: int, run_at: float) -> JobRecord:
+    ev = EventRecord(f"ev{i}", "TRANSFER", PointerRecord("base-testnet", block_number=i), run_at, payload={"n": i})
+    return JobRecord(ev.id, ev, next_run_at=run_at)
+
+def test_two_workers_claim_disjoint_sets(tmp_path):
+    path = str(tmp_path / "queue.db")
+    a = SQLiteQueueBackend(path, worker_id="a")
+    b = SQLiteQueueBackend(path, worker_id="b")
+    now = time.time()
+    a.enqueue_many([_job(i, now) for i in range(10)])
+    got_a, got_b = a.pop_due(now, 6), b.pop_due(now, 6)
+    ids = [j.job_id for j in got_a + got_b]
+    assert len(got_a) == 6 and len(ids) == 10 and len(set(ids)) == 10
+    assert a.ack_many(got_a) == [] and b.ack_many(got_b) == []
+    assert a.pop_due(now + 3600, 10) == []
+    a.close()
+    b.close()
+
+def test_expired_lease_is_reclaimed_and_stale_writes_rejected(tmp_path):
+    path = str(tmp_path / "queue.db")
+    a = SQLiteQueueBackend(path, worker_id="a", lease_seconds=30)
+    b = SQLiteQueueBackend(path, worker_id="b", lease_seconds=30)
+    now = time.time()
+    a.enqueue_many([_job(i, now) for i in range(3)])
+    stale = a.pop_due(now, 3)
+    assert b.pop_due(now + 1, 3) == []              # lease de "a" ainda vale
+    fresh = b.pop_due(now + 31, 3)                  # venceu: "b" assume
+    assert sorted(j.job_id for j in fresh) == ["ev0", "ev1", "ev2"]
+
+    # "a" volta atrasado: ack/requeue/DLQ não tocam nos jobs de "b"
+    assert sorted(a.ack_many(stale[:2])) == ["ev0", "ev1"]
+    stale[2].attempts, stale[2].next_run_at = 1, now
+    assert a.requeue_many([stale[2]]) == ["ev2"]
+    assert a.dead_letter(stale[2], "boom") is False
+    assert SQLiteDeadLetters(path).count() == 0
+
+    assert b.ack_many(fresh[:2]) == []
+    fresh[2].attempts, fresh[2].next_run_at, fresh[2].error = 1, now, "x"
+    assert b.requeue(fresh[2]) is True
+    again = a.pop_due(now + 62, 3)                  # requeue de "b" liberou o job para qualquer worker
+    assert [(j.job_id, j.attempts, j.error) for j in again] == [("ev2", 1, "x")]
+    assert a.dead_letter(again[0], "boom") is True
+    assert SQLiteDeadLetters(path).count() == 1
+    a.close()
+    b.close()
+
+def test_expired_leases_count_as_attempts_and_reach_dlq(tmp_path):
+    path = str(tmp_path / "queue.db")
+    q = SQLiteQueueBackend(path, worker_id="a", lease_seconds=10)
+    now = time.time()
+    job = _job(0, now)
+    job.max_attempts = 3
+    q.enqueue_many([job])
+    assert q.pop_due(now, 1)[0].attempts == 0
+    got = q.pop_due(now + 11, 1)                    # worker travou: lease venceu
+    assert [(j.attempts, j.error) for j in got] == [(1, "lease expirado")]
+    assert q.pop_due(now + 22, 1)[0].attempts == 2
+    assert q.pop_due(now + 33, 1) == []             # 3º vencimento esgota: vai para a DLQ
+    assert SQLiteDeadLetters(path).count() == 1
+    assert q.pop_due(now + 3600, 1) == []
+    q.close()
+
+def _acked(backend: SQLiteQueueBackend, n: int, now: float):
+    backend.enqueue_many([_job(i, now) for i in range(n)])
+    assert backend.ack_many(backend.pop_due(now, n)) == []
+
+def test_compact_retention_archive_and_chunks(tmp_path):
+    path = str(tmp_path / "queue.db")
+    be = SQLiteQueueBackend(path, worker_id="a")
+    now = time.time()
+    _acked(be, 5, now)
+    be.enqueue(_job(99, now + 3600))                          # pendente: nunca sai
+    assert be.compact(retention_seconds=3600) == 0            # acked recentes ficam
+    assert be.compact(retention_seconds=-1, chunk=2, archive=True) == 5   # 3 transações (2+2+1)
+    c = be._conn()
+    assert c.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+    assert c.execute("SELECT COUNT(*) FROM jobs_archive").fetchone()[0] == 5
+    assert c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # banco novo já nasce incremental
+    be.close()
+
+def test_compactor_thread_and_explicit_vacuum_conversion(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE legacy(x)")                     # banco antigo: auto_vacuum=NONE
+    old.commit()
+    old.close()
+    be = SQLiteQueueBackend(path, worker_id="a")
+    assert be._conn().execute("PRAGMA auto_vacuum").fetchone()[0] == 0   # __init__ não converte
+    assert be.enable_incremental_vacuum() is True
+    assert be.enable_incremental_vacuum() is False
+    _acked(be, 3, time.time())
+    be.start_compactor(retention_seconds=-1, interval_sec=0.01, chunk=1)
+    deadline = time.time() + 5
+    while be._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0] and time.time() < deadline:
+        time.sleep(0.01)
+    assert be._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+    be.close()
@@ -0,0 +1,109 @@
+import json
+import time
+from core.state_store import StateStore, StateConflict
+
+def test_get_set_roundtrip(tmp_path):
+    s = StateStore(str(tmp_path / "state.db"))
+    s.set("head:base-testnet", {"block_number": 10})
+    head = s.get("head:base-testnet")
+    head["block_number"] = 99  # cópia independente do cache
+    assert s.get("head:base-testnet") == {"block_number": 10}
+    assert s.get("missing", "d") == "d"
+    s.set("cp", None)
+    assert s.get("cp", "d") is None
+
+def test_cache_sees_other_instance_writes(tmp_path):
+    a = StateStore(str(tmp_path / "state.db"))
+    b = StateStore(str(tmp_path / "state.db"))
+    a.set("cp:base:scan_block", 1)
+    assert b.get("cp:base:scan_block") == 1
+    b.set("cp:base:scan_block", 2)
+    assert a.get("cp:base:scan_block") == 2
+
+def test_compare_and_set(tmp_path):
+    s = StateStore(str(tmp_path / "state.db"))
+    assert s.compare_and_set("k", None, 1)
+    assert not s.compare_and_set("k", None, 2)
+    assert s.compare_and_set("k", 1, 3)
+    assert s.get("k") == 3
+
+def test_migrates_legacy_json(tmp_path):
+    (tmp_path / "state.json").write_text(json.dumps({"cp:sol:scan_slot": 42}))
+    s = StateStore(str(tmp_path / "state.db"))
+    assert s.get("cp:sol:scan_slot") == 42
+    assert not (tmp_path / "state.json").exists()
+
+def test_legacy_json_backend(tmp_path):
+    s = StateStore(str(tmp_path / "state.json"))
+    s.set("a", {"b": 1})
+    assert s.compare_and_set("a", {"b": 1}, 2)
+    assert json.loads((tmp_path / "state.json").read_text()) == {"a": 2}
+
+def test_batch_commits_once_and_discards_on_error(tmp_path):
+    s = StateStore(str(tmp_path / "state.db"))
+    with s.batch():
+        s.set("head:base-testnet", {"block_number": 5})
+        s.mset({"processed:a": {"at": 1}, "processed:b": {"at": 2}})
+        assert s.get("processed:a") == {"at": 1}   # lê as próprias escritas
+    other = StateStore(str(tmp_path / "state.db"))
+    assert other.mget(["processed:a", "processed:b"]) == {"processed:a": {"at": 1}, "processed:b": {"at": 2}}
+
+    try:
+        with s.batch():
+            s.set("processed:c", True)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert s.get("processed:c") is None
+
+def test_transaction_detects_conflict(tmp_path):
+    a = StateStore(str(tmp_path / "state.db"))
+    b = StateStore(str(tmp_path / "state.db"))
+    a.set("head", 1)
+    try:
+        with a.transaction():
+            cur = a.get("head")
+            b.set("head", 2)
+            a.set("head", cur + 10)
+    except StateConflict:
+        pass
+    else:
+        raise AssertionError("esperava StateConflict")
+    assert a.get("head") == 2
+
+def test_compare_and_set_many(tmp_path):
+    s = StateStore(str(tmp_path / "state.db"))
+    s.mset({"x": 1, "y": 2})
+    assert not s.compare_and_set_many({"x": 1, "y": 3}, {"x": 10, "y": 20})
+    assert s.mget(["x", "y"]) == {"x": 1, "y": 2}
+    assert s.compare_and_set_many({"x": 1, "y": 2}, {"x": 10, "y": 20})
+    assert s.mget(["x", "y"]) == {"x": 10, "y": 20}
+
+def test_cache_is_bounded_lru(tmp_path):
+    s = StateStore(str(tmp_path / "state.db"), cache_size=3)
+    for i in range(10):
+        s.set(f"processed:{i}", {"at": i})
+    assert len(s._cache) == 3
+    s.get("processed:7")                      # recente: sobe no LRU
+    s.get("processed:0")                      # miss: lido do backend e cacheado
+    assert list(s._cache) == ["processed:9", "processed:7", "processed:0"]
+    assert s.get("processed:1") == {"at": 1}
+
+def test_cache_version_check_is_throttled_and_ignores_own_writes(tmp_path):
+    s = StateStore(str(tmp_path / "state.json"), cache_check_ms=60_000)
+    calls = []
+    version = s._backend.data_version
+    s._backend.data_version = lambda: calls.append(1) or version()
+    s.set("a", 1)
+    assert s.get("a") == 1 and s.get("a") == 1
+    assert len(calls) == 1                    # uma consulta na janela, não uma por get
+    s.set("a", 2)
+    with s.batch():                           # fronteira de batch força a checagem
+        assert s.get("a") == 2
+    assert len(calls) == 2 and "a" in s._cache  # a própria escrita não invalidou o cache
+
+    time.sleep(0.05)                          # mtime do arquivo tem granularidade grossa
+    other = StateStore(str(tmp_path / "state.json"), cache_check_ms=0)
+    other.set("a", 3)
+    with s.batch():
+        assert s.get("a") == 3
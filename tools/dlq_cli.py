@@ -0,0 +1,102 @@
+# janus/tools/dlq_cli.py
+import argparse, json, sys
+import yaml
+from storage.dlq import open_dead_letters, iter_entries, redrive, purge
+from services.job_queue import make_backend
+
+def _qcfg(args):
+    with open(args.config, "r", encoding="utf-8") as f:
+        return (yaml.safe_load(f) or {}).get("queue") or {}
+
+def _filters(args):
+    return {"reason": args.reason, "chain": args.chain, "event_type": args.type,
+            "job_ids": set(args.job_id) if args.job_id else None}
+
+def _public(e):
+    return {k: v for k, v in e.items() if not k.startswith("_")}
+
+def _close(*objs):
+    for o in objs:
+        close = getattr(o, "close", None)
+        if close is not None:
+            close()
+
+def cmd_count(args):
+    dlq = open_dead_letters(_qcfg(args))
+    try:
+        print(dlq.count())
+    finally:
+        _close(dlq)
+
+def cmd_list(args):
+    # NDJSON em streaming: memória constante mesmo com DLQs grandes
+    dlq = open_dead_letters(_qcfg(args))
+    try:
+        n = 0
+        for e in iter_entries(dlq, page_size=args.page_size, **_filters(args)):
+            if args.limit and n >= args.limit:
+                break
+            sys.stdout.write(json.dumps(_public(e), ensure_ascii=False) + "\n")
+            n += 1
+    finally:
+        _close(dlq)
+
+def cmd_redrive(args):
+    qcfg = _qcfg(args)
+    dlq = open_dead_letters(qcfg)
+    backend = None
+    try:
+        backend = make_backend(qcfg)
+        n = redrive(dlq, backend, batch=args.batch, max_items=args.max, dry_run=args.dry_run, **_filters(args))
+        print(json.dumps({"redriven": n, "dry_run": args.dry_run}))
+    finally:
+        _close(dlq, backend)
+
+def cmd_purge(args):
+    dlq = open_dead_letters(_qcfg(args))
+    try:
+        n = purge(dlq, batch=args.batch, max_items=args.max, dry_run=args.dry_run, **_filters(args))
+        print(json.dumps({"purged": n, "dry_run": args.dry_run}))
+    finally:
+        _close(dlq)
+
+def main():
+    p = argparse.ArgumentParser(description="Janus DLQ CLI")
+    p.add_argument("--config", default="config/sync.yaml")
+    sub = p.add_subparsers()
+
+    def with_filters(sp):
+        sp.add_argument("--reason", default=None, help="substring do motivo")
+        sp.add_argument("--chain", default=None)
+        sp.add_argument("--type", default=None, help="tipo do evento")
+        sp.add_argument("--job-id", action="append", default=None, help="repetível")
+        return sp
+
+    d_count = sub.add_parser("count", help="total de entradas na DLQ")
+    d_count.set_defaults(func=cmd_count)
+
+    d_list = with_filters(sub.add_parser("list", help="lista entradas (NDJSON)"))
+    d_list.add_argument("--limit", type=int, default=0, help="0 = todas")
+    d_list.add_argument("--page-size", type=int, default=500)
+    d_list.set_defaults(func=cmd_list)
+
+    d_redrive = with_filters(sub.add_parser("redrive", help="devolve entradas à fila em lotes"))
+    d_redrive.add_argument("--batch", type=int, default=1000)
+    d_redrive.add_argument("--max", type=int, default=None)
+    d_redrive.add_argument("--dry-run", action="store_true")
+    d_redrive.set_defaults(func=cmd_redrive)
+
+    d_purge = with_filters(sub.add_parser("purge", help="apaga entradas da DLQ em lotes"))
+    d_purge.add_argument("--batch", type=int, default=1000)
+    d_purge.add_argument("--max", type=int, default=None)
+    d_purge.add_argument("--dry-run", action="store_true")
+    d_purge.set_defaults(func=cmd_purge)
+
+    args = p.parse_args()
+    if hasattr(args, "func"):
+        args.func(args)
+    else:
+        p.print_help()
+
+if __name__ == "__main__":
+    main()
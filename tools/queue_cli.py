@@ -0,0 +1,42 @@
+# janus/tools/queue_cli.py
+import argparse, json
+import yaml
+from storage.sqlite_queue import SQLiteQueueBackend
+
+def _backend(args) -> SQLiteQueueBackend:
+    with open(args.config, "r", encoding="utf-8") as f:
+        qcfg = (yaml.safe_load(f) or {}).get("queue") or {}
+    path = args.path or (qcfg.get("sqlite") or {}).get("path", ".runtime/janus_queue.db")
+    return SQLiteQueueBackend(path=path)
+
+def cmd_compact(args):
+    be = _backend(args)
+    try:
+        converted = be.enable_incremental_vacuum() if args.enable_incremental_vacuum else False
+        removed = be.compact(args.retention, chunk=args.chunk, archive=args.archive)
+        print(json.dumps({"removed": removed, "converted_incremental_vacuum": converted}))
+    finally:
+        be.close()
+
+def main():
+    p = argparse.ArgumentParser(description="Janus queue (SQLite) maintenance CLI")
+    p.add_argument("--config", default="config/sync.yaml")
+    p.add_argument("--path", default=None, help="banco da fila (padrão: queue.sqlite.path)")
+    sub = p.add_subparsers()
+
+    q_compact = sub.add_parser("compact", help="aplica a retenção de jobs acked agora")
+    q_compact.add_argument("--retention", type=float, default=86400, help="segundos após o ack")
+    q_compact.add_argument("--chunk", type=int, default=1000)
+    q_compact.add_argument("--archive", action="store_true", help="move para jobs_archive em vez de apagar")
+    q_compact.add_argument("--enable-incremental-vacuum", action="store_true",
+                           help="converte banco antigo para auto_vacuum=INCREMENTAL (VACUUM completo, com lock)")
+    q_compact.set_defaults(func=cmd_compact)
+
+    args = p.parse_args()
+    if hasattr(args, "func"):
+        args.func(args)
+    else:
+        p.print_help()
+
+if __name__ == "__main__":
+    main()